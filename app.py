@@ -1,12 +1,8 @@
 import streamlit as st
-import os
-import yt_dlp
-import shutil
-import tempfile
-import zipfile
-from contextlib import contextmanager
 import base64
 
+from jy2mate import config, engine, jobs, playlist, progress, streaming, urls
+
 # --------------------------------------------------------------------------
 # 1. 페이지 설정 및 스타일링
 # --------------------------------------------------------------------------
@@ -51,6 +47,23 @@ st.markdown("""
     .stDownloadButton>button:hover {
         background-color: #45a049;
     }
+    /* 전송 서버 다운로드 링크 (다운로드 버튼과 동일한 모양) */
+    a.jy-download-link {
+        display: block;
+        text-align: center;
+        text-decoration: none;
+        background-color: #4CAF50;
+        color: white;
+        border-radius: 8px;
+        padding: 10px 20px;
+        font-weight: bold;
+        width: 100%;
+        transition: background-color 0.3s;
+    }
+    a.jy-download-link:hover {
+        background-color: #45a049;
+        color: white;
+    }
     /* 입력창 및 라디오 버튼 컨테이너 */
     .st-emotion-cache-1r6slb0 {
         border: 1px solid #e0e0e0;
@@ -75,88 +88,15 @@ st.markdown("""
 # 2. 핵심 함수 정의
 # --------------------------------------------------------------------------
 
-@contextmanager
-def temporary_directory():
-    """임시 디렉토리를 생성하고 사용 후 정리하는 컨텍스트 관리자"""
-    temp_dir = tempfile.mkdtemp()
-    try:
-        yield temp_dir
-    finally:
-        shutil.rmtree(temp_dir)
-
-def download_content(url, download_type, quality, temp_dir):
-    """
-    yt-dlp를 사용하여 비디오 또는 오디오를 다운로드하는 함수.
-    성공 시 (파일 경로, 파일명, MIME 타입) 튜플을 반환하고, 실패 시 예외를 발생시킵니다.
-    """
-    # yt-dlp 옵션 설정
-    if download_type == '오디오 (MP3)':
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': os.path.join(temp_dir, '%(title)s.%(ext)s'),
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': quality,
-            }],
-            'quiet': True,
-            'ignoreerrors': True,
-            'noprogress': True,
-        }
-    else: # 영상 (MP4)
-        # --- 핵심 수정 부분 ---
-        # 확장자를 특정하지 않고, 화질만으로 최적의 포맷을 선택하도록 수정
-        # yt-dlp가 webm 등 다른 포맷의 영상/음성을 가져와도 최종적으로 mp4로 합쳐줍니다.
-        quality_filter = f'[height<=?{quality.replace("p", "")}]' if quality != 'best' else ''
-        ydl_opts = {
-            'format': f'bestvideo{quality_filter}+bestaudio/best',
-            'outtmpl': os.path.join(temp_dir, '%(title)s.%(ext)s'),
-            'merge_output_format': 'mp4', # 최종 결과물은 항상 mp4로 만듭니다.
-            'quiet': True,
-            'ignoreerrors': True,
-            'noprogress': True,
-        }
-    
-    # 정보 추출 및 다운로드
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info_dict = ydl.extract_info(url, download=True)
-        
-        downloaded_files = [f for f in os.listdir(temp_dir) if not f.endswith('.zip')]
-        if not downloaded_files:
-            raise ValueError("파일을 다운로드하지 못했습니다. URL이 올바르거나 비공개 영상이 아닌지 확인해주세요.")
+# 화면의 다운로드 타입 -> 엔진의 (다운로드 타입, 확장자)
+DOWNLOAD_TYPES = {
+    '오디오 (MP3)': (engine.AUDIO, 'mp3'),
+    '영상 (MP4)': (engine.VIDEO, 'mp4'),
+}
 
-        # 재생목록 여부 확인 (실제 항목이 2개 이상일 때만 재생목록으로 간주)
-        is_playlist = 'entries' in info_dict and info_dict['entries'] and len(info_dict['entries']) > 1
-        
-        if is_playlist:
-            playlist_title = info_dict.get('title', 'playlist')
-            safe_playlist_title = "".join([c for c in playlist_title if c.isalpha() or c.isdigit() or c==' ']).rstrip()
-            zip_filename = f"{safe_playlist_title}.zip"
-            zip_filepath = os.path.join(temp_dir, zip_filename)
-
-            with zipfile.ZipFile(zip_filepath, 'w') as zipf:
-                for file in downloaded_files:
-                    zipf.write(os.path.join(temp_dir, file), arcname=file)
-            
-            return zip_filepath, zip_filename, 'application/zip'
-
-        else:
-            # 단일 파일 처리
-            # 최종적으로 합쳐진 mp4 파일을 찾아야 합니다.
-            final_file = None
-            for file in downloaded_files:
-                if file.endswith('.mp4'):
-                    final_file = file
-                    break
-            
-            if not final_file:
-                 raise FileNotFoundError("최종 mp4 파일을 찾을 수 없습니다. 다운로드 과정에 문제가 발생했을 수 있습니다.")
-
-            file_path = os.path.join(temp_dir, final_file)
-            mime_type = 'video/mp4'
-            return file_path, final_file, mime_type
-        
+@st.cache_resource(show_spinner=False)
 def get_image_base64(path):
+    """로고 이미지를 Base64 로 인코딩합니다. 프로세스당 한 번만 인코딩하고 재실행 때는 재사용합니다."""
     try:
         with open(path, "rb") as img_file:
             return base64.b64encode(img_file.read()).decode('utf-8')
@@ -168,6 +108,46 @@ def get_image_base64(path):
 # 3. Streamlit UI 및 로직 구현
 # --------------------------------------------------------------------------
 
+@st.fragment(run_every=1.0)
+def render_jobs():
+    """이 세션에서 요청한 다운로드 작업들의 상태를 1초마다 갱신해 보여줍니다."""
+    manager = jobs.get_job_manager()
+    links = st.session_state.setdefault('job_links', {})
+    for job_id in st.session_state.get('job_ids', []):
+        job = manager.get(job_id)
+        if job is None:
+            continue
+        st.caption(job.label + (f" · 같은 요청 {job.followers}건 합류" if job.followers else ""))
+        if job.status == jobs.DONE and isinstance(job.result, playlist.PlaylistBuild):
+            build = job.result
+            # ZIP 은 항목이 끝나는 대로 만들어지며 전송되므로, 모든 항목을 기다리지 않고 바로 링크를 제공
+            if job_id not in links:
+                links[job_id] = streaming.get_file_server().publish_stream(build.iter_zip, build.zip_name, 'application/zip')
+            st.progress(build.progress, text=f"{build.finished_count}/{build.total} 항목 완료 (실패 {build.failed_count})")
+            st.markdown(streaming.download_link_html(links[job_id], f"📥 '{build.zip_name}' 다운로드"), unsafe_allow_html=True)
+            with st.expander("항목별 상태"):
+                st.dataframe(build.status_rows(), hide_index=True, use_container_width=True)
+        elif job.status == jobs.DONE:
+            file_path, display_name, mime_type = job.result
+            # 같은 작업은 다시 그려도 링크를 한 번만 등록
+            if job_id not in links:
+                links[job_id] = streaming.get_file_server().publish(
+                    file_path, display_name, mime_type, delete_on_expire=True
+                )
+            st.success(f"**{display_name}** 다운로드가 완료되었습니다!")
+            if job.timings.seconds:
+                st.caption(job.timings.summary())
+            st.markdown(streaming.download_link_html(links[job_id], f"📥 '{display_name}' 다운로드"), unsafe_allow_html=True)
+        elif job.status == jobs.FAILED:
+            st.error(f"다운로드 중 오류가 발생했습니다: {job.error}")
+        else:
+            # yt-dlp 훅이 보낸 진행 상황(받은 바이트, 속도, 남은 시간, 단계)을 표시
+            state = job.channel.drain()
+            if state:
+                st.progress(progress.fraction(state) or job.progress, text=progress.describe(state))
+            else:
+                st.progress(job.progress, text=job.message)
+
 def run_app():
     """메인 애플리케이션을 실행하는 함수"""
     image_path = "JYC_clear.png"
@@ -178,8 +158,23 @@ def run_app():
     st.markdown("<p>유튜브 영상과 오디오를 간편하게 다운로드하세요.</p><br>", unsafe_allow_html=True)
     st.markdown("<p style='text-align: center;'>Developed by JunyoungCho</p>", unsafe_allow_html=True)
     
-    # URL 입력
-    url = st.text_input("다운로드할 YouTube URL을 입력하세요.", placeholder="https://www.youtube.com/watch?v=...")
+    # URL 입력 (배치 모드에서는 여러 URL)
+    batch_mode = st.toggle("여러 URL 한 번에 받기", help="URL 을 한 줄에 하나씩 붙여 넣거나 txt/csv 파일로 올리면 하나의 ZIP 으로 받습니다.")
+    batch_urls = []
+    if batch_mode:
+        url = ''
+        batch_text = st.text_area("URL 목록 (한 줄에 하나)", height=160, placeholder="https://youtu.be/...\nhttps://www.youtube.com/watch?v=...")
+        batch_file = st.file_uploader("또는 txt/csv 파일 올리기", type=['txt', 'csv'])
+        if batch_file is not None:
+            batch_text += '\n' + batch_file.getvalue().decode('utf-8-sig', errors='replace')
+        try:
+            batch_urls = urls.parse_url_list(batch_text, limit=config.BATCH_MAX_URLS)
+        except ValueError as e:
+            st.warning(str(e))
+        if batch_urls:
+            st.caption(f"URL {len(batch_urls)}개 (중복 제외)")
+    else:
+        url = st.text_input("다운로드할 YouTube URL을 입력하세요.", placeholder="https://www.youtube.com/watch?v=...")
 
     # 다운로드 옵션
     col1, col2 = st.columns(2)
@@ -203,34 +198,55 @@ def run_app():
                 ('720p', '1080p', '480p', 'best'),
             )
             st.caption("'best'는 다운로드 가능한 최고 화질입니다.")
+
+    # 영상 하나를 받을 때는 구간만 받을 수 있음 (비워 두면 전체)
+    clip_start = clip_end = None
+    if not batch_mode:
+        col_start, col_end = st.columns(2)
+        with col_start:
+            clip_start = st.text_input("구간 시작 (선택)", placeholder="0:30", help="초 또는 [시:]분:초. 비워 두면 처음부터")
+        with col_end:
+            clip_end = st.text_input("구간 끝 (선택)", placeholder="1:00", help="초 또는 [시:]분:초. 비워 두면 끝까지")
+
+    connections = st.slider("파일 하나당 최대 연결 수", 1, 16, config.DOWNLOAD_CONNECTIONS,
+                            help="큰 파일을 여러 연결로 나눠 받습니다. 처리량이 늘어나는 동안만 이 값까지 연결을 늘립니다.")
+    fan_out = config.BATCH_FAN_OUT
+    if batch_mode:
+        fan_out = st.slider("동시에 진행할 항목 수", 1, 32, min(config.BATCH_FAN_OUT, 32),
+                            help="추출, 다운로드, 후처리 단계는 각각 동시 실행 수가 따로 제한되며, 이 값은 동시에 진행 중인 항목 수입니다.")
             
     # 다운로드 버튼
     if st.button("다운로드 시작", use_container_width=True):
-        if url:
-            with st.spinner('다운로드를 준비 중입니다... 잠시만 기다려주세요.'):
-                with temporary_directory() as temp_dir:
-                    try:
-                        final_path, display_name, mime_type = download_content(url, download_type, quality, temp_dir)
-
-                        st.success(f"**{display_name}** 다운로드가 완료되었습니다!")
-                        
-                        with open(final_path, 'rb') as f:
-                            file_bytes = f.read()
-
-                        st.download_button(
-                            label=f"📥 '{display_name}' 다운로드",
-                            data=file_bytes,
-                            file_name=display_name,
-                            mime=mime_type,
-                            use_container_width=True,
-                            key=f"download_{display_name}" # 상태 유지를 위한 고유 키 추가
-                        )
-                    
-                    except Exception as e:
-                        st.error(f"다운로드 중 오류가 발생했습니다: {e}")
+        engine_type, container = DOWNLOAD_TYPES[download_type]
+        if batch_mode:
+            if batch_urls:
+                job_id = engine.submit_batch(batch_urls, engine_type, quality, container, fan_out, connections)
+                job_ids = st.session_state.setdefault('job_ids', [])
+                if job_id not in job_ids:
+                    job_ids.insert(0, job_id)
+            else:
+                st.warning("다운로드할 URL 목록을 입력해주세요.")
+        elif url:
+            # 스크립트 실행을 막지 않도록 백그라운드 작업으로 등록하고, 아래 작업 목록에서 상태를 확인
+            # 재생목록 URL 은 항목이 둘 이상일 때만 ZIP 으로 받음 (is_playlist=None)
+            # 같은 영상/옵션의 작업이 이미 실행 중이면 새로 받지 않고 그 작업에 합류 (API/명령줄 요청과도 합쳐짐)
+            # 구간을 주면 재생목록 URL 이어도 영상 하나의 그 구간만 받음
+            try:
+                clip = engine.normalize_clip(clip_start, clip_end)
+                job_id = engine.submit(url, engine_type, quality, container, None, config.PLAYLIST_FAN_OUT,
+                                       connections, clip)
+            except ValueError as e:
+                st.warning(str(e))
+            else:
+                job_ids = st.session_state.setdefault('job_ids', [])
+                if job_id not in job_ids:
+                    job_ids.insert(0, job_id)
         else:
             st.warning("유튜브 URL을 입력해주세요.")
 
+    if st.session_state.get('job_ids'):
+        render_jobs()
+
 
 # --------------------------------------------------------------------------
 # 4. 인증 로직 및 앱 실행
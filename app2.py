@@ -1,14 +1,9 @@
 # -*- coding: utf-8 -*-
 
 import streamlit as st
-import os
-import yt_dlp
-import shutil
-import tempfile
-import zipfile
 import base64
-import random
-from contextlib import contextmanager # << [수정 1] contextmanager 임포트
+
+from jy2mate import config, engine, info_cache, jobs, metrics, playlist, progress, streaming, urls
 
 # --------------------------------------------------------------------------
 # 1. 페이지 설정 및 스타일링 (기존과 동일)
@@ -28,6 +23,8 @@ st.markdown("""
     .stButton>button:hover { background-color: #E03C3C; }
     .stDownloadButton>button { background-color: #4CAF50; color: white; border-radius: 8px; border: none; padding: 10px 20px; font-weight: bold; width: 100%; transition: background-color 0.3s; }
     .stDownloadButton>button:hover { background-color: #45a049; }
+    a.jy-download-link { display: block; text-align: center; text-decoration: none; background-color: #4CAF50; color: white; border-radius: 8px; padding: 10px 20px; font-weight: bold; width: 100%; transition: background-color 0.3s; }
+    a.jy-download-link:hover { background-color: #45a049; color: white; }
     h1 { color: #333; text-align: center; }
     p { text-align: center; color: #666; }
 </style>
@@ -38,123 +35,21 @@ st.markdown("""
 # 2. 핵심 함수
 # --------------------------------------------------------------------------
 
-# 여러 브라우저의 User-Agent 리스트
-USER_AGENTS = [
-    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/111.0.0.0 Safari/537.36',
-    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/111.0.0.0 Safari/537.36',
-    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/111.0',
-]
-
-# << [수정 2] use_cookie_from_secrets 함수를 사용하는 함수들보다 먼저 정의
-@contextmanager
-def use_cookie_from_secrets():
+def sync_cookie_secrets():
     """
-    Streamlit Secrets에 저장된 쿠키 내용을 임시 파일로 만들어 그 경로를 제공하고,
-    사용이 끝나면 파일을 자동으로 삭제하는 context manager.
+    Secrets 의 쿠키를 다운로드 엔진에 넣습니다. 값이 바뀌지 않았으면 쿠키 파일을 다시 쓰거나 파싱하지 않습니다.
+    YOUTUBE_COOKIES 는 'default' 프로필이 되고, 여러 계정은 [YOUTUBE_COOKIE_PROFILES] 표에 이름 = 쿠키 내용으로 넣습니다.
     """
+    cookies = {}
     if "YOUTUBE_COOKIES" in st.secrets and st.secrets["YOUTUBE_COOKIES"]:
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, encoding='utf-8', suffix='.txt') as temp_cookie_file:
-            temp_cookie_file.write(st.secrets["YOUTUBE_COOKIES"])
-            cookie_filepath = temp_cookie_file.name
-        
-        try:
-            yield cookie_filepath
-        finally:
-            os.remove(cookie_filepath)
-    else:
-        yield None
-
-def get_video_info(url):
-    """다운로드 없이 영상의 메타데이터만 추출하여 반환합니다."""
-    with use_cookie_from_secrets() as cookie_filepath:
-        ydl_opts = {
-            'quiet': True,
-            'noprogress': True,
-            'cookiefile': cookie_filepath,
-            'http_headers': {'User-Agent': random.choice(USER_AGENTS)},
-        }
-        try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info_dict = ydl.extract_info(url, download=False)
-                return info_dict
-        except yt_dlp.utils.DownloadError as e:
-            return {"error": str(e)}
-
-def download_content(url, download_type, quality, container, is_playlist):
-    """유튜브 콘텐츠를 다운로드하는 통합 함수."""
-    with use_cookie_from_secrets() as cookie_filepath:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            download_path = os.path.join(temp_dir, "downloads")
-            os.makedirs(download_path)
-
-            ydl_opts = {
-                'outtmpl': os.path.join(download_path, '%(playlist_index)s - %(title)s.%(ext)s' if is_playlist else '%(title)s.%(ext)s'),
-                'cookiefile': cookie_filepath,
-                'quiet': True, 'noprogress': True, 'retries': 10, 'fragment_retries': 10,
-                'http_headers': {'User-Agent': random.choice(USER_AGENTS)},
-                'noplaylist': not is_playlist, 'ignoreerrors': is_playlist,
-            }
-
-            if download_type == '오디오':
-                ydl_opts.update({
-                    'format': 'bestaudio/best',
-                    'postprocessors': [{'key': 'FFmpegExtractAudio', 'preferredcodec': container, 'preferredquality': quality}],
-                    'keepvideo': False,
-                })
-            else: # 영상
-                quality_filter = f'[height<=?{quality.replace("p", "")}]' if quality != 'best' else ''
-                ydl_opts.update({
-                    'format': f'bestvideo{quality_filter}[ext=mp4]+bestaudio[ext=m4a]/bestvideo{quality_filter}+bestaudio/best',
-                    'merge_output_format': container,
-                })
-
-            try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info_dict = ydl.extract_info(url, download=True)
-                    if not is_playlist:
-                        if download_type == '오디오' and info_dict.get('requested_downloads'):
-                            final_filepath = info_dict['requested_downloads'][0]['filepath']
-                        else:
-                            final_filepath = ydl.prepare_filename(info_dict)
-                        
-                        if not os.path.exists(final_filepath):
-                            found = False
-                            for f in os.listdir(download_path):
-                                if f.startswith(info_dict.get('title', ' ')):
-                                    final_filepath = os.path.join(download_path, f)
-                                    found = True
-                                    break
-                            if not found: raise FileNotFoundError("다운로드된 파일을 찾을 수 없습니다.")
-                        
-                        display_name = os.path.basename(final_filepath)
-                        with open(final_filepath, "rb") as f:
-                            file_data = f.read()
-                        
-                        mime_type_map = {'mp4': 'video/mp4', 'mkv': 'video/x-matroska', 'mp3': 'audio/mpeg', 'flac': 'audio/flac', 'm4a': 'audio/mp4', 'wav': 'audio/wav'}
-                        mime_type = mime_type_map.get(os.path.splitext(display_name)[1].lower().strip('.'), 'application/octet-stream')
-                        return file_data, display_name, mime_type
-
-            except yt_dlp.utils.DownloadError as e:
-                error_message = str(e)
-                if "Video unavailable" in error_message: raise ValueError("영상을 찾을 수 없습니다. 삭제, 비공개, 국가 제한 등의 원인일 수 있습니다.")
-                elif "HTTP Error 403: Forbidden" in error_message: raise ValueError("유튜브에서 다운로드를 차단했습니다 (오류 403). Secrets의 쿠키 정보가 유효한지 확인해주세요.")
-                else: raise ValueError(f"다운로드 중 오류가 발생했습니다: {error_message}")
-            except Exception as e:
-                raise RuntimeError(f"알 수 없는 오류가 발생했습니다: {e}")
-
-            downloaded_files = os.listdir(download_path)
-            if not downloaded_files: raise FileNotFoundError("다운로드된 파일이 없습니다. URL을 다시 확인하거나, 재생목록의 모든 영상이 유효한지 확인해주세요.")
-            
-            zip_path = os.path.join(temp_dir, "playlist.zip")
-            with zipfile.ZipFile(zip_path, 'w') as zipf:
-                for file in downloaded_files:
-                    zipf.write(os.path.join(download_path, file), arcname=file)
-            
-            with open(zip_path, "rb") as f:
-                return f.read(), "playlist.zip", "application/zip"
+        cookies['default'] = st.secrets["YOUTUBE_COOKIES"]
+    if "YOUTUBE_COOKIE_PROFILES" in st.secrets:
+        cookies.update(dict(st.secrets["YOUTUBE_COOKIE_PROFILES"]))
+    engine.set_cookies(cookies)
 
+@st.cache_resource(show_spinner=False)
 def get_image_base64(image_path):
-    """이미지 파일을 Base64로 인코딩하여 반환합니다."""
+    """이미지 파일을 Base64로 인코딩하여 반환합니다. 프로세스당 한 번만 인코딩하고 재실행 때는 재사용합니다."""
     try:
         with open(image_path, "rb") as img_file:
             return base64.b64encode(img_file.read()).decode()
@@ -164,6 +59,47 @@ def get_image_base64(image_path):
 # --------------------------------------------------------------------------
 # 3. Streamlit UI 및 로직 구현
 # --------------------------------------------------------------------------
+@st.fragment(run_every=1.0)
+def render_jobs():
+    """이 세션에서 요청한 다운로드 작업들의 상태를 1초마다 갱신해 보여줍니다."""
+    manager = jobs.get_job_manager()
+    links = st.session_state.setdefault('job_links', {})
+    for job_id in st.session_state.get('job_ids', []):
+        job = manager.get(job_id)
+        if job is None:
+            continue
+        with st.container(border=True):
+            st.caption(job.label + (f" · 같은 요청 {job.followers}건 합류" if job.followers else ""))
+            if job.status == jobs.DONE and isinstance(job.result, playlist.PlaylistBuild):
+                build = job.result
+                # ZIP 은 항목이 끝나는 대로 만들어지며 전송되므로, 모든 항목을 기다리지 않고 바로 링크를 제공
+                if job_id not in links:
+                    links[job_id] = streaming.get_file_server().publish_stream(build.iter_zip, build.zip_name, 'application/zip')
+                st.progress(build.progress, text=f"{build.finished_count}/{build.total} 항목 완료 (실패 {build.failed_count})")
+                st.markdown(streaming.download_link_html(links[job_id], f"📥 '{build.zip_name}' 다운로드"), unsafe_allow_html=True)
+                with st.expander("항목별 상태"):
+                    st.dataframe(build.status_rows(), hide_index=True, use_container_width=True)
+            elif job.status == jobs.DONE:
+                file_path, display_name, mime_type = job.result
+                # 같은 작업은 다시 그려도 링크를 한 번만 등록
+                if job_id not in links:
+                    links[job_id] = streaming.get_file_server().publish(
+                        file_path, display_name, mime_type, delete_on_expire=True
+                    )
+                st.success(f"**{display_name}** 처리가 완료되었습니다!")
+                if job.timings.seconds:
+                    st.caption(job.timings.summary())
+                st.markdown(streaming.download_link_html(links[job_id], f"📥 '{display_name}' 다운로드"), unsafe_allow_html=True)
+            elif job.status == jobs.FAILED:
+                st.error(f"오류: {job.error}", icon="🚨")
+            else:
+                # yt-dlp 훅이 보낸 진행 상황(받은 바이트, 속도, 남은 시간, 단계)을 표시
+                state = job.channel.drain()
+                if state:
+                    st.progress(progress.fraction(state) or job.progress, text=progress.describe(state))
+                else:
+                    st.progress(job.progress, text=job.message)
+
 def run_app():
     """메인 애플리케이션을 실행하는 함수"""
     image_path = "JYC_clear.png"
@@ -177,52 +113,100 @@ def run_app():
 
     if "YOUTUBE_COOKIES" not in st.secrets or not st.secrets["YOUTUBE_COOKIES"]:
         st.warning("⚠️ Secrets에 쿠키 정보(YOUTUBE_COOKIES)가 없습니다. 다운로드 실패 확률이 높습니다.")
-    st.info(f"ℹ️ 현재 yt-dlp 버전: {yt_dlp.version.__version__}")
+    # yt-dlp 를 불러오지 않고 설치된 패키지 정보에서 버전을 읽음
+    st.info(f"ℹ️ 현재 yt-dlp 버전: {metrics.ytdlp_version()}")
 
-    url = st.text_input("다운로드할 YouTube URL을 입력하세요.", placeholder="https://www.youtube.com/watch?v=...")
+    batch_mode = st.toggle("여러 URL 한 번에 받기", help="URL 을 한 줄에 하나씩 붙여 넣거나 txt/csv 파일로 올리면 하나의 ZIP 으로 받습니다.")
+    batch_urls = []
+    if batch_mode:
+        url = ''
+        batch_text = st.text_area("URL 목록 (한 줄에 하나)", height=160, placeholder="https://youtu.be/...\nhttps://www.youtube.com/watch?v=...")
+        batch_file = st.file_uploader("또는 txt/csv 파일 올리기", type=['txt', 'csv'])
+        if batch_file is not None:
+            batch_text += '\n' + batch_file.getvalue().decode('utf-8-sig', errors='replace')
+        try:
+            batch_urls = urls.parse_url_list(batch_text, limit=config.BATCH_MAX_URLS)
+        except ValueError as e:
+            st.warning(str(e))
+        if batch_urls:
+            st.caption(f"URL {len(batch_urls)}개 (중복 제외)")
+    else:
+        url = st.text_input("다운로드할 YouTube URL을 입력하세요.", placeholder="https://www.youtube.com/watch?v=...")
 
     col1, col2 = st.columns([1, 2])
     with col1:
-        # is_playlist = st.checkbox("재생목록 전체 다운로드")
-        is_playlist = False  # << [수정 3] 재생목록 다운로드 옵션 제거
+        is_playlist = False if batch_mode else st.checkbox("재생목록 전체 다운로드")
     with col2:
         download_type = st.radio("다운로드 타입", ('영상', '오디오'), horizontal=True, label_visibility="collapsed")
 
+    # 오디오 하나를 여러 형식으로 받을 때는 원본을 한 번만 받고 FFmpeg 한 번으로 모두 변환 (결과는 ZIP)
+    multi_audio = (download_type == '오디오' and not batch_mode and not is_playlist
+                   and st.checkbox("여러 형식 한 번에 받기", help="원본은 한 번만 다운로드하고, 선택한 확장자/음질을 모두 만들어 ZIP 으로 받습니다."))
     col_quality, col_container = st.columns(2)
     with col_quality:
         if download_type == '영상':
             # quality = st.selectbox("화질 선택", ('best', '1080p', '720p', '480p'))
             quality = st.selectbox("화질 선택", ('1080p', '720p', '480p')) # << [수정 4] 'best' 옵션 제거
+        elif multi_audio:
+            quality = st.multiselect("음질 선택 (kbps)", ('192', '320', '128'), default=['192'])
         else: # 오디오
             quality = st.selectbox("음질 선택 (kbps)", ('192', '320', '128'))
     with col_container:
         if download_type == '영상':
             container = st.selectbox("확장자 선택", ('mp4', 'mkv'))
+        elif multi_audio:
+            container = st.multiselect("확장자 선택", ('mp3', 'flac', 'm4a', 'wav'), default=['mp3', 'flac'])
         else: # 오디오
             container = st.selectbox("확장자 선택", ('mp3', 'flac', 'm4a', 'wav'))
 
+    # 영상 하나를 받을 때는 구간만 받을 수 있음 (비워 두면 전체)
+    clip_start = clip_end = None
+    if not batch_mode and not is_playlist:
+        col_start, col_end = st.columns(2)
+        with col_start:
+            clip_start = st.text_input("구간 시작 (선택)", placeholder="0:30", help="초 또는 [시:]분:초. 비워 두면 처음부터")
+        with col_end:
+            clip_end = st.text_input("구간 끝 (선택)", placeholder="1:00", help="초 또는 [시:]분:초. 비워 두면 끝까지")
+
+    fan_out = config.PLAYLIST_FAN_OUT
+    if is_playlist:
+        fan_out = st.slider("동시에 다운로드할 항목 수", 1, 16, config.PLAYLIST_FAN_OUT)
+    elif batch_mode:
+        fan_out = st.slider("동시에 진행할 항목 수", 1, 32, min(config.BATCH_FAN_OUT, 32),
+                            help="추출, 다운로드, 후처리 단계는 각각 동시 실행 수가 따로 제한되며, 이 값은 동시에 진행 중인 항목 수입니다.")
+    connections = st.slider("파일 하나당 최대 연결 수", 1, 16, config.DOWNLOAD_CONNECTIONS,
+                            help="큰 파일을 여러 연결로 나눠 받습니다. 처리량이 늘어나는 동안만 이 값까지 연결을 늘립니다.")
+
     action_col1, action_col2 = st.columns(2)
     
     with action_col1:
         if st.button("다운로드 시작", use_container_width=True, type="primary"):
-            if url:
-                with st.spinner(f"다운로드를 시작합니다..."):
-                    try:
-                        file_data, display_name, mime_type = download_content(
-                            url, download_type, quality, container, is_playlist
-                        )
-                        st.success(f"**{display_name}** 처리가 완료되었습니다!")
-                        
-                        # [수정 완료] mime=type -> mime=mime_type
-                        st.download_button(
-                            label=f"📥 '{display_name}' 다운로드",
-                            data=file_data,
-                            file_name=display_name,
-                            mime=mime_type,
-                            use_container_width=True
-                        )
-                    except Exception as e:
-                        st.error(f"오류: {e}", icon="🚨")
+            if batch_mode:
+                if batch_urls:
+                    job_id = engine.submit_batch(batch_urls, download_type, quality, container, fan_out, connections)
+                    job_ids = st.session_state.setdefault('job_ids', [])
+                    if job_id not in job_ids:
+                        job_ids.insert(0, job_id)
+                else:
+                    st.warning("다운로드할 URL 목록을 입력해주세요.")
+            elif url:
+                # 스크립트 실행을 막지 않도록 백그라운드 작업으로 등록하고, 아래 작업 목록에서 상태를 확인
+                # 같은 영상/옵션의 작업이 이미 실행 중이면 새로 받지 않고 그 작업에 합류 (API/명령줄 요청과도 합쳐짐)
+                # 구간을 주면 그 구간에 필요한 부분만 받고 그 부분만 다시 인코딩
+                try:
+                    clip = engine.normalize_clip(clip_start, clip_end)
+                    if multi_audio:
+                        # 무손실 형식(flac, wav)은 음질과 상관없이 하나만 만들어짐
+                        outputs = [(c, q) for c in container for q in quality]
+                        job_id = engine.submit_audio_bundle(url, outputs, connections, clip)
+                    else:
+                        job_id = engine.submit(url, download_type, quality, container, is_playlist, fan_out, connections, clip)
+                except ValueError as e:
+                    st.warning(str(e))
+                else:
+                    job_ids = st.session_state.setdefault('job_ids', [])
+                    if job_id not in job_ids:
+                        job_ids.insert(0, job_id)
             else:
                 st.warning("유튜브 URL을 입력해주세요.")
 
@@ -230,7 +214,7 @@ def run_app():
         if st.button("상세 정보 확인", use_container_width=True):
             if url:
                 with st.spinner("유튜브로부터 상세 정보를 가져오는 중..."):
-                    info = get_video_info(url)
+                    info = engine.get_video_info(url)
                     if "error" in info:
                         st.error("정보를 가져오는 데 실패했습니다.")
                         with st.expander("에러 원문 보기"):
@@ -238,11 +222,18 @@ def run_app():
                     else:
                         title = info.get('title', '제목 없음')
                         st.success(f"**'{title}'** 의 정보를 성공적으로 가져왔습니다.")
+                        stats = info_cache.get_info_cache().stats()
+                        st.caption(f"메타데이터 캐시 적중률 {stats['hit_ratio']:.0%} "
+                                   f"({stats['hits']}/{stats['hits'] + stats['misses']}) · 절약한 추출 시간 {stats['saved_seconds']:.1f}초")
                         with st.expander("자세한 원본 데이터 보기 (JSON)"):
                             st.json(info)
             else:
                 st.warning("정보를 확인할 유튜브 URL을 입력해주세요.")
 
+    if st.session_state.get('job_ids'):
+        st.subheader("다운로드 작업")
+        render_jobs()
+
 # --------------------------------------------------------------------------
 # 4. 인증 로직 및 앱 실행 (기존과 동일)
 # --------------------------------------------------------------------------
@@ -273,6 +264,7 @@ def check_authentication():
         return True
 
 if check_authentication():
+    sync_cookie_secrets()
     run_app()
 else:
     st.info("👈 사이드바에서 인증 코드를 입력하여 앱 사용을 시작하세요.")
\ No newline at end of file
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP API(jy2mate.api) 처리량: 작업 등록/상태 조회 요청을 초당 몇 개 처리하는지 측정.
+
+다운로드는 하지 않도록 작업 관리자에 끝나지 않는 가짜 작업 하나를 넣어 두고, --clients 개의 연결이
+keep-alive 로 요청을 --requests 개씩 보냅니다. 요청 종류는 다음과 같습니다.
+
+- status : GET /jobs/<id>  (진행 상황 조회)
+- submit : POST /jobs      (같은 URL 이므로 실행 중인 작업에 합류, single-flight)
+
+Streamlit 앱에서는 같은 일을 하려면 스크립트 전체를 다시 실행해야 하므로,
+bench_startup.py 의 재실행 시간과 비교하면 됩니다.
+
+    python benchmarks/bench_api.py --clients 16 --requests 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from jy2mate import api, engine, jobs  # noqa: E402
+
+
+async def client(port, path, body, count, latencies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    method = 'POST' if body else 'GET'
+    payload = json.dumps(body).encode('utf-8') if body else b''
+    request = (f'{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n'
+               f'Content-Length: {len(payload)}\r\n\r\n').encode('latin-1') + payload
+    for _ in range(count):
+        started = time.perf_counter()
+        writer.write(request)
+        head = await reader.readuntil(b'\r\n\r\n')
+        length = int(next(line.split(b':')[1] for line in head.split(b'\r\n') if line.lower().startswith(b'content-length')))
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - started)
+    writer.close()
+
+
+async def run_kind(port, path, body, clients, requests):
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, path, body, requests, latencies) for _ in range(clients)))
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return len(latencies) / wall, statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=500, help='연결 하나가 보내는 요청 수')
+    args = parser.parse_args()
+
+    # 다운로드 대신 끝나지 않는 가짜 작업을 등록해 두고, 같은 key 로 오는 등록 요청은 여기에 합류시킴
+    release = threading.Event()
+    url = 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+    key = ('download', 'youtube:dQw4w9WgXcQ', None, engine.VIDEO, '1080p', 'mp4')
+    job_id = jobs.get_job_manager().submit(lambda ctx: release.wait(), label='bench', key=key)
+
+    server_loop = asyncio.new_event_loop()
+    server = server_loop.run_until_complete(api.ApiServer('127.0.0.1', 0, token='').start())
+    threading.Thread(target=server_loop.run_forever, daemon=True).start()
+
+    print(f"{'kind':>6} {'clients':>7} {'req/s':>8} {'p50(ms)':>8} {'p99(ms)':>8}")
+    for kind, path, body in (('status', f'/jobs/{job_id}', None),
+                             ('submit', '/jobs', {'url': url, 'type': 'video', 'playlist': None})):
+        rate, p50, p99 = asyncio.run(run_kind(server.server_port, path, body, args.clients, args.requests))
+        print(f"{kind:>6} {args.clients:>7} {rate:>8.0f} {p50 * 1000:>8.2f} {p99 * 1000:>8.2f}")
+    print(f"합류한 등록 요청: {jobs.get_job_manager().get(job_id).followers}")
+    release.set()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+배치(여러 URL) 처리: 항목을 하나씩 처리할 때와 단계별 파이프라인으로 처리할 때의 전체 시간 비교.
+
+항목마다 추출(--extract), 다운로드(--download), 후처리(--post) 초만큼 걸리는 가짜 작업을 만들고,
+각 단계에서 JobContext.enter_stage 로 해당 단계의 슬롯을 잡습니다.
+
+- sequential : 항목을 하나씩 세 단계 모두 거쳐 처리 (기존처럼 URL 을 하나씩 넣는 경우)
+- pipelined  : jy2mate.playlist.PlaylistBuild(report=True) 로 등록해 단계들이 항목 사이에서 겹치게 처리
+- bound      : 가장 느린 단계의 처리 시간(항목 수 × 단계 시간 / 슬롯 수) + 나머지 단계 한 번씩
+
+pipelined 는 ZIP 스트림을 끝까지 읽은 시간이며, ZIP 안에 status.csv 가 들어 있는지도 확인합니다.
+
+    python benchmarks/bench_batch.py --items 40 --extract 0.3 --download 1.0 --post 0.5
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from jy2mate import jobs  # noqa: E402
+from jy2mate.playlist import PlaylistBuild  # noqa: E402
+
+
+def make_fake_item(directory, extract, download, post):
+    def download_item(ctx, url):
+        ctx.enter_stage(jobs.EXTRACT)
+        time.sleep(extract)
+        ctx.enter_stage(jobs.NETWORK)
+        time.sleep(download)
+        ctx.enter_stage(jobs.CPU)
+        time.sleep(post)
+        path = os.path.join(directory, f'{url}.mp3')
+        with open(path, 'wb') as f:
+            f.write(os.urandom(64 * 1024))
+        return path, f'{url}.mp3', 'audio/mpeg'
+    return download_item
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=40)
+    parser.add_argument('--extract', type=float, default=0.3, help='항목 하나의 추출 시간 (초)')
+    parser.add_argument('--download', type=float, default=1.0, help='항목 하나의 다운로드 시간 (초)')
+    parser.add_argument('--post', type=float, default=0.5, help='항목 하나의 후처리 시간 (초)')
+    parser.add_argument('--extract-workers', type=int, default=4)
+    parser.add_argument('--network-workers', type=int, default=4)
+    parser.add_argument('--cpu-workers', type=int, default=2)
+    args = parser.parse_args()
+
+    slots = {'extract': args.extract_workers, 'download': args.network_workers, 'post': args.cpu_workers}
+    stage_seconds = {'extract': args.extract, 'download': args.download, 'post': args.post}
+    slowest = max(stage_seconds, key=lambda stage: stage_seconds[stage] / slots[stage])
+    bound = (args.items * stage_seconds[slowest] / slots[slowest]
+             + sum(seconds for stage, seconds in stage_seconds.items() if stage != slowest))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        download_item = make_fake_item(temp_dir, args.extract, args.download, args.post)
+        manager = jobs.JobManager(args.network_workers, args.cpu_workers, retention=600,
+                                  extract_workers=args.extract_workers)
+        entries = [(index, f'item{index:03d}', f'item{index:03d}') for index in range(1, args.items + 1)]
+
+        started = time.perf_counter()
+        job_id = manager.submit(lambda ctx: [download_item(ctx, url) for _, url, _ in entries])
+        while not manager.get(job_id).finished:
+            time.sleep(0.01)
+        sequential = time.perf_counter() - started
+
+        started = time.perf_counter()
+        build = PlaylistBuild('batch', entries, download_item, sum(slots.values()), manager, report=True).start()
+        data = b''.join(build.iter_zip())
+        pipelined = time.perf_counter() - started
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            names = zf.namelist()
+
+    print(f"{'items':>5} {'sequential(s)':>13} {'pipelined(s)':>12} {'bound(s)':>8} {'files':>5} {'report':>6}")
+    print(f"{args.items:>5} {sequential:>13.2f} {pipelined:>12.2f} {bound:>8.2f} "
+          f"{len(names) - ('status.csv' in names):>5} {'yes' if 'status.csv' in names else 'NO':>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+구간 다운로드: 필요한 구간만 받기 vs 전체를 받은 뒤 잘라내기의 전송량과 CPU 시간 비교.
+
+FFmpeg 로 만든 --duration 초짜리 시험 영상(H.264 + AAC, faststart)을 로컬 Range 지원 서버로 제공하고,
+영상(mp4)과 오디오(mp3) 각각에 대해 다음 두 방식으로 --start 부터 --length 초를 받습니다.
+
+- clip : engine.download_to(clip=...) — download_ranges 로 FFmpeg 가 구간에 필요한 부분만 읽고 그 구간만 인코딩
+- full : 전체 파일을 받고(오디오는 전체를 mp3 로 변환) FFmpeg 로 같은 구간을 잘라 다시 인코딩
+
+'MB sent' 는 서버가 보낸 바이트 수, 'cpu(s)' 는 이 프로세스와 FFmpeg 자식 프로세스의 CPU 시간 합입니다.
+서버는 소켓 송신 버퍼를 작게 잡아, 클라이언트가 연결을 끊은 뒤 버퍼에 쌓인 양이 거의 세어지지 않게 합니다.
+ffmpeg 가 PATH 에 있어야 합니다.
+
+    python benchmarks/bench_clip.py --duration 600 --start 120 --length 30
+"""
+
+import argparse
+import os
+import re
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from jy2mate import engine  # noqa: E402
+
+
+class CountingRangeServer(ThreadingHTTPServer):
+    """파일 하나를 Range 요청으로 제공하고 보낸 바이트 수를 세는 서버."""
+
+    daemon_threads = True
+
+    def __init__(self, path):
+        super().__init__(('127.0.0.1', 0), _CountingHandler)
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.sent = 0
+        self.lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # FFmpeg 는 탐색할 때 연결을 끊고 새로 열므로 끊긴 연결 오류는 무시
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class _CountingHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        self.request.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 32 * 1024)
+        super().setup()
+
+    def do_HEAD(self):
+        self._send_headers(0, self.server.size - 1, 200)
+
+    def do_GET(self):
+        server = self.server
+        start, end = 0, server.size - 1
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range') or '')
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), end) if match.group(2) else end
+        self._send_headers(start, end, 206 if match else 200)
+        try:
+            with open(server.path, 'rb') as f:
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining:
+                    data = f.read(min(16 * 1024, remaining))
+                    self.wfile.write(data)
+                    remaining -= len(data)
+                    with server.lock:
+                        server.sent += len(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_headers(self, start, end, status):
+        self.send_response(status)
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{self.server.size}')
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def cpu_seconds():
+    own, children = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def make_source(path, duration):
+    subprocess.run([
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+        '-f', 'lavfi', '-i', 'testsrc2=size=1280x720:rate=30', '-f', 'lavfi', '-i', 'sine=frequency=440',
+        '-t', str(duration), '-c:v', 'libx264', '-preset', 'veryfast', '-g', '60', '-b:v', '3M',
+        '-c:a', 'aac', '-b:a', '128k', '-movflags', '+faststart', path,
+    ], check=True)
+
+
+def trim(source, dest, start, length, download_type):
+    args = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y', '-ss', str(start), '-i', source, '-t', str(length)]
+    args += ['-b:a', '192k'] if download_type == engine.AUDIO else []
+    subprocess.run(args + [dest], check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=int, default=600, help='시험 영상 길이 (초)')
+    parser.add_argument('--start', type=float, default=120)
+    parser.add_argument('--length', type=float, default=30)
+    args = parser.parse_args()
+    if not shutil.which('ffmpeg'):
+        parser.error('ffmpeg 가 필요합니다.')
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, 'source.mp4')
+        make_source(source, args.duration)
+        server = CountingRangeServer(source)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        clip = (args.start, args.start + args.length)
+
+        print(f"source: {args.duration}s, {server.size / 1024 ** 2:.1f}MB / clip {args.start:g}s + {args.length:g}s")
+        print(f"{'type':>6} {'mode':>5} {'MB sent':>8} {'cpu(s)':>7} {'wall(s)':>8} {'out(KB)':>8}")
+        for download_type, quality, container in ((engine.VIDEO, 'best', 'mp4'), (engine.AUDIO, '192', 'mp3')):
+            for mode in ('clip', 'full'):
+                out_dir = tempfile.mkdtemp(dir=temp_dir)
+                # URL 이 다르면 메타데이터 캐시를 함께 쓰지 않으므로 매번 추출부터 시작
+                url = f'http://127.0.0.1:{server.server_port}/source.mp4?{download_type}-{mode}'
+                server.sent = 0
+                cpu, started = cpu_seconds(), time.perf_counter()
+                if mode == 'clip':
+                    output, _, _ = engine.download_to(url, download_type, quality, container, out_dir, clip=clip)
+                else:
+                    full, _, _ = engine.download_to(url, download_type, quality, container, out_dir)
+                    output = os.path.join(out_dir, f'trimmed.{container}')
+                    trim(full, output, args.start, args.length, download_type)
+                cpu, wall = cpu_seconds() - cpu, time.perf_counter() - started
+                print(f"{download_type:>6} {mode:>5} {server.sent / 1024 ** 2:>8.1f} {cpu:>7.2f} {wall:>8.2f} "
+                      f"{os.path.getsize(output) / 1024:>8.0f}")
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+여러 형식 오디오: 형식마다 따로 받기 vs 원본을 한 번 받아 FFmpeg 한 번으로 모두 만들기.
+
+bench_clip.py 와 같은 시험 영상(H.264 + AAC)을 로컬 Range 지원 서버로 제공하고, --outputs 의 형식들을
+다음 두 방식으로 만듭니다.
+
+- separate : 형식마다 engine.download_to 를 따로 실행 (원본을 매번 받고 FFmpegExtractAudio 를 매번 실행)
+- bundle   : engine.download_audio_bundle (원본 한 번, FFmpeg 한 번, 결과는 ZIP)
+
+'MB sent' 는 서버가 보낸 바이트 수, 'cpu(s)' 는 이 프로세스와 FFmpeg 자식 프로세스의 CPU 시간 합입니다.
+ffmpeg 가 PATH 에 있어야 합니다.
+
+    python benchmarks/bench_multi_audio.py --duration 600 --outputs mp3:192 mp3:320 flac m4a
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_clip import CountingRangeServer, cpu_seconds, make_source  # noqa: E402
+from jy2mate import engine  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=int, default=600, help='시험 영상 길이 (초)')
+    parser.add_argument('--outputs', nargs='+', default=['mp3:192', 'mp3:320', 'flac', 'm4a'])
+    args = parser.parse_args()
+    if not shutil.which('ffmpeg'):
+        parser.error('ffmpeg 가 필요합니다.')
+    outputs = engine.normalize_audio_outputs(args.outputs)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, 'source.mp4')
+        make_source(source, args.duration)
+        server = CountingRangeServer(source)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        print(f"source: {args.duration}s, {server.size / 1024 ** 2:.1f}MB / outputs: {', '.join(args.outputs)}")
+        print(f"{'mode':>8} {'MB sent':>8} {'cpu(s)':>7} {'wall(s)':>8} {'out(KB)':>8}")
+        for mode in ('separate', 'bundle'):
+            # URL 이 다르면 결과 캐시를 함께 쓰지 않음
+            url = f'http://127.0.0.1:{server.server_port}/source.mp4?{mode}'
+            server.sent = 0
+            cpu, started = cpu_seconds(), time.perf_counter()
+            if mode == 'separate':
+                size = 0
+                for container, quality in outputs:
+                    out_dir = tempfile.mkdtemp(dir=temp_dir)
+                    path, _, _ = engine.download_to(url, engine.AUDIO, quality, container, out_dir)
+                    size += os.path.getsize(path)
+            else:
+                path, _, _ = engine.download_audio_bundle(url, outputs)
+                size = os.path.getsize(path)
+            cpu, wall = cpu_seconds() - cpu, time.perf_counter() - started
+            print(f"{mode:>8} {server.sent / 1024 ** 2:>8.1f} {cpu:>7.2f} {wall:>8.2f} {size / 1024:>8.0f}")
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
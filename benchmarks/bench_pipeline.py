@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+다운로드 파이프라인 전체(jy2mate.engine.download_content)를 유튜브 없이 측정하는 오프라인 벤치마크.
+
+FFmpeg 로 만든 테스트 영상(h264 + aac mp4)을 jy2mate.streaming 전송 서버(Range/HEAD 지원)로
+로컬에서 제공하고, yt-dlp 의 generic 추출기가 이를 직접 링크로 인식해 다운로드하게 합니다.
+두 Streamlit 앱이 함께 쓰는 엔진의 download_content 를 그대로 불러 실행하며, 조합마다 별도 프로세스에서
+
+- wall  : 동시에 시작한 다운로드가 모두 끝날 때까지 걸린 시간
+- MB/s  : 원본 바이트 합계 / wall
+- RSS   : 파이썬 프로세스와 자식 프로세스(FFmpeg) 중 가장 큰 ru_maxrss
+- disk  : 임시 디렉토리(TMPDIR) 사용량의 최댓값 (캐시/전송 디렉토리 포함)
+
+를 크기, 다운로드 타입(영상/오디오), 확장자, 동시 실행 수별로 측정합니다.
+yt-dlp, ffmpeg 가 설치되어 있어야 합니다.
+
+    python benchmarks/bench_pipeline.py --sizes 16 64 --concurrency 1 4
+    python benchmarks/bench_pipeline.py --types 오디오 --containers mp3 m4a --json result.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 다운로드 타입별로 측정하는 확장자 (두 앱의 화면에서 고를 수 있는 확장자)
+CONTAINERS = {'영상': ['mp4', 'mkv'], '오디오': ['mp3', 'flac', 'm4a', 'wav']}
+QUALITY = {'영상': '1080p', '오디오': '192'}
+
+
+def make_media(directory, size_mb, duration):
+    """duration 초 길이에 약 size_mb MB 인 h264 + aac mp4 를 만듭니다. 잡음을 섞어 압축되지 않게 합니다."""
+    path = os.path.join(directory, f'source_{size_mb}MB.mp4')
+    video_kbps = max(size_mb * 8 * 1024 // duration - 128, 100)
+    subprocess.run([
+        'ffmpeg', '-v', 'error', '-y',
+        '-f', 'lavfi', '-i', f'testsrc2=size=1280x720:rate=30:duration={duration},noise=alls=60:allf=t',
+        '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-b:v', f'{video_kbps}k',
+        '-minrate', f'{video_kbps}k', '-maxrate', f'{video_kbps}k', '-bufsize', f'{video_kbps}k',
+        '-c:a', 'aac', '-b:a', '128k', '-movflags', '+faststart', path,
+    ], check=True)
+    return path
+
+
+def start_media_server(paths):
+    """파일들을 로컬 전송 서버로 제공하고 {경로: URL} 을 반환합니다."""
+    from jy2mate.streaming import FileServer
+
+    server = FileServer('127.0.0.1', 0, '', ttl=24 * 3600)
+    server.base_url = f'http://127.0.0.1:{server.server_port}'
+    server.start()
+    return server, {path: server.publish(path, os.path.basename(path), 'video/mp4') for path in paths}
+
+
+def _dir_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, filename)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class DiskSampler(threading.Thread):
+    """디렉토리 사용량을 주기적으로 재서 최댓값을 기록합니다."""
+
+    def __init__(self, path, interval=0.05):
+        super().__init__(daemon=True)
+        self.path = path
+        self.interval = interval
+        self.peak = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, _dir_size(self.path))
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, _dir_size(self.path))
+
+
+def run_worker(spec):
+    """자식 프로세스에서 download_content 를 concurrency 개 동시에 실행하고 결과를 반환합니다."""
+    from jy2mate import engine
+
+    def download_one(index):
+        # 쿼리를 바꿔 매번 다른 URL 로 만들어 메타데이터/결과 캐시가 적중하지 않게 함
+        url = f"{spec['url']}?bench={index}"
+        path, _, _ = engine.download_content(url, spec['type'], QUALITY[spec['type']], spec['container'])
+        return os.path.getsize(path)
+
+    sampler = DiskSampler(tempfile.gettempdir())
+    sampler.start()
+    errors = []
+    output_bytes = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=spec['concurrency']) as executor:
+        for future in [executor.submit(download_one, i) for i in range(spec['concurrency'])]:
+            try:
+                output_bytes += future.result()
+            except Exception as e:
+                errors.append(f'{type(e).__name__}: {e}')
+    wall = time.perf_counter() - started
+    sampler.stop()
+
+    source_bytes = spec['source_bytes'] * (spec['concurrency'] - len(errors))
+    return {
+        'wall': wall,
+        'throughput_mb_s': source_bytes / 1024 / 1024 / wall if wall else 0.0,
+        'output_bytes': output_bytes,
+        # 리눅스에서 ru_maxrss 단위는 KB
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'peak_child_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        'peak_temp_mb': sampler.peak / 1024 / 1024,
+        'errors': errors,
+    }
+
+
+def measure(spec, work_dir):
+    """조합 하나를 새 프로세스에서 측정합니다. 프로세스마다 빈 TMPDIR 을 사용합니다."""
+    tmp_dir = tempfile.mkdtemp(dir=work_dir)
+    env = dict(os.environ, TMPDIR=os.path.join(tmp_dir, 'tmp'))
+    os.makedirs(env['TMPDIR'])
+    try:
+        output = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), '--worker', json.dumps(spec)], cwd=tmp_dir, env=env
+        )
+        return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[16, 64], help='원본 영상 크기 (MB)')
+    parser.add_argument('--duration', type=int, default=60, help='원본 영상 길이 (초)')
+    parser.add_argument('--types', nargs='+', choices=list(QUALITY), default=list(QUALITY))
+    parser.add_argument('--containers', nargs='+', help='측정할 확장자 (기본: 화면에서 고를 수 있는 전부)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--json', help='결과를 JSON 으로 저장할 경로')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(json.loads(args.worker))))
+        return
+
+    missing = [tool for tool in ('ffmpeg', 'ffprobe') if not shutil.which(tool)]
+    missing += [module for module in ('yt_dlp',) if importlib.util.find_spec(module) is None]
+    if missing:
+        sys.exit(f"필요한 프로그램/패키지가 없습니다: {', '.join(missing)}")
+
+    results = []
+    print(f"{'size':>5} {'type':>4} {'ext':>4} {'conc':>4} {'wall(s)':>8} {'MB/s':>7} "
+          f"{'RSS(MB)':>8} {'ffmpeg RSS':>10} {'disk(MB)':>9}  errors")
+    with tempfile.TemporaryDirectory() as work_dir:
+        media_dir = os.path.join(work_dir, 'media')
+        os.makedirs(media_dir)
+        sources = {size_mb: make_media(media_dir, size_mb, args.duration) for size_mb in args.sizes}
+        server, source_urls = start_media_server(sources.values())
+
+        for type_name in args.types:
+            for container in [c for c in CONTAINERS[type_name] if not args.containers or c in args.containers]:
+                for size_mb, path in sources.items():
+                    for concurrency in args.concurrency:
+                        spec = {
+                            'type': type_name, 'container': container, 'concurrency': concurrency,
+                            'url': source_urls[path], 'source_bytes': os.path.getsize(path), 'size_mb': size_mb,
+                        }
+                        result = measure(spec, work_dir)
+                        results.append(dict(spec, **result))
+                        print(f"{size_mb:>5} {type_name:>4} {container:>4} {concurrency:>4} "
+                              f"{result['wall']:>8.2f} {result['throughput_mb_s']:>7.1f} "
+                              f"{result['peak_rss_mb']:>8.1f} {result['peak_child_rss_mb']:>10.1f} "
+                              f"{result['peak_temp_mb']:>9.1f}  {len(result['errors'])}")
+                        for error in sorted(set(result['errors'])):
+                            print(f"      ! {error}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+재생목록 다운로드: 기존 순차 방식과 병렬 + ZIP 스트리밍 방식의 첫 바이트 시간(TTFB)/전체 시간 비교.
+
+실제 네트워크 대신, 항목마다 지정한 지연(latency) 후 합성 파일을 쓰는 가짜 다운로더를 사용합니다.
+
+- old : 항목을 하나씩 다운로드 → zipfile.ZipFile.write 로 ZIP 생성 → ZIP 전체를 읽어 전달
+- new : jy2mate.playlist.PlaylistBuild 로 fan-out 만큼 병렬 다운로드하면서 전송 서버로 ZIP 스트림 전송
+
+    python benchmarks/bench_playlist.py --items 50 --size-mb 4 --latency 0.5 --fan-out 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from jy2mate.jobs import JobManager  # noqa: E402
+from jy2mate.playlist import PlaylistBuild  # noqa: E402
+from jy2mate.streaming import FileServer  # noqa: E402
+
+
+def make_fake_downloader(directory, size_mb, latency):
+    block = os.urandom(1024 * 1024)
+
+    def download_item(ctx, url):
+        time.sleep(latency)
+        path = os.path.join(directory, f'{url}.mp4')
+        with open(path, 'wb') as f:
+            for _ in range(size_mb):
+                f.write(block)
+        return path, f'{url}.mp4', 'video/mp4'
+    return download_item
+
+
+def run_old(entries, download_item, work_dir):
+    started = time.perf_counter()
+    files = [download_item(None, url)[0] for _, url, _ in entries]
+    zip_path = os.path.join(work_dir, 'playlist.zip')
+    with zipfile.ZipFile(zip_path, 'w') as zipf:
+        for path in files:
+            zipf.write(path, arcname=os.path.basename(path))
+    with open(zip_path, 'rb') as f:
+        data = f.read()
+    elapsed = time.perf_counter() - started
+    # 기존 방식은 전체가 끝나야 st.download_button 이 만들어지므로 TTFB == 전체 시간
+    return elapsed, elapsed, len(data)
+
+
+def run_new(entries, download_item, fan_out):
+    manager = JobManager(network_workers=fan_out, cpu_workers=os.cpu_count() or 2, retention=600)
+    server = FileServer('127.0.0.1', 0, '', ttl=600)
+    server.base_url = f'http://127.0.0.1:{server.server_port}'
+    server.start()
+
+    started = time.perf_counter()
+    build = PlaylistBuild('bench', entries, download_item, fan_out, manager).start()
+    url = server.publish_stream(build.iter_zip, build.zip_name, 'application/zip')
+    total = 0
+    ttfb = None
+    with urllib.request.urlopen(url) as response:
+        while True:
+            chunk = response.read(256 * 1024)
+            if not chunk:
+                break
+            if ttfb is None:
+                ttfb = time.perf_counter() - started
+            total += len(chunk)
+    return ttfb, time.perf_counter() - started, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=50)
+    parser.add_argument('--size-mb', type=int, default=4, help='항목 하나의 크기 (MB)')
+    parser.add_argument('--latency', type=float, default=0.5, help='항목 하나의 가짜 다운로드 지연 (초)')
+    parser.add_argument('--fan-out', type=int, default=8)
+    args = parser.parse_args()
+
+    entries = [(i, f'item{i:03d}', f'item {i}') for i in range(1, args.items + 1)]
+    with tempfile.TemporaryDirectory() as old_dir, tempfile.TemporaryDirectory() as new_dir:
+        old = run_old(entries, make_fake_downloader(old_dir, args.size_mb, args.latency), old_dir)
+        new = run_new(entries, make_fake_downloader(new_dir, args.size_mb, args.latency), args.fan_out)
+
+    print(f"{'mode':>5} {'TTFB(s)':>8} {'total(s)':>9} {'bytes':>12}")
+    for mode, (ttfb, total, size) in (('old', old), ('new', new)):
+        print(f"{mode:>5} {ttfb:>8.2f} {total:>9.2f} {size:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+이어받기: 다운로드가 중간에 끊긴 뒤 다시 받을 때 서버에서 다시 받은 바이트 수 비교.
+
+로컬 Range 지원 서버가 파일의 --cut 비율만큼 보낸 뒤 연결을 끊어 첫 시도를 실패시키고,
+두 번째 시도는 끝까지 받습니다. 같은 일을 두 가지 방식으로 합니다.
+
+- fresh  : key 없는 임시 디렉토리 (이전 동작, 실패하면 디렉토리를 지우므로 처음부터 다시 받음)
+- resume : key 로 정해지는 임시 디렉토리 (남은 .part 와 Manifest 의 구간 기록을 이어받음)
+
+'refetched' 는 두 번째 시도에서 서버가 보낸 바이트 수, 'wasted' 는 그중 첫 시도에서 이미 받았던 양입니다.
+
+    python benchmarks/bench_resume.py --size-mb 64 --cut 0.7 --connections 1 4
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from jy2mate import config, engine, storage  # noqa: E402
+
+
+class FlakyRangeServer(ThreadingHTTPServer):
+    """보낸 바이트 수가 limit 을 넘으면 연결을 끊는 Range 지원 서버."""
+
+    daemon_threads = True
+
+    def __init__(self, path):
+        super().__init__(('127.0.0.1', 0), _FlakyHandler)
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.limit = None
+        self.sent = 0
+        self.lock = threading.Lock()
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', str(self.server.size))
+        self.end_headers()
+
+    def do_GET(self):
+        server = self.server
+        start, end = 0, server.size - 1
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range') or '')
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), end) if match.group(2) else end
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{server.size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        try:
+            with open(server.path, 'rb') as f:
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining:
+                    # 크기 확인용 1 바이트 요청은 끊지 않음
+                    if server.limit is not None and server.sent >= server.limit and end > start:
+                        self.connection.close()
+                        return
+                    data = f.read(min(64 * 1024, remaining))
+                    self.wfile.write(data)
+                    remaining -= len(data)
+                    with server.lock:
+                        server.sent += len(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def fetch(manager, url, key, connections):
+    with manager.scratch(storage.VIDEO, key=key) as scratch:
+        file_path, _, _ = engine.download_to(url, engine.VIDEO, 'best', 'mp4', scratch.path,
+                                             connections=connections, scratch=scratch)
+        with open(file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size-mb', type=int, default=64)
+    parser.add_argument('--cut', type=float, default=0.7, help='첫 시도에서 연결을 끊기 전까지 보낼 비율')
+    parser.add_argument('--connections', type=int, nargs='+', default=[1, 4])
+    args = parser.parse_args()
+
+    # 재시도 정책의 재시도 없이 한 번 실패시키고, 작은 파일도 구간 다운로더를 쓰도록 함
+    config.RETRY_MAX_ATTEMPTS = 1
+    config.SEGMENTED_MIN_SIZE = 1024 * 1024
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, 'source.mp4')
+        with open(source, 'wb') as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1024 * 1024))
+        with open(source, 'rb') as f:
+            expected = hashlib.sha256(f.read()).hexdigest()
+
+        server = FlakyRangeServer(source)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        manager = storage.StorageManager(os.path.join(temp_dir, 'scratch'), min_free=0)
+
+        print(f"{'conn':>4} {'mode':>6} {'first(MB)':>9} {'refetched(MB)':>13} {'wasted(MB)':>10} {'wall(s)':>8} {'ok':>3}")
+        for connections in args.connections:
+            for mode in ('fresh', 'resume'):
+                url = f'http://127.0.0.1:{server.server_port}/source.mp4?c={connections}&m={mode}'
+                key = ('bench', connections) if mode == 'resume' else None
+                server.sent, server.limit = 0, int(server.size * args.cut)
+                try:
+                    fetch(manager, url, key, connections)
+                except (ValueError, RuntimeError):
+                    pass
+                first = server.sent
+                server.sent, server.limit = 0, None
+                started = time.perf_counter()
+                ok = fetch(manager, url, key, connections) == expected
+                wall = time.perf_counter() - started
+                wasted = server.sent - (server.size - first)
+                print(f"{connections:>4} {mode:>6} {first / 1024 ** 2:>9.1f} {server.sent / 1024 ** 2:>13.1f} "
+                      f"{max(wasted, 0) / 1024 ** 2:>10.1f} {wall:>8.2f} {'yes' if ok else 'NO':>3}")
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
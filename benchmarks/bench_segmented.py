@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+다중 연결 구간 다운로드: 연결 수에 따른 전체 시간 비교.
+
+유튜브처럼 연결 하나의 속도를 제한하는 로컬 Range 지원 서버를 띄우고,
+jy2mate.ydl_pool 로 빌린 YoutubeDL(generic 추출기)로 같은 파일을 concurrent_fragment_downloads 값만
+바꿔 가며 받습니다. 연결 수 1 은 yt-dlp 기본 단일 연결 다운로더와 같습니다.
+'peak' 는 서버에서 관찰한 동시 연결 수의 최댓값으로, 적응형 연결 수 조절이 실제로 몇 개까지 늘렸는지 보여줍니다.
+
+    python benchmarks/bench_segmented.py --size-mb 128 --rate-mbps 40 --connections 1 2 4 8
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from jy2mate.ydl_pool import YdlPool  # noqa: E402
+
+
+class ThrottledRangeServer(ThreadingHTTPServer):
+    """연결마다 rate 바이트/초로 제한해 파일 하나를 제공하는 서버."""
+
+    daemon_threads = True
+
+    def __init__(self, path, rate):
+        super().__init__(('127.0.0.1', 0), _ThrottledHandler)
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.rate = rate
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+
+class _ThrottledHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        start, end = 0, server.size - 1
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range') or '')
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), end) if match.group(2) else end
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{server.size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            block = 64 * 1024
+            started = time.monotonic()
+            sent = 0
+            with open(server.path, 'rb') as f:
+                f.seek(start)
+                while sent < end - start + 1:
+                    data = f.read(min(block, end - start + 1 - sent))
+                    self.wfile.write(data)
+                    sent += len(data)
+                    # 연결당 속도 제한
+                    delay = sent / server.rate - (time.monotonic() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size-mb', type=int, default=128)
+    parser.add_argument('--rate-mbps', type=float, default=40, help='연결 하나의 최대 속도 (Mbit/s)')
+    parser.add_argument('--connections', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, 'source.mp4')
+        with open(source, 'wb') as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1024 * 1024))
+        with open(source, 'rb') as f:
+            expected = hashlib.sha256(f.read()).hexdigest()
+
+        server = ThrottledRangeServer(source, args.rate_mbps * 1000 * 1000 / 8)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}/source.mp4'
+        pool = YdlPool(max_idle=1, max_profiles=1)
+
+        print(f"{'conn':>4} {'wall(s)':>8} {'MB/s':>7} {'peak':>5} {'ok':>3}")
+        for connections in args.connections:
+            out_dir = tempfile.mkdtemp(dir=temp_dir)
+            server.peak = 0
+            opts = {
+                'quiet': True, 'noprogress': True, 'retries': 3,
+                'outtmpl': os.path.join(out_dir, 'out.%(ext)s'),
+                'concurrent_fragment_downloads': connections,
+            }
+            started = time.perf_counter()
+            with pool.acquire(opts) as ydl:
+                info = ydl.extract_info(f'{url}?c={connections}', download=True)
+            wall = time.perf_counter() - started
+            with open(info['requested_downloads'][0]['filepath'], 'rb') as f:
+                ok = hashlib.sha256(f.read()).hexdigest() == expected
+            print(f"{connections:>4} {wall:>8.2f} {args.size_mb / wall:>7.1f} {server.peak:>5} {'yes' if ok else 'NO':>3}")
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
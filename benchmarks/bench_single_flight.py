@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+같은 요청이 동시에 여러 번 들어올 때 single-flight(작업 합류) 유무에 따른 비교.
+
+연결당 속도를 제한한 로컬 서버(bench_segmented.ThrottledRangeServer)에 대해 같은 URL 의 다운로드 작업을
+--requests 번 동시에 등록합니다. 'off' 는 요청마다 작업을 새로 만들고, 'on' 은 같은 key 로 등록해
+실행 중인 작업에 합류시킵니다. 서버가 보낸 바이트와 실행된 다운로드 수, 전체 시간을 출력합니다.
+(served 는 응답 Content-Length 의 합이라 generic 추출기가 먼저 보내는 확인 요청도 포함합니다.)
+
+    python benchmarks/bench_single_flight.py --requests 8 --size-mb 32
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_segmented import ThrottledRangeServer, _ThrottledHandler  # noqa: E402
+from jy2mate import jobs  # noqa: E402
+from jy2mate.ydl_pool import YdlPool  # noqa: E402
+
+
+class _CountingHandler(_ThrottledHandler):
+    """서버가 보낸 응답 본문 바이트(Content-Length 합)를 셉니다."""
+
+    def send_header(self, keyword, value):
+        if keyword == 'Content-Length':
+            with self.server.lock:
+                self.server.sent += int(value)
+        super().send_header(keyword, value)
+
+
+def run(mode, url, requests, out_root, pool):
+    manager = jobs.JobManager(network_workers=requests, cpu_workers=1, retention=requests * 2)
+    downloads = []
+    lock = threading.Lock()
+
+    def download(ctx, index):
+        out_dir = tempfile.mkdtemp(dir=out_root)
+        opts = {'quiet': True, 'noprogress': True, 'outtmpl': os.path.join(out_dir, 'out.%(ext)s')}
+        with pool.acquire(opts) as ydl:
+            info = ydl.extract_info(url, download=True)
+        with lock:
+            downloads.append(index)
+        return info['requested_downloads'][0]['filepath']
+
+    started = time.perf_counter()
+    job_ids = [
+        manager.submit(download, index, label='bench', key=('bench', url) if mode == 'on' else None)
+        for index in range(requests)
+    ]
+    for job_id in job_ids:
+        while not manager.get(job_id).finished:
+            time.sleep(0.02)
+    wall = time.perf_counter() - started
+    failed = sum(manager.get(job_id).status == jobs.FAILED for job_id in job_ids)
+    return wall, len(downloads), len(set(job_ids)), failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=8, help='동시에 들어오는 같은 요청 수')
+    parser.add_argument('--size-mb', type=int, default=32)
+    parser.add_argument('--rate-mbps', type=float, default=200, help='연결 하나의 최대 속도 (Mbit/s)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, 'source.mp4')
+        with open(source, 'wb') as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1024 * 1024))
+
+        server = ThrottledRangeServer(source, args.rate_mbps * 1000 * 1000 / 8)
+        server.RequestHandlerClass = _CountingHandler
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        pool = YdlPool(max_idle=args.requests, max_profiles=1)
+
+        print(f"{'mode':>4} {'wall(s)':>8} {'jobs':>5} {'downloads':>9} {'served(MB)':>10} {'failed':>6}")
+        for mode in ('off', 'on'):
+            url = f'http://127.0.0.1:{server.server_port}/source.mp4?mode={mode}'
+            server.sent = 0
+            wall, downloads, unique_jobs, failed = run(mode, url, args.requests, temp_dir, pool)
+            print(f"{mode:>4} {wall:>8.2f} {unique_jobs:>5} {downloads:>9} "
+                  f"{server.sent / 1024 / 1024:>10.1f} {failed:>6}")
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
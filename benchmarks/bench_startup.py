@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Streamlit 스크립트의 첫 실행(콜드 스타트)과 재실행 시간 벤치마크.
+
+streamlit.testing.v1.AppTest 로 app.py / app2.py 를 실제 ScriptRunner 에서 실행하며,
+측정마다 새 프로세스를 사용합니다. 인증 전 화면(auth)과 인증 후 메인 화면(main) 을 따로 재고,
+실행이 끝난 뒤 yt_dlp 가 불러와졌는지도 함께 표시합니다. 값은 --repeat 번 측정한 중앙값입니다.
+
+--compare 에 git 리비전을 주면 해당 리비전의 트리를 임시 디렉토리에 풀어 같은 조건으로 비교합니다.
+
+    python benchmarks/bench_startup.py --reruns 20
+    python benchmarks/bench_startup.py --compare HEAD~1
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_child(script, scenario, reruns):
+    """자식 프로세스: 스크립트를 한 번 실행한 뒤 reruns 번 다시 실행하고 결과를 반환합니다."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.abspath(script), default_timeout=120)
+    at.secrets['LICENSE_CODE'] = 'bench'
+    if scenario == 'main':
+        at.session_state['authenticated'] = True
+
+    started = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - started
+    rerun_times = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        at.run()
+        rerun_times.append(time.perf_counter() - started)
+    return {
+        'first_ms': first * 1000,
+        'rerun_ms': statistics.median(rerun_times) * 1000 if rerun_times else 0.0,
+        'yt_dlp_loaded': 'yt_dlp' in sys.modules,
+        'exception': bool(at.exception),
+    }
+
+
+def measure(tree, app, scenario, reruns, repeat):
+    results = []
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), '--child', os.path.join(tree, f'{app}.py'), scenario,
+             '--reruns', str(reruns)],
+            cwd=tree, stderr=subprocess.DEVNULL,
+        )
+        results.append(json.loads(output.decode('utf-8').strip().splitlines()[-1]))
+    return {
+        'first_ms': statistics.median(r['first_ms'] for r in results),
+        'rerun_ms': statistics.median(r['rerun_ms'] for r in results),
+        'yt_dlp_loaded': any(r['yt_dlp_loaded'] for r in results),
+        'exception': any(r['exception'] for r in results),
+    }
+
+
+def export_tree(revision, directory):
+    """git 리비전의 트리를 directory 에 풉니다."""
+    archive = subprocess.check_output(['git', 'archive', revision], cwd=ROOT)
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--apps', nargs='+', default=['app', 'app2'])
+    parser.add_argument('--reruns', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5, help='프로세스를 새로 띄워 측정하는 횟수')
+    parser.add_argument('--compare', metavar='REV', help='함께 측정할 이전 git 리비전')
+    parser.add_argument('--child', nargs=2, metavar=('SCRIPT', 'SCENARIO'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(*args.child, args.reruns)))
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        trees = [('current', ROOT)]
+        if args.compare:
+            trees.insert(0, (args.compare, export_tree(args.compare, temp_dir)))
+
+        print(f"{'tree':>10} {'app':>5} {'screen':>6} {'first(ms)':>10} {'rerun(ms)':>10} {'yt_dlp':>7}")
+        for label, tree in trees:
+            for app in args.apps:
+                for scenario in ('auth', 'main'):
+                    result = measure(tree, app, scenario, args.reruns, args.repeat)
+                    loaded = 'loaded' if result['yt_dlp_loaded'] else '-'
+                    if result['exception']:
+                        loaded += ' (error)'
+                    print(f"{label:>10} {app:>5} {scenario:>6} {result['first_ms']:>10.1f} "
+                          f"{result['rerun_ms']:>10.1f} {loaded:>7}")
+
+
+if __name__ == '__main__':
+    main()
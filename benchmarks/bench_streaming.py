@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+완성 파일 전달 방식별 최대 메모리(RSS) 비교 벤치마크.
+
+- old : 기존 방식처럼 f.read() 로 파일 전체를 bytes 로 읽어 st.download_button 에 넘기는 경우
+- new : jy2mate.streaming 전송 서버가 청크 단위로 보내고, 클라이언트가 끝까지 받아가는 경우
+
+각 측정은 별도 프로세스에서 실행되며 프로세스의 ru_maxrss 를 비교합니다.
+
+    python benchmarks/bench_streaming.py --sizes 256 1024 2048
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def make_synthetic_file(directory, size_mb):
+    """지정한 크기(MB)의 의사 난수 파일을 만듭니다. (압축/중복 제거 효과 방지)"""
+    path = os.path.join(directory, f'synthetic_{size_mb}MB.mp4')
+    block = os.urandom(1024 * 1024)
+    with open(path, 'wb') as f:
+        for _ in range(size_mb):
+            f.write(block)
+    return path
+
+
+def _peak_rss_mb():
+    # 리눅스에서 ru_maxrss 단위는 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_old(path):
+    started = time.perf_counter()
+    with open(path, 'rb') as f:
+        file_bytes = f.read()
+    total = len(file_bytes)
+    return {'bytes': total, 'seconds': time.perf_counter() - started, 'peak_rss_mb': _peak_rss_mb()}
+
+
+def run_new(path):
+    from jy2mate.streaming import FileServer
+
+    server = FileServer('127.0.0.1', 0, '', ttl=600)
+    server.base_url = f'http://127.0.0.1:{server.server_port}'
+    server.start()
+    url = server.publish(path, os.path.basename(path), 'video/mp4')
+
+    started = time.perf_counter()
+    total = 0
+    with urllib.request.urlopen(url) as response:
+        while True:
+            chunk = response.read(256 * 1024)
+            if not chunk:
+                break
+            total += len(chunk)
+    return {'bytes': total, 'seconds': time.perf_counter() - started, 'peak_rss_mb': _peak_rss_mb()}
+
+
+def measure(mode, path):
+    """측정을 새 프로세스에서 실행해 결과(dict)를 받아옵니다."""
+    output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--child', mode, path])
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[128, 512, 1024], help='합성 파일 크기 (MB)')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, path = args.child
+        result = run_old(path) if mode == 'old' else run_new(path)
+        print(json.dumps(result))
+        return
+
+    print(f"{'size(MB)':>9} {'mode':>5} {'peak RSS(MB)':>13} {'seconds':>8}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size_mb in args.sizes:
+            path = make_synthetic_file(temp_dir, size_mb)
+            for mode in ('old', 'new'):
+                result = measure(mode, path)
+                assert result['bytes'] == size_mb * 1024 * 1024
+                print(f"{size_mb:>9} {mode:>5} {result['peak_rss_mb']:>13.1f} {result['seconds']:>8.2f}")
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+YoutubeDL 을 요청마다 새로 만드는 방식과 jy2mate.ydl_pool 로 재사용하는 방식의 요청당 지연 시간 비교.
+
+로컬 전송 서버가 제공하는 파일을 generic 추출기로 메타데이터만 추출(download=False)하며,
+요청마다 URL 쿼리를 바꿔 yt-dlp 내부 캐시가 적중하지 않게 합니다.
+
+- old : 요청마다 'with yt_dlp.YoutubeDL(opts) as ydl' (추출기 로딩 + HTTP 핸들러 생성)
+- new : ydl_pool.YdlPool.acquire(opts) 로 프로필이 같은 인스턴스를 재사용
+
+    python benchmarks/bench_ydl_pool.py --requests 200 --concurrency 1 4
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import yt_dlp  # noqa: E402
+
+from jy2mate.streaming import FileServer  # noqa: E402
+from jy2mate.ydl_pool import YdlPool  # noqa: E402
+
+OPTS = {'quiet': True, 'noprogress': True, 'http_headers': {'User-Agent': 'jy2mate-bench'}}
+
+
+def run(mode, url, requests, concurrency):
+    pool = YdlPool(max_idle=concurrency, max_profiles=4)
+
+    def one(index):
+        started = time.perf_counter()
+        if mode == 'old':
+            with yt_dlp.YoutubeDL(OPTS) as ydl:
+                ydl.extract_info(f'{url}?n={index}', download=False)
+        else:
+            with pool.acquire(OPTS) as ydl:
+                ydl.extract_info(f'{url}?n={index}', download=False)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(one, range(requests)))
+    wall = time.perf_counter() - started
+    return {
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'req_s': requests / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'source.mp4')
+        with open(path, 'wb') as f:
+            f.write(os.urandom(1024 * 1024))
+        server = FileServer('127.0.0.1', 0, '', ttl=600)
+        server.base_url = f'http://127.0.0.1:{server.server_port}'
+        server.start()
+        url = server.publish(path, 'source.mp4', 'video/mp4')
+
+        print(f"{'conc':>4} {'mode':>5} {'p50(ms)':>8} {'p95(ms)':>8} {'req/s':>7}")
+        for concurrency in args.concurrency:
+            for mode in ('old', 'new'):
+                result = run(mode, url, args.requests, concurrency)
+                print(f"{concurrency:>4} {mode:>5} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['req_s']:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
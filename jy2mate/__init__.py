@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""JY2mate 다운로드 앱에서 공통으로 사용하는 보조 모듈 모음."""
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""python -m jy2mate 로 명령줄 도구(jy2mate.cli)를 실행합니다."""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
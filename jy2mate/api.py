@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+"""
+Streamlit 없이 다운로드 엔진(jy2mate.engine)을 쓰는 가벼운 비동기 HTTP API.
+
+표준 라이브러리 asyncio 만 사용합니다. 연결 처리는 이벤트 루프 하나가 맡고, 다운로드는 엔진의 작업 관리자가,
+파일 읽기처럼 막히는 작업은 스레드 풀이 처리하므로 느린 클라이언트가 많아도 다른 요청을 막지 않습니다.
+항목이 끝나기를 기다리며 만들어지는 재생목록 ZIP 은 크기가 정해진 별도 스레드 풀에서 읽으므로,
+이런 스트림이 많아도 파일 전송에 쓰는 기본 스레드 풀을 차지하지 않습니다. (한도를 넘으면 503)
+
+    POST /jobs                  작업 등록. {"url": ..., "type": "video"|"audio", "quality", "container",
+                                "playlist": true|false|null, "fan_out", "connections",
+                                "start", "end"}  start/end 는 초 또는 "1:30" 형식 (영상 하나의 구간만 받음)
+                                오디오 여러 형식은 {"url": ..., "outputs": ["mp3:320", "flac"]} (원본은 한 번만 받음, 결과는 ZIP)
+                                여러 URL 은 {"urls": [...]} (결과는 ZIP). 202 와 작업 상태를 반환
+    GET  /jobs/<id>[?wait=초]   작업 상태. wait 를 주면 작업이 끝나거나 그 시간이 지날 때까지 기다린 뒤 응답
+    GET  /jobs/<id>/artifact    결과 파일 (Range 요청 지원). 재생목록/배치는 만들어지는 중인 ZIP 스트림
+    GET  /healthz, /metrics     상태 확인, Prometheus 메트릭 (/metrics.json 은 JSON)
+
+JY2MATE_API_TOKEN 을 설정하면 /healthz 를 제외한 모든 요청에 'Authorization: Bearer <토큰>' 이 필요합니다.
+루프백이 아닌 주소(예: 0.0.0.0)에 열 때는 토큰이 없으면 시작하지 않습니다.
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from . import config, engine, jobs, metrics, playlist, streaming
+
+logger = logging.getLogger(__name__)
+
+# 요청 본문의 최대 크기. URL 목록을 넣어도 충분한 크기
+_MAX_BODY = 1024 * 1024
+# 한 연결에서 다음 요청을 기다리는 시간 (초)
+_KEEPALIVE_TIMEOUT = 30
+_MAX_WAIT = 60
+# 클라이언트가 고를 수 있는 파일 하나당 최대 연결 수 (Streamlit 앱의 슬라이더와 같음)
+_MAX_CONNECTIONS = 16
+
+
+class HttpError(Exception):
+    """상태 코드와 함께 JSON 오류 응답으로 바뀌는 예외."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    def __init__(self, method, target, version, headers, body=b''):
+        self.method = method
+        parts = urlsplit(target)
+        self.path = parts.path
+        self.query = {name: values[-1] for name, values in parse_qs(parts.query).items()}
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+    def json(self):
+        try:
+            data = json.loads(self.body or b'{}')
+        except ValueError:
+            raise HttpError(400, "요청 본문이 올바른 JSON 이 아닙니다.")
+        if not isinstance(data, dict):
+            raise HttpError(400, "요청 본문은 JSON 객체여야 합니다.")
+        return data
+
+
+async def read_request(reader):
+    """요청 하나를 읽어 Request 로 반환합니다. 연결이 닫혔으면 None."""
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), _KEEPALIVE_TIMEOUT)
+    except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+        return None
+    except asyncio.LimitOverrunError:
+        raise HttpError(431, "요청 헤더가 너무 깁니다.")
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ', 2)
+    except ValueError:
+        raise HttpError(400, "잘못된 요청입니다.")
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length') or 0)
+    except ValueError:
+        raise HttpError(400, "Content-Length 가 올바르지 않습니다.")
+    if length > _MAX_BODY:
+        raise HttpError(413, "요청 본문이 너무 큽니다.")
+    body = await reader.readexactly(length) if length else b''
+    return Request(method.upper(), target, version, headers, body)
+
+
+class ApiServer:
+    """작업 등록/상태/결과 전송을 처리하는 HTTP 서버."""
+
+    def __init__(self, host, port, token=None, manager=None):
+        self.host = host
+        self.port = port
+        self.token = token or None
+        self.manager = manager or jobs.get_job_manager()
+        self._server = None
+        self._stream_workers = config.API_STREAM_WORKERS
+        self._stream_executor = ThreadPoolExecutor(max_workers=self._stream_workers,
+                                                   thread_name_prefix='jy2mate-api-stream')
+        self._active_streams = 0
+
+    @property
+    def server_port(self):
+        return self._server.sockets[0].getsockname()[1] if self._server else self.port
+
+    async def start(self):
+        if not self.token and not streaming.is_loopback(self.host):
+            raise RuntimeError(f"API 서버를 {self.host} 에 열려면 JY2MATE_API_TOKEN 또는 --token 으로 인증 토큰을 지정해야 합니다.")
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except HttpError as e:
+                    await self._send_json(writer, e.status, {'error': e.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                started = time.perf_counter()
+                try:
+                    status, keep_alive = await self._dispatch(request, writer)
+                except HttpError as e:
+                    status, keep_alive = e.status, request.keep_alive
+                    await self._send_json(writer, e.status, {'error': e.message}, keep_alive, request.method)
+                except (ValueError, TypeError) as e:
+                    # 검사에서 놓친 잘못된 입력
+                    status, keep_alive = 400, request.keep_alive
+                    await self._send_json(writer, 400, {'error': str(e)}, keep_alive, request.method)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception:
+                    logger.exception('API 요청 처리 중 오류: %s %s', request.method, request.path)
+                    status, keep_alive = 500, False
+                    await self._send_json(writer, 500, {'error': "서버 내부 오류가 발생했습니다."}, False, request.method)
+                metrics.API_REQUESTS.inc(method=request.method, status=status)
+                metrics.STAGE_SECONDS.observe(time.perf_counter() - started, stage='api')
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _dispatch(self, request, writer):
+        """요청을 처리하고 (상태 코드, 연결 유지 여부) 를 반환합니다."""
+        parts = [part for part in request.path.split('/') if part]
+        if parts == ['healthz']:
+            return await self._send_json(writer, 200, {'status': 'ok'}, request.keep_alive, request.method)
+        self._authorize(request)
+        if parts == ['metrics']:
+            body = metrics.REGISTRY.render_prometheus().encode('utf-8')
+            return await self._send(writer, 200, body, 'text/plain; version=0.0.4; charset=utf-8',
+                                    keep_alive=request.keep_alive, send_body=request.method != 'HEAD')
+        if parts == ['metrics.json']:
+            return await self._send_json(writer, 200, metrics.REGISTRY.to_json(), request.keep_alive, request.method)
+        if parts == ['jobs'] and request.method == 'POST':
+            return await self._send_json(writer, 202, self._submit(request.json()), request.keep_alive)
+        if len(parts) == 2 and parts[0] == 'jobs' and request.method in ('GET', 'HEAD'):
+            job = await self._wait_job(parts[1], request.query.get('wait'))
+            return await self._send_json(writer, 200, self._job_json(job), request.keep_alive, request.method)
+        if len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'artifact' and request.method in ('GET', 'HEAD'):
+            return await self._send_artifact(request, writer, self._get_job(parts[1]))
+        if parts[:1] in (['jobs'], ['metrics'], ['healthz']):
+            raise HttpError(405, "허용되지 않는 메서드입니다.")
+        raise HttpError(404, "찾을 수 없는 경로입니다.")
+
+    def _authorize(self, request):
+        if not self.token:
+            return
+        given = request.headers.get('authorization', '')
+        if not hmac.compare_digest(given.encode('utf-8'), f'Bearer {self.token}'.encode('utf-8')):
+            raise HttpError(401, "인증 토큰이 올바르지 않습니다.")
+
+    def _submit(self, data):
+        options = (data.get('type'), data.get('quality'), data.get('container'))
+        try:
+            clip = engine.normalize_clip(data.get('start'), data.get('end'))
+            # 스레드와 연결 수가 끝없이 늘지 않도록 앱에서 고를 수 있는 범위로 제한
+            fan_out = _int_or_none(data.get('fan_out'), config.BATCH_FAN_OUT)
+            connections = _int_or_none(data.get('connections'), _MAX_CONNECTIONS)
+            if not isinstance(data.get('playlist'), (bool, type(None))):
+                raise ValueError("playlist 는 true, false, null 중 하나여야 합니다.")
+            if data.get('urls'):
+                if not isinstance(data['urls'], list) or not all(isinstance(url, str) for url in data['urls']):
+                    raise ValueError("urls 는 문자열 목록이어야 합니다.")
+                if clip:
+                    raise ValueError("구간 다운로드는 영상 하나에만 사용할 수 있습니다.")
+                job_id = engine.submit_batch(data['urls'], *options, fan_out=fan_out, connections=connections)
+            elif isinstance(data.get('url'), str) and data['url'].strip() and data.get('outputs'):
+                if not isinstance(data['outputs'], list) or not all(isinstance(output, str) for output in data['outputs']):
+                    raise ValueError("outputs 는 'mp3:320' 같은 문자열 목록이어야 합니다.")
+                job_id = engine.submit_audio_bundle(data['url'], data['outputs'], connections=connections, clip=clip)
+            elif isinstance(data.get('url'), str) and data['url'].strip():
+                job_id = engine.submit(data['url'], *options, is_playlist=data.get('playlist'), fan_out=fan_out,
+                                       connections=connections, clip=clip)
+            else:
+                raise ValueError("url 또는 urls 가 필요합니다.")
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        return self._job_json(self._get_job(job_id))
+
+    def _get_job(self, job_id):
+        job = self.manager.get(job_id)
+        if job is None:
+            raise HttpError(404, "작업을 찾을 수 없습니다. (ID 가 틀렸거나 보관 기간이 지남)")
+        return job
+
+    async def _wait_job(self, job_id, wait):
+        job = self._get_job(job_id)
+        try:
+            deadline = time.monotonic() + min(max(float(wait or 0), 0), _MAX_WAIT)
+        except ValueError:
+            raise HttpError(400, "wait 는 초 단위 숫자여야 합니다.")
+        while not job.finished and time.monotonic() < deadline:
+            await asyncio.sleep(0.25)
+        return job
+
+    def _job_json(self, job):
+        summary = engine.job_summary(job)
+        summary['status_url'] = f'/jobs/{job.id}'
+        if job.status == jobs.DONE:
+            summary['artifact_url'] = f'/jobs/{job.id}/artifact'
+        return summary
+
+    async def _send_artifact(self, request, writer, job):
+        if job.status == jobs.FAILED:
+            raise HttpError(409, f"작업이 실패했습니다: {job.error}")
+        if job.status != jobs.DONE:
+            raise HttpError(409, "작업이 아직 끝나지 않았습니다.")
+        send_body = request.method != 'HEAD'
+
+        if isinstance(job.result, playlist.PlaylistBuild):
+            # 청크를 읽는 스레드가 남은 항목을 기다리며 오래 막히므로 전용 스레드 풀에서 읽고, 그 풀이 다 차면 거절
+            if send_body:
+                if self._active_streams >= self._stream_workers:
+                    raise HttpError(503, "동시에 받을 수 있는 ZIP 스트림 수를 넘었습니다. 잠시 후 다시 시도해주세요.")
+                # 첫 await 전에 자리를 잡아야 검사와 증가 사이에 다른 요청이 끼어들지 못함
+                self._active_streams += 1
+            try:
+                # 전체 크기를 미리 알 수 없으므로 Content-Length 없이 보내고 연결 종료로 끝을 알림
+                build = job.result
+                await self._write_head(writer, 200, {
+                    'Content-Type': 'application/zip',
+                    'Content-Disposition': streaming.content_disposition(build.zip_name),
+                    'Connection': 'close',
+                })
+                if send_body:
+                    await self._stream_body(writer, build.iter_zip(), 'api_stream', self._stream_executor)
+            finally:
+                if send_body:
+                    self._active_streams -= 1
+            return 200, False
+
+        file_path, display_name, mime_type = job.result
+        if not os.path.exists(file_path):
+            raise HttpError(410, "결과 파일이 더 이상 없습니다. 다시 요청해주세요.")
+        size = os.path.getsize(file_path)
+        try:
+            byte_range = streaming.parse_range(request.headers.get('range'), size)
+        except ValueError:
+            await self._write_head(writer, 416, {'Content-Range': f'bytes */{size}', 'Content-Length': '0'})
+            return 416, request.keep_alive
+        start, end = byte_range if byte_range else (0, size - 1)
+        status = 206 if byte_range else 200
+        headers = {
+            'Content-Type': mime_type,
+            'Content-Length': str(max(end - start + 1, 0)),
+            'Content-Disposition': streaming.content_disposition(display_name),
+            'Accept-Ranges': 'bytes',
+            'Connection': 'keep-alive' if request.keep_alive else 'close',
+        }
+        if byte_range:
+            headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        await self._write_head(writer, status, headers)
+        if send_body and size:
+            if not await self._stream_body(writer, streaming.iter_file_chunks(file_path, start, end), 'api_serve'):
+                return status, False
+        return status, request.keep_alive
+
+    async def _stream_body(self, writer, chunks, stage, executor=None):
+        """
+        chunks 의 바이트 청크를 클라이언트로 보냅니다. 응답 머리를 이미 보냈으므로 중간에 오류가 나면
+        오류 응답 대신 기록만 하고 False 를 반환합니다. (연결을 닫아 클라이언트가 잘린 응답임을 알게 함)
+        청크는 executor(없으면 기본 스레드 풀)에서 읽습니다.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            sent = await self._pump(writer, lambda: next(chunks, None), executor)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            raise
+        except Exception:
+            logger.exception('결과 전송 중 오류')
+            return False
+        finally:
+            await loop.run_in_executor(executor, chunks.close)
+        metrics.STAGE_BYTES.inc(sent, stage=stage)
+        return True
+
+    async def _pump(self, writer, read_chunk, executor=None):
+        """read_chunk() 를 스레드 풀에서 불러 None 이 나올 때까지 클라이언트로 보냅니다. 보낸 바이트 수를 반환."""
+        loop = asyncio.get_running_loop()
+        sent = 0
+        while True:
+            chunk = await loop.run_in_executor(executor, read_chunk)
+            if chunk is None:
+                return sent
+            writer.write(chunk)
+            # 클라이언트가 느리면 여기서 기다리므로 메모리에 쌓이는 양은 버퍼 크기로 제한됨
+            await writer.drain()
+            sent += len(chunk)
+
+    async def _send_json(self, writer, status, data, keep_alive=True, method='GET'):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        return await self._send(writer, status, body, 'application/json; charset=utf-8', keep_alive,
+                                send_body=method != 'HEAD')
+
+    async def _send(self, writer, status, body, content_type, keep_alive=True, send_body=True):
+        await self._write_head(writer, status, {
+            'Content-Type': content_type,
+            'Content-Length': str(len(body)),
+            'Connection': 'keep-alive' if keep_alive else 'close',
+        })
+        if send_body:
+            writer.write(body)
+            await writer.drain()
+        return status, keep_alive
+
+    async def _write_head(self, writer, status, headers):
+        lines = [f'HTTP/1.1 {status} {HTTPStatus(status).phrase}', 'Server: JY2mate']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await writer.drain()
+
+
+def _int_or_none(value, upper):
+    """비어 있으면 None, 아니면 1 ~ upper 사이로 맞춘 정수. 정수가 아니면 ValueError."""
+    if value in (None, ''):
+        return None
+    try:
+        return min(max(1, int(value)), upper)
+    except (TypeError, ValueError):
+        raise ValueError(f"정수가 필요합니다: {value!r}")
+
+
+def run(host=None, port=None, token=None):
+    """API 서버를 실행합니다. (Ctrl+C 로 종료할 때까지 돌아감)"""
+    server = ApiServer(host or config.API_HOST, port or config.API_PORT,
+                       config.API_TOKEN if token is None else token)
+    asyncio.run(server.serve_forever())
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+JY2mate 명령줄 도구. Streamlit 없이 같은 다운로드 엔진(jy2mate.engine)을 사용합니다.
+
+    python -m jy2mate download URL [URL ...] [--type audio] [--quality 320] [--container mp3] [-o 디렉토리]
+    python -m jy2mate download URL --start 1:30 --end 2:00    (그 구간만 받음)
+    python -m jy2mate download URL --formats mp3:320 flac m4a (오디오를 한 번만 받아 여러 형식으로, 결과는 ZIP)
+    python -m jy2mate download --file urls.txt -o out/        (여러 URL 은 하나의 ZIP 으로 저장)
+    python -m jy2mate info URL                                (메타데이터를 JSON 으로 출력)
+    python -m jy2mate serve [--host 0.0.0.0] [--port 8503]    (HTTP API 서버 실행, jy2mate.api 참고)
+
+쿠키 파일은 --cookies 나 JY2MATE_COOKIE_FILES 로 지정합니다.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+from . import config, engine, jobs, playlist, urls
+
+
+def _load_cookies(args):
+    cookie_files = args.cookies or config.COOKIE_FILES
+    if cookie_files:
+        engine.load_cookie_files(cookie_files)
+
+
+def _print_progress(job, quiet):
+    if quiet:
+        return
+    summary = engine.job_summary(job)
+    line = f"\r[{summary['progress']:6.1%}] {summary['message']}"
+    sys.stderr.write(line[:120].ljust(120))
+    sys.stderr.flush()
+
+
+def cmd_download(args):
+    batch_urls = list(args.urls)
+    if args.file:
+        with open(args.file, encoding='utf-8-sig') as f:
+            batch_urls += urls.parse_url_list(f.read())
+    if not batch_urls:
+        print("다운로드할 URL 을 입력해주세요.", file=sys.stderr)
+        return 2
+    _load_cookies(args)
+    try:
+        clip = engine.normalize_clip(args.start, args.end)
+        if clip and (len(batch_urls) > 1 or args.playlist):
+            raise ValueError("구간 다운로드는 영상 하나에만 사용할 수 있습니다.")
+        if args.formats:
+            if len(batch_urls) > 1 or args.playlist:
+                raise ValueError("여러 형식 오디오는 영상 하나에만 사용할 수 있습니다.")
+            job_id = engine.submit_audio_bundle(batch_urls[0], args.formats, connections=args.connections, clip=clip)
+        elif len(batch_urls) > 1:
+            job_id = engine.submit_batch(batch_urls, args.type, args.quality, args.container,
+                                         fan_out=args.fan_out, connections=args.connections)
+        else:
+            job_id = engine.submit(batch_urls[0], args.type, args.quality, args.container,
+                                   is_playlist=True if args.playlist else None,
+                                   fan_out=args.fan_out, connections=args.connections, clip=clip)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    job = jobs.get_job_manager().get(job_id)
+    while not job.finished:
+        _print_progress(job, args.quiet)
+        time.sleep(0.5)
+    if not args.quiet:
+        sys.stderr.write('\n')
+    if job.status == jobs.FAILED:
+        print(f"실패: {job.error}", file=sys.stderr)
+        return 1
+
+    os.makedirs(args.output, exist_ok=True)
+    if isinstance(job.result, playlist.PlaylistBuild):
+        build = job.result
+        dest = os.path.join(args.output, build.zip_name)
+        # ZIP 은 항목이 끝나는 대로 만들어지므로 기다리는 동안 진행 상황을 보여줌
+        with open(dest, 'wb') as f:
+            for chunk in build.iter_zip():
+                f.write(chunk)
+                if not args.quiet:
+                    sys.stderr.write(f"\r{build.finished_count}/{build.total} 항목 완료 (실패 {build.failed_count})")
+        if not args.quiet:
+            sys.stderr.write('\n')
+        failed = build.failed_count
+    else:
+        file_path, display_name, _ = job.result
+        # 결과는 캐시에 있는 파일이므로 옮기지 않고 복사
+        dest = shutil.copyfile(file_path, os.path.join(args.output, display_name))
+        failed = 0
+    print(dest)
+    if job.timings.seconds and not args.quiet:
+        print(job.timings.summary(), file=sys.stderr)
+    return 1 if failed else 0
+
+
+def cmd_info(args):
+    _load_cookies(args)
+    info = engine.get_video_info(args.url)
+    json.dump(info, sys.stdout, ensure_ascii=False, indent=2, default=str)
+    sys.stdout.write('\n')
+    return 1 if 'error' in info else 0
+
+
+def cmd_serve(args):
+    from . import api
+
+    _load_cookies(args)
+    print(f"JY2mate API: http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        api.run(args.host, args.port, args.token)
+    except KeyboardInterrupt:
+        pass
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 2
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m jy2mate', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cookies', action='append', metavar='[이름=]경로',
+                        help='Netscape 형식 쿠키 파일 (여러 번 지정 가능, 기본: JY2MATE_COOKIE_FILES)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    download = commands.add_parser('download', help='영상/오디오를 받아 파일로 저장')
+    download.add_argument('urls', nargs='*')
+    download.add_argument('--file', help='URL 목록 파일 (txt/csv, 한 줄에 하나)')
+    download.add_argument('--type', default='video', help='video(영상) 또는 audio(오디오)')
+    download.add_argument('--quality', help='영상: 1080p/720p/480p/best, 오디오: kbps (기본: 1080p / 192)')
+    download.add_argument('--container', help='확장자 (기본: mp4 / mp3)')
+    download.add_argument('--playlist', action='store_true', help='재생목록 전체를 받아 ZIP 으로 저장')
+    download.add_argument('--fan-out', type=int, help='재생목록/배치에서 동시에 진행할 항목 수')
+    download.add_argument('--connections', type=int, help='파일 하나당 최대 연결 수')
+    download.add_argument('--formats', nargs='+', metavar='확장자[:음질]',
+                          help='오디오를 한 번만 받아 여러 형식으로 변환 (예: mp3:320 flac). --type/--quality/--container 대신 사용')
+    download.add_argument('--start', help='구간 시작 (초 또는 [시:]분:초)')
+    download.add_argument('--end', help='구간 끝 (초 또는 [시:]분:초)')
+    download.add_argument('-o', '--output', default='.', help='저장할 디렉토리')
+    download.add_argument('-q', '--quiet', action='store_true', help='진행 상황을 출력하지 않음')
+    download.set_defaults(func=cmd_download)
+
+    info = commands.add_parser('info', help='다운로드 없이 메타데이터를 JSON 으로 출력')
+    info.add_argument('url')
+    info.set_defaults(func=cmd_info)
+
+    serve = commands.add_parser('serve', help='HTTP API 서버 실행')
+    serve.add_argument('--host', default=config.API_HOST)
+    serve.add_argument('--port', type=int, default=config.API_PORT)
+    serve.add_argument('--token', default=None, help='인증 토큰 (기본: JY2MATE_API_TOKEN)')
+    serve.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
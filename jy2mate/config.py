@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""환경 변수로 조정할 수 있는 설정값 모음."""
+
+import os
+import tempfile
+
+
+def _env_int(name, default):
+    """정수형 환경 변수를 읽고, 없거나 잘못된 값이면 기본값을 반환합니다."""
+    try:
+        return int(os.environ[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def _env_float(name, default):
+    """실수형 환경 변수를 읽고, 없거나 잘못된 값이면 기본값을 반환합니다."""
+    try:
+        return float(os.environ[name])
+    except (KeyError, ValueError):
+        return default
+
+
+# --------------------------------------------------------------------------
+# 완성 파일 전송 서버
+# --------------------------------------------------------------------------
+# 기본값은 이 컴퓨터에서만 접근 가능. 다른 컴퓨터에서 받게 하려면 0.0.0.0 등으로 바꾸고 BASE_URL 도 지정
+FILE_SERVER_HOST = os.environ.get('JY2MATE_FILE_HOST', '127.0.0.1')
+FILE_SERVER_PORT = _env_int('JY2MATE_FILE_PORT', 8502)
+# 브라우저가 접근할 주소 (예: https://dl.example.com). 루프백이 아닌 주소에 바인딩하면 반드시 지정해야 하며,
+# 비워 두면 http://localhost:<포트> 를 씀
+FILE_SERVER_BASE_URL = os.environ.get('JY2MATE_FILE_BASE_URL', '').rstrip('/')
+SERVE_DIR = os.environ.get('JY2MATE_SERVE_DIR', os.path.join(tempfile.gettempdir(), 'jy2mate-serve'))
+SERVE_TTL = _env_int('JY2MATE_SERVE_TTL', 3600)
+STREAM_CHUNK_SIZE = _env_int('JY2MATE_STREAM_CHUNK', 1024 * 1024)
+
+# --------------------------------------------------------------------------
+# HTTP API (python -m jy2mate serve)
+# --------------------------------------------------------------------------
+API_HOST = os.environ.get('JY2MATE_API_HOST', '127.0.0.1')
+API_PORT = _env_int('JY2MATE_API_PORT', 8503)
+# 설정하면 요청마다 'Authorization: Bearer <토큰>' 이 필요합니다.
+API_TOKEN = os.environ.get('JY2MATE_API_TOKEN', '')
+# 동시에 보낼 수 있는 재생목록/배치 ZIP 스트림 수. 스트림마다 항목이 끝나기를 기다리는 스레드 하나를 씀
+API_STREAM_WORKERS = _env_int('JY2MATE_API_STREAM_WORKERS', 8)
+# API/명령줄에서 쓸 쿠키 파일. 쉼표로 구분하며 'name=경로' 로 프로필 이름을 붙일 수 있습니다.
+COOKIE_FILES = [spec.strip() for spec in os.environ.get('JY2MATE_COOKIE_FILES', '').split(',') if spec.strip()]
+
+# --------------------------------------------------------------------------
+# 다운로드 결과 캐시
+# --------------------------------------------------------------------------
+CACHE_DIR = os.environ.get('JY2MATE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'jy2mate-cache'))
+CACHE_MAX_BYTES = _env_int('JY2MATE_CACHE_MAX_BYTES', 20 * 1024 ** 3)
+
+# --------------------------------------------------------------------------
+# 백그라운드 작업
+# --------------------------------------------------------------------------
+# 동시에 다운로드(네트워크)하는 작업 수와 FFmpeg 후처리(CPU)를 실행하는 작업 수
+NETWORK_WORKERS = _env_int('JY2MATE_NETWORK_WORKERS', 4)
+CPU_WORKERS = _env_int('JY2MATE_CPU_WORKERS', os.cpu_count() or 2)
+# 동시에 메타데이터를 추출하는 작업 수
+EXTRACT_WORKERS = _env_int('JY2MATE_EXTRACT_WORKERS', NETWORK_WORKERS)
+# 끝난 작업의 상태와 결과를 보관하는 시간 (초)
+JOB_RETENTION = _env_int('JY2MATE_JOB_RETENTION', 6 * 3600)
+# 진행 상황 이벤트를 화면으로 보내는 최소 간격 (초). 화면은 1초마다 갱신됩니다.
+PROGRESS_INTERVAL = _env_float('JY2MATE_PROGRESS_INTERVAL', 0.5)
+
+# --------------------------------------------------------------------------
+# 메타데이터 캐시
+# --------------------------------------------------------------------------
+# 포맷 URL 의 서명이 만료되기 전에 버려지도록 짧게 유지
+INFO_CACHE_TTL = _env_int('JY2MATE_INFO_CACHE_TTL', 30 * 60)
+INFO_CACHE_MAX_ENTRIES = _env_int('JY2MATE_INFO_CACHE_MAX_ENTRIES', 512)
+
+# --------------------------------------------------------------------------
+# 재생목록
+# --------------------------------------------------------------------------
+# 재생목록 하나에서 동시에 다운로드하는 항목 수
+PLAYLIST_FAN_OUT = _env_int('JY2MATE_PLAYLIST_FAN_OUT', 4)
+# 여러 URL 을 한 번에 받을 때 동시에 진행하는 항목 수와 받을 수 있는 최대 URL 수.
+# 기본값은 추출/다운로드/후처리 단계의 슬롯을 모두 채울 수 있는 수입니다.
+BATCH_FAN_OUT = _env_int('JY2MATE_BATCH_FAN_OUT', EXTRACT_WORKERS + NETWORK_WORKERS + CPU_WORKERS)
+BATCH_MAX_URLS = _env_int('JY2MATE_BATCH_MAX_URLS', 200)
+
+# --------------------------------------------------------------------------
+# YoutubeDL 인스턴스 풀
+# --------------------------------------------------------------------------
+# 옵션 프로필 하나당 보관하는 인스턴스 수와, 보관하는 프로필 수
+YDL_POOL_SIZE = _env_int('JY2MATE_YDL_POOL_SIZE', NETWORK_WORKERS)
+YDL_POOL_PROFILES = _env_int('JY2MATE_YDL_POOL_PROFILES', 8)
+
+# --------------------------------------------------------------------------
+# 다중 연결 다운로드
+# --------------------------------------------------------------------------
+# 파일 하나를 받을 때 사용할 최대 연결 수 (1 이면 기존 단일 연결)
+DOWNLOAD_CONNECTIONS = _env_int('JY2MATE_DOWNLOAD_CONNECTIONS', 4)
+# 구간 하나의 크기와, 여러 연결을 사용하기 시작하는 최소 파일 크기
+SEGMENT_SIZE = _env_int('JY2MATE_SEGMENT_SIZE', 4 * 1024 * 1024)
+SEGMENTED_MIN_SIZE = _env_int('JY2MATE_SEGMENTED_MIN_SIZE', 16 * 1024 * 1024)
+
+# --------------------------------------------------------------------------
+# 작업별 임시 저장 공간
+# --------------------------------------------------------------------------
+# 영상 작업의 임시 디렉토리 위치. 전송용 디렉토리, 캐시와 같은 파일시스템이면 결과를 복사 없이 옮깁니다.
+SCRATCH_DIR = os.environ.get('JY2MATE_SCRATCH_DIR', os.path.join(tempfile.gettempdir(), 'jy2mate-scratch'))
+# 오디오 작업처럼 작은 작업에 쓰는 메모리 파일시스템(tmpfs) 위치. 빈 값이면 사용하지 않습니다.
+SCRATCH_TMPFS_DIR = os.environ.get(
+    'JY2MATE_SCRATCH_TMPFS_DIR', '/dev/shm/jy2mate-scratch' if os.path.isdir('/dev/shm') else ''
+)
+# 임시 디렉토리 전체와 tmpfs 에서 쓸 수 있는 최대 바이트 수, 작업 하나의 최대 바이트 수
+SCRATCH_MAX_BYTES = _env_int('JY2MATE_SCRATCH_MAX_BYTES', 50 * 1024 ** 3)
+SCRATCH_TMPFS_MAX_BYTES = _env_int('JY2MATE_SCRATCH_TMPFS_MAX_BYTES', 512 * 1024 ** 2)
+JOB_MAX_BYTES = _env_int('JY2MATE_JOB_MAX_BYTES', 16 * 1024 ** 3)
+# 작업을 시작할 때 미리 잡아 두는 용량 (실제 사용량이 더 커지면 그 값으로 계산)
+SCRATCH_RESERVE_VIDEO = _env_int('JY2MATE_SCRATCH_RESERVE_VIDEO', 1024 ** 3)
+SCRATCH_RESERVE_AUDIO = _env_int('JY2MATE_SCRATCH_RESERVE_AUDIO', 64 * 1024 ** 2)
+# 디스크에 항상 남겨 둘 여유 공간과, 공간이 부족할 때 작업이 기다리는 최대 시간 (초)
+SCRATCH_MIN_FREE = _env_int('JY2MATE_SCRATCH_MIN_FREE', 2 * 1024 ** 3)
+SCRATCH_WAIT = _env_int('JY2MATE_SCRATCH_WAIT', 120)
+# 주인 프로세스를 확인할 수 없는 임시 디렉토리를 지우기까지의 시간 (초)
+SCRATCH_ORPHAN_AGE = _env_int('JY2MATE_SCRATCH_ORPHAN_AGE', 6 * 3600)
+# 실패한 작업의 임시 디렉토리를 이어받기용으로 남겨 두는 시간 (초). 0 이면 다음 정리 때 지움
+SCRATCH_RESUME_TTL = _env_int('JY2MATE_SCRATCH_RESUME_TTL', 24 * 3600)
+
+# --------------------------------------------------------------------------
+# 재시도 정책
+# --------------------------------------------------------------------------
+# 작업 하나가 재시도(진전 없이 실패한 시도 + 대기)에 쓸 수 있는 최대 시간 (초)과 최대 시도 횟수.
+# 실패한 시도가 데이터를 조금이라도 더 받았으면 둘 다 처음부터 다시 셈
+RETRY_BUDGET = _env_float('JY2MATE_RETRY_BUDGET', 180.0)
+RETRY_MAX_ATTEMPTS = _env_int('JY2MATE_RETRY_MAX_ATTEMPTS', 4)
+# 지수 백오프의 첫 대기 시간과 최대 대기 시간 (초). 요청 제한(429/403)으로 보이면 THROTTLE 배만큼 길게 기다림
+RETRY_BASE = _env_float('JY2MATE_RETRY_BASE', 1.0)
+RETRY_CAP = _env_float('JY2MATE_RETRY_CAP', 60.0)
+RETRY_THROTTLE_FACTOR = _env_float('JY2MATE_RETRY_THROTTLE_FACTOR', 5.0)
+# yt-dlp 내부의 HTTP/조각 재시도 횟수 (yt-dlp 기본값과 같음)
+YTDLP_RETRIES = _env_int('JY2MATE_YTDLP_RETRIES', 10)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Secrets 의 유튜브 쿠키를 프로세스 전체에서 한 번만 파일로 만들고 파싱해 두는 자격 증명 관리자.
+
+- 쿠키 내용이 같으면 파일을 다시 쓰지 않습니다. 파일은 이 프로세스만 읽을 수 있는
+  디렉토리(0700)에 0600 권한으로 만들어지며, 이름은 내용의 해시입니다.
+- 쿠키 파일은 프로필마다 한 번만 파싱해 YoutubeDLCookieJar 를 만들고,
+  같은 프로필의 YoutubeDL 인스턴스(ydl_pool)가 모두 이 쿠키 저장소를 함께 사용합니다.
+- sync 는 요청마다 불러도 되며, Secrets 값이 바뀐 경우에만 파일을 다시 만듭니다.
+- 쿠키 프로필을 여러 개 등록할 수 있으며, 어떤 프로필을 쓸지는 retry.ProfileScoreboard 가
+  최근 성공/실패 기록을 보고 고릅니다. (여러 계정에 요청을 나눠 보냄)
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+from . import metrics
+
+
+class CookieProfile:
+    """쿠키 파일 하나와, 처음 사용할 때 파싱해 두는 쿠키 저장소."""
+
+    def __init__(self, name, content, directory):
+        self.name = name
+        self.digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        # 점수표/메트릭에서 쓰는 이름. 내용이 바뀌면 새 프로필로 집계됩니다.
+        self.key = f'{name}:{self.digest[:8]}'
+        self.path = os.path.join(directory, f'{self.digest}.txt')
+        if not os.path.exists(self.path):
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            metrics.CREDENTIAL_EVENTS.inc(event='materialized')
+        self._jar = None
+        self._lock = threading.Lock()
+
+    def jar(self):
+        """파싱된 YoutubeDLCookieJar. 프로필마다 한 번만 파싱합니다."""
+        from yt_dlp.cookies import YoutubeDLCookieJar
+
+        with self._lock:
+            if self._jar is None:
+                jar = YoutubeDLCookieJar(self.path)
+                jar.load()
+                self._jar = jar
+                metrics.CREDENTIAL_EVENTS.inc(event='parsed')
+            return self._jar
+
+
+class CredentialManager:
+    """이름별 쿠키 프로필을 보관합니다."""
+
+    def __init__(self):
+        self._directory = None
+        self._source = None
+        self._profiles = []
+        self._by_path = {}
+        self._lock = threading.Lock()
+
+    def sync(self, cookies):
+        """
+        cookies({프로필 이름: 쿠키 파일 내용}) 를 반영합니다. 마지막으로 반영한 값과 같으면 아무 일도 하지 않고,
+        바뀌었으면 새 내용의 파일을 만들고 더 이상 쓰지 않는 파일은 지웁니다.
+        """
+        source = tuple(sorted((name, content) for name, content in cookies.items() if content))
+        with self._lock:
+            if source == self._source:
+                return
+            if self._directory is None:
+                self._directory = tempfile.mkdtemp(prefix='jy2mate-cookies-')
+                os.chmod(self._directory, 0o700)
+            reusable = {(profile.name, profile.digest): profile for profile in self._profiles}
+            profiles = []
+            for name, content in source:
+                digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+                profiles.append(reusable.get((name, digest)) or CookieProfile(name, content, self._directory))
+            kept = {profile.path for profile in profiles}
+            for profile in self._profiles:
+                if profile.path not in kept:
+                    try:
+                        os.remove(profile.path)
+                    except FileNotFoundError:
+                        pass
+            if self._source is not None:
+                metrics.CREDENTIAL_EVENTS.inc(event='changed')
+            self._profiles = profiles
+            self._by_path = {profile.path: profile for profile in profiles}
+            self._source = source
+
+    def profiles(self):
+        with self._lock:
+            return list(self._profiles)
+
+    def lookup(self, path):
+        """관리 중인 쿠키 파일 경로면 해당 CookieProfile 을, 아니면 None 을 반환합니다."""
+        with self._lock:
+            return self._by_path.get(path)
+
+    def close(self):
+        with self._lock:
+            if self._directory:
+                shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+            self._source = None
+            self._profiles = []
+            self._by_path = {}
+
+
+_credential_manager = None
+_credential_manager_lock = threading.Lock()
+
+
+def get_credential_manager():
+    """프로세스 전체에서 공유하는 자격 증명 관리자를 반환합니다."""
+    global _credential_manager
+    with _credential_manager_lock:
+        if _credential_manager is None:
+            _credential_manager = CredentialManager()
+        return _credential_manager
@@ -0,0 +1,581 @@
+# -*- coding: utf-8 -*-
+"""
+Streamlit 없이 불러 쓸 수 있는 다운로드 엔진.
+
+Streamlit 앱(app.py, app2.py), HTTP API(jy2mate.api), 명령줄(python -m jy2mate)이 모두 이 모듈로
+작업을 등록하므로, 결과 캐시, 같은 요청 합치기(single-flight), 재시도 정책, 임시 저장 공간 한도를 함께 씁니다.
+
+- submit / submit_batch 로 작업을 등록하면 작업 ID 를 돌려받고, jobs.get_job_manager().get(ID) 로 상태를 확인합니다.
+- 끝난 작업의 결과는 (파일 경로, 파일명, MIME 타입) 또는 재생목록/배치의 playlist.PlaylistBuild 입니다.
+- 쿠키는 호출하는 쪽이 set_cookies(Streamlit Secrets) 나 load_cookie_files(파일 경로) 로 넣어 줍니다.
+- clip=(시작 초, 끝 초) 를 주면 영상 하나의 그 구간만 받습니다. (normalize_clip 으로 '1:30' 같은 입력을 변환)
+- submit_audio_bundle 은 오디오 원본을 한 번만 받아 여러 형식/음질로 변환하고 ZIP 하나로 돌려줍니다.
+"""
+
+import os
+import re
+import time
+
+from . import (config, credentials, format_planner, info_cache, jobs, metrics, playlist, progress, result_cache,
+               retry, storage, transcode, urls, ydl_pool)
+
+VIDEO = '영상'
+AUDIO = '오디오'
+
+# 다운로드 타입별 (기본 품질, 기본 확장자, 고를 수 있는 확장자)
+DEFAULTS = {
+    VIDEO: ('1080p', 'mp4', ('mp4', 'mkv', 'webm')),
+    AUDIO: ('192', 'mp3', ('mp3', 'flac', 'm4a', 'wav', 'opus')),
+}
+_TYPE_ALIASES = {'video': VIDEO, 'audio': AUDIO, VIDEO: VIDEO, AUDIO: AUDIO}
+_VIDEO_QUALITY_RE = re.compile(r'^(best|\d{3,4}p)$')
+_AUDIO_QUALITY_RE = re.compile(r'^\d{2,3}$')
+_TIMESTAMP_RE = re.compile(r'^(?:(?:(\d+):)?(\d{1,2}):)?(\d+(?:\.\d+)?)$')
+
+# 여러 브라우저의 User-Agent 리스트
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/111.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/111.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/111.0',
+]
+
+_MIME_TYPES = {'mp4': 'video/mp4', 'mkv': 'video/x-matroska', 'webm': 'video/webm', 'mp3': 'audio/mpeg',
+               'flac': 'audio/flac', 'm4a': 'audio/mp4', 'wav': 'audio/wav', 'opus': 'audio/ogg'}
+
+
+def normalize_options(download_type, quality=None, container=None):
+    """
+    다운로드 옵션을 검사하고 빈 값은 기본값으로 채워 (타입, 품질, 확장자) 를 반환합니다.
+    타입은 '영상'/'오디오' 외에 'video'/'audio' 도 받습니다. 잘못된 값이면 ValueError.
+    """
+    download_type = _TYPE_ALIASES.get(str(download_type or VIDEO).strip().lower())
+    if download_type is None:
+        raise ValueError("다운로드 타입은 영상(video) 또는 오디오(audio) 여야 합니다.")
+    default_quality, default_container, containers = DEFAULTS[download_type]
+    quality = str(quality or default_quality).strip().lower()
+    container = str(container or default_container).strip().lower()
+    quality_re = _AUDIO_QUALITY_RE if download_type == AUDIO else _VIDEO_QUALITY_RE
+    if not quality_re.match(quality):
+        raise ValueError(f"지원하지 않는 품질입니다: {quality}")
+    if container not in containers:
+        raise ValueError(f"{download_type} 확장자는 {', '.join(containers)} 중 하나여야 합니다.")
+    return download_type, quality, container
+
+
+def normalize_audio_outputs(outputs):
+    """
+    여러 형식 오디오 요청의 출력 목록을 검사해 중복 없는 [(확장자, 음질), ...] 를 반환합니다.
+    항목은 'mp3:320', 'flac' 같은 문자열이나 (확장자, 음질) 이며, 음질을 빼면 기본값(192)을 씁니다.
+    flac/wav 는 음질과 상관없이 결과가 같으므로 확장자당 하나만 남깁니다. 잘못된 값이면 ValueError.
+    """
+    normalized = []
+    for output in outputs or ():
+        container, quality = output.split(':', 1) if isinstance(output, str) and ':' in output else (
+            (output, None) if isinstance(output, str) else tuple(output))
+        _, quality, container = normalize_options(AUDIO, quality, container)
+        if container in transcode.LOSSLESS and any(c == container for c, _ in normalized):
+            continue
+        if (container, quality) not in normalized:
+            normalized.append((container, quality))
+    if not normalized:
+        raise ValueError("받을 오디오 형식을 하나 이상 선택해주세요.")
+    return normalized
+
+
+def parse_timestamp(value):
+    """'90', '1:30', '01:02:03.5' 같은 시각을 초로 바꿉니다. 빈 값이면 None, 잘못된 값이면 ValueError."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        seconds = float(value)
+    else:
+        match = _TIMESTAMP_RE.match(str(value).strip())
+        if not match:
+            raise ValueError(f"시각은 초 또는 [시:]분:초 형식이어야 합니다: {value}")
+        hours, minutes, seconds = match.groups()
+        if (minutes is not None and float(seconds) >= 60) or (hours is not None and int(minutes) >= 60):
+            raise ValueError(f"시각은 초 또는 [시:]분:초 형식이어야 합니다: {value}")
+        seconds = int(hours or 0) * 3600 + int(minutes or 0) * 60 + float(seconds)
+    if seconds < 0:
+        raise ValueError(f"시각은 0 이상이어야 합니다: {value}")
+    return seconds
+
+
+def normalize_clip(start=None, end=None):
+    """
+    구간 입력을 검사해 (시작 초, 끝 초 또는 None) 을 반환합니다. 둘 다 비어 있으면 None (전체 다운로드).
+    시작만 주면 끝까지, 끝만 주면 처음부터 받습니다. 끝이 시작보다 앞이면 ValueError.
+    """
+    start, end = parse_timestamp(start), parse_timestamp(end)
+    if start is None and end is None:
+        return None
+    start = start or 0.0
+    if end is not None and end <= start:
+        raise ValueError("구간의 끝은 시작보다 뒤여야 합니다.")
+    if start == 0 and end is None:
+        return None
+    return start, end
+
+
+def clip_label(clip):
+    """파일명과 작업 이름에 붙이는 구간 표시. 예: (90, 120) -> '1m30s-2m00s'"""
+    def fmt(seconds):
+        # 먼저 반올림해야 59.96 초가 '0m60.0s' 가 아니라 '1m00s' 가 됨
+        minutes, seconds = divmod(round(seconds, 1), 60)
+        return f"{int(minutes)}m{seconds:02.0f}s" if seconds == int(seconds) else f"{int(minutes)}m{seconds:04.1f}s"
+    start, end = clip
+    return f"{fmt(start)}-{fmt(end) if end is not None else 'end'}"
+
+
+# --------------------------------------------------------------------------
+# 쿠키와 User-Agent 프로필
+# --------------------------------------------------------------------------
+def set_cookies(cookies):
+    """{프로필 이름: 쿠키 파일 내용} 을 자격 증명 관리자에 반영합니다. 바뀌지 않았으면 아무 일도 하지 않습니다."""
+    credentials.get_credential_manager().sync(cookies)
+
+
+def load_cookie_files(paths):
+    """
+    Netscape 형식 쿠키 파일들을 읽어 set_cookies 로 반영합니다.
+    'name=경로' 로 주면 그 이름의 프로필이 되고, 경로만 주면 파일 이름이 프로필 이름이 됩니다.
+    """
+    cookies = {}
+    for spec in paths:
+        name, _, path = spec.rpartition('=') if '=' in spec else ('', '', spec)
+        with open(os.path.expanduser(path), encoding='utf-8') as f:
+            cookies[name or os.path.splitext(os.path.basename(path))[0]] = f.read()
+    set_cookies(cookies)
+
+
+def download_profiles():
+    """
+    재시도 정책이 고르는 프로필 {이름: (User-Agent, 쿠키 파일 경로)}. User-Agent 와 쿠키 프로필의 모든 조합이며,
+    이름에 쿠키 내용의 해시가 들어가므로 쿠키가 바뀌면 성공/실패 기록도 새로 시작합니다.
+    """
+    cookie_profiles = credentials.get_credential_manager().profiles() or [None]
+    return {
+        f'ua{index}+{cookie.key if cookie else "nocookie"}': (user_agent, cookie.path if cookie else None)
+        for index, user_agent in enumerate(USER_AGENTS) for cookie in cookie_profiles
+    }
+
+
+def preferred_profile():
+    """최근 기록상 정상인 (User-Agent, 쿠키 파일 경로) 조합 하나를 고릅니다."""
+    profiles = download_profiles()
+    return profiles[retry.get_scoreboard().choose(profiles)]
+
+
+# --------------------------------------------------------------------------
+# 다운로드
+# --------------------------------------------------------------------------
+def get_video_info(url):
+    """
+    다운로드 없이 영상의 메타데이터만 추출하여 반환합니다.
+    추출 결과는 메타데이터 캐시에 저장되어 같은 영상의 다운로드에서 재사용됩니다.
+    """
+    cache = info_cache.get_info_cache()
+    info_dict = cache.get(url)
+    if info_dict is not None:
+        return info_dict
+
+    # yt-dlp 는 무거우므로 실제로 필요할 때 처음 불러옴 (인증 화면 등 다른 재실행에서는 불러오지 않음)
+    from yt_dlp.utils import DownloadError
+
+    user_agent, cookie_filepath = preferred_profile()
+    ydl_opts = {
+        'quiet': True,
+        'noprogress': True,
+        'cookiefile': cookie_filepath,
+        'http_headers': {'User-Agent': user_agent},
+    }
+    try:
+        with ydl_pool.get_ydl_pool().acquire(ydl_opts) as ydl:
+            return cache.get_or_extract(url, lambda normalized_url: ydl.extract_info(normalized_url, download=False))
+    except DownloadError as e:
+        return {"error": str(e)}
+
+
+def download_content(url, download_type, quality, container, ctx=None, connections=None, clip=None):
+    """
+    영상 하나를 다운로드하는 함수. (파일 경로, 파일명, MIME 타입) 을 반환합니다.
+    결과 캐시를 거치므로, 같은 영상/옵션 조합은 다시 다운로드하지 않고 캐시 파일을 그대로 돌려줍니다.
+    백그라운드 작업으로 실행될 때는 ctx(JobContext) 로 진행률과 작업 단계를 보고합니다.
+    connections 는 파일 하나를 받을 때 사용할 최대 연결 수입니다. (기본값: config.DOWNLOAD_CONNECTIONS)
+    clip 이 (시작 초, 끝 초 또는 None) 이면 그 구간만 받습니다.
+    옵션은 normalize_options 로 정리하므로 'audio' 와 '오디오' 는 같은 캐시 항목을 씁니다.
+    """
+    download_type, quality, container = normalize_options(download_type, quality, container)
+
+    def produce(staging_dir):
+        # 다운로드와 후처리는 작업별 임시 디렉토리(오디오는 tmpfs)에서 하고, 결과 파일만 캐시로 옮김
+        # 임시 디렉토리는 캐시 key 로 정해지므로, 실패한 뒤 같은 요청이 오면 받다 만 파일을 이어받음
+        with storage.get_storage_manager().scratch(storage.kind_for(download_type), key=key) as scratch:
+            file_path, display_name, mime_type = download_to(
+                url, download_type, quality, container, scratch.path, ctx, connections, scratch, clip
+            )
+            return storage.move_file(file_path, os.path.join(staging_dir, display_name)), display_name, mime_type
+
+    key = result_cache.make_key(urls.cache_id(url), download_type, quality, container, clip)
+    entry = _get_or_create_pinned(key, produce, ctx)
+    return entry.path, entry.display_name, entry.mime_type
+
+
+def _get_or_create_pinned(key, produce, ctx):
+    """결과 캐시에서 항목을 가져오거나 만듭니다. 작업(ctx)의 결과면 작업 상태가 지워질 때까지 LRU 정리에서 고정합니다."""
+    cache = result_cache.get_result_cache()
+    entry = cache.get_or_create(key, produce, pin=ctx is not None)
+    if ctx is not None:
+        ctx.on_release(lambda: cache.unpin(entry.path))
+    return entry
+
+
+def download_audio_bundle(url, outputs, ctx=None, connections=None, clip=None):
+    """
+    오디오 원본을 한 번만 받아 outputs([(확장자, 음질), ...]) 의 모든 형식을 FFmpeg 한 번으로 만들고,
+    결과를 무압축 ZIP 하나로 묶어 (파일 경로, 파일명, MIME 타입) 을 반환합니다.
+    형식별 결과는 download_content 와 같은 키로 결과 캐시에 넣으므로, 이미 받아 둔 형식은 다시 만들지 않고
+    나중에 형식 하나만 요청해도 캐시에서 바로 나옵니다.
+    """
+    cache = result_cache.get_result_cache()
+    video_id = urls.cache_id(url)
+    keys = {output: result_cache.make_key(video_id, AUDIO, output[1], output[0], clip) for output in outputs}
+    # 같은 확장자를 여러 음질로 받으면 ZIP 안 파일명에 음질을 붙임
+    repeated = {container for container, _ in outputs if sum(c == container for c, _ in outputs) > 1}
+
+    def produce_output(path, name, container):
+        return lambda staging_dir: (storage.move_file(path, os.path.join(staging_dir, name)), name,
+                                    _MIME_TYPES[container])
+
+    def produce(staging_dir):
+        # ZIP 에 넣을 때까지 형식별 결과가 정리되지 않도록 고정
+        entries = {output: cache.get(key, pin=True) for output, key in keys.items()}
+        try:
+            return produce_zip(staging_dir, entries)
+        finally:
+            for entry in entries.values():
+                if entry is not None:
+                    cache.unpin(entry.path)
+
+    def produce_zip(staging_dir, entries):
+        missing = [output for output, entry in entries.items() if entry is None]
+        if missing:
+            with storage.get_storage_manager().scratch(storage.AUDIO, key=('audio_bundle', key)) as scratch:
+                # 변환하지 않은 원본 (container=None) 을 받음
+                source, source_name, _ = download_to(url, AUDIO, None, None, scratch.path, ctx, connections, scratch, clip)
+                title = os.path.splitext(source_name)[0]
+                targets = [(os.path.join(scratch.path, f'output-{index}.{container}'), container, quality)
+                           for index, (container, quality) in enumerate(missing)]
+                _run_transcode(source, targets, ctx, scratch)
+                for (path, container, quality), output in zip(targets, missing):
+                    entries[output] = cache.get_or_create(
+                        keys[output], produce_output(path, f'{title}.{container}', container), pin=True)
+        else:
+            title = os.path.splitext(entries[outputs[0]].display_name)[0]
+
+        zip_name = f"{''.join(c for c in title if c.isalnum() or c in ' -_()').strip() or 'audio'}.zip"
+        items = [(f'{title} ({quality}k).{container}' if container in repeated else f'{title}.{container}',
+                  entries[(container, quality)].path) for container, quality in outputs]
+        zip_path = os.path.join(staging_dir, zip_name)
+        with open(zip_path, 'wb') as f:
+            for chunk in playlist.iter_zip_stream(items):
+                f.write(chunk)
+        return zip_path, zip_name, 'application/zip'
+
+    key = result_cache.make_key(video_id, AUDIO, ','.join(f'{c}:{q}' for c, q in outputs), 'zip', clip)
+    entry = _get_or_create_pinned(key, produce, ctx)
+    return entry.path, entry.display_name, entry.mime_type
+
+
+def _run_transcode(source, targets, ctx, scratch):
+    """transcode.transcode_audio 를 yt-dlp 후처리기처럼 훅(단계 전환, 시간 기록, 이어받기 기록)과 함께 실행합니다."""
+    timings = ctx.timings if ctx else metrics.JobTimings()
+    hooks = [timings.postprocessor_hook]
+    if ctx:
+        hooks.append(ctx.ydl_postprocessor_hook)
+    if scratch:
+        hooks.append(scratch.postprocessor_hook)
+    for hook in hooks:
+        hook({'status': 'started', 'postprocessor': 'MultiOutputAudio', 'info_dict': {}})
+    transcode.transcode_audio(source, targets)
+    for hook in hooks:
+        hook({'status': 'finished', 'postprocessor': 'MultiOutputAudio', 'info_dict': {}})
+
+
+def download_playlist(url, download_type, quality, container, fan_out, connections=None, require_multiple=False):
+    """
+    재생목록의 항목 목록을 가져온 뒤 항목별 병렬 다운로드를 시작하고 PlaylistBuild 를 반환합니다.
+    각 항목은 download_content 를 거치므로 이미 받아 둔 영상은 캐시에서 바로 사용됩니다.
+    require_multiple 이 True 이고 항목이 하나뿐이면 PlaylistBuild 대신 None 을 반환합니다.
+    """
+    from yt_dlp.utils import DownloadError
+
+    user_agent, cookie_filepath = preferred_profile()
+    ydl_opts = {
+        'quiet': True, 'noprogress': True, 'extract_flat': 'in_playlist',
+        'cookiefile': cookie_filepath,
+        'http_headers': {'User-Agent': user_agent},
+    }
+    try:
+        with ydl_pool.get_ydl_pool().acquire(ydl_opts) as ydl:
+            title, entries = playlist.extract_playlist_entries(ydl, url)
+    except DownloadError as e:
+        raise ValueError(f"재생목록 정보를 가져오지 못했습니다: {e}")
+    if require_multiple and len(entries) <= 1:
+        return None
+    if not entries: raise FileNotFoundError("재생목록에 다운로드할 수 있는 항목이 없습니다.")
+
+    return playlist.PlaylistBuild(
+        title, entries,
+        lambda item_ctx, item_url: download_content(item_url, download_type, quality, container, ctx=item_ctx,
+                                                    connections=connections),
+        fan_out, jobs.get_job_manager(),
+    ).start()
+
+
+def download_batch(batch_urls, download_type, quality, container, fan_out, connections=None):
+    """
+    사용자가 붙여 넣은 URL 목록을 재생목록과 같은 방식으로 병렬 처리하는 PlaylistBuild 를 반환합니다.
+    항목마다 추출/다운로드/후처리 단계의 슬롯을 따로 잡으므로 단계들이 항목 사이에서 겹쳐 진행되고,
+    ZIP 끝에는 항목별 상태(status.csv)가 들어갑니다.
+    """
+    title = time.strftime('batch-%Y%m%d-%H%M%S')
+    return playlist.PlaylistBuild(
+        title, [(index, item_url, item_url) for index, item_url in enumerate(batch_urls, start=1)],
+        lambda item_ctx, item_url: download_content(item_url, download_type, quality, container, ctx=item_ctx,
+                                                    connections=connections),
+        fan_out, jobs.get_job_manager(), report=True,
+    ).start()
+
+
+def download_to(url, download_type, quality, container, download_path, ctx=None, connections=None, scratch=None,
+                clip=None):
+    """
+    yt-dlp 로 download_path 에 영상 하나를 다운로드하고 (파일 경로, 파일명, MIME 타입) 을 반환합니다.
+    clip 이 있으면 FFmpeg 가 그 구간에 필요한 부분만 받고, 파일명에 구간을 붙입니다.
+    scratch(storage.Scratch) 를 주면 다운로드 중에 작업별 임시 공간 한도를 확인하고,
+    이어받기용 디렉토리면 이전 시도가 남긴 .part 와 끝난 단계를 이어받습니다.
+    """
+    from yt_dlp.utils import DownloadError
+
+    # 단계별 시간(추출/다운로드/후처리)과 바이트 수를 기록해 /metrics 로 내보냄
+    timings = ctx.timings if ctx else metrics.JobTimings()
+    ydl_opts = {
+        'outtmpl': os.path.join(download_path, f'%(title)s ({clip_label(clip)}).%(ext)s' if clip else '%(title)s.%(ext)s'),
+        'quiet': True, 'noprogress': True,
+        'noplaylist': True,
+        # 재시도 사이, 다시 요청할 때 받다 만 .part 파일을 이어받음
+        'continuedl': True, 'nopart': False,
+        # 큰 파일은 여러 연결로 구간을 나눠 받고, DASH/HLS 조각도 같은 수만큼 병렬로 받음
+        'concurrent_fragment_downloads': connections or config.DOWNLOAD_CONNECTIONS,
+        'logger': metrics.YdlLogger(),
+        'progress_hooks': [timings.progress_hook],
+        'postprocessor_hooks': [timings.postprocessor_hook],
+        # 연결 끊김 같은 짧은 오류는 yt-dlp 가 재시도하고, 그래도 실패하면 retry.RetryPolicy 가 실패 종류를 보고 처리
+        **retry.ytdlp_retry_options(),
+    }
+    if ctx:
+        ydl_opts['progress_hooks'].append(ctx.ydl_progress_hook)
+        ydl_opts['postprocessor_hooks'].append(ctx.ydl_postprocessor_hook)
+    if scratch:
+        ydl_opts['progress_hooks'].append(scratch.progress_hook)
+        ydl_opts['postprocessor_hooks'].append(scratch.postprocessor_hook)
+    manifest = scratch.manifest if scratch else None
+    # 파일별로 받은 바이트 수. 실패한 시도라도 이 값이 늘었으면 RetryPolicy 가 재시도 예산을 다시 셈
+    received = {}
+
+    def track_received(d):
+        if d.get('status') in ('downloading', 'finished') and d.get('filename'):
+            received[d['filename']] = max(received.get(d['filename'], 0), d.get('downloaded_bytes') or 0)
+
+    ydl_opts['progress_hooks'].append(track_received)
+
+    def attempt(profile):
+        # 이전 시도에서 후처리까지 끝난 결과가 있으면 그대로 사용
+        if manifest and manifest.result():
+            return manifest.result()
+        user_agent, cookie_filepath = profiles[profile]
+        attempt_opts = dict(ydl_opts, cookiefile=cookie_filepath, http_headers={'User-Agent': user_agent})
+        with ydl_pool.get_ydl_pool().acquire(attempt_opts) as ydl:
+            # 캐시된 메타데이터가 있으면 추출을 건너뛰고 --load-info-json 과 같은 방식으로 바로 다운로드
+            if ctx:
+                ctx.channel.publish(progress.EXTRACT, force=True)
+            with timings.stage('extract'):
+                info = info_cache.get_info_cache().get_or_extract(
+                    url, lambda normalized_url: ydl.extract_info(normalized_url, download=False)
+                )
+            # 원본 포맷을 보고 재인코딩이 필요한지 판단 (noop / remux / transcode)
+            plan = format_planner.plan_formats(ydl, info, download_type, quality, container, clip)
+            plan.apply_to(ydl)
+            # 이전 시도와 포맷/후처리 계획이 다르면 남은 파일을 버리고 처음부터 받음
+            if manifest:
+                manifest.check_plan(plan.fingerprint())
+            info_dict = ydl.process_ie_result(ydl.sanitize_info(info, remove_private_keys=True), download=True)
+
+            if info_dict.get('requested_downloads'):
+                final_filepath = info_dict['requested_downloads'][0]['filepath']
+            else:
+                final_filepath = ydl.prepare_filename(info_dict)
+
+            if not os.path.exists(final_filepath):
+                found = False
+                for f in os.listdir(download_path):
+                    if f.startswith(info_dict.get('title', ' ')):
+                        final_filepath = os.path.join(download_path, f)
+                        found = True
+                        break
+                if not found: raise FileNotFoundError("다운로드된 파일을 찾을 수 없습니다.")
+
+            display_name = os.path.basename(final_filepath)
+            mime_type = _MIME_TYPES.get(os.path.splitext(display_name)[1].lower().strip('.'), 'application/octet-stream')
+            if manifest:
+                manifest.set_result(final_filepath, display_name, mime_type)
+            return final_filepath, display_name, mime_type
+
+    retries = []
+
+    def on_retry(kind, delay, error):
+        # 포맷 URL 이 만료되었거나 막혔을 수 있으므로 다음 시도에서는 메타데이터를 다시 추출
+        info_cache.get_info_cache().invalidate(url)
+        if ctx:
+            ctx.channel.publish(progress.RETRY, force=True, kind=kind, delay=delay, attempt=len(retries) + 1)
+        retries.append(kind)
+
+    def wait(delay):
+        # 기다리는 동안에는 작업 슬롯을 다른 작업에 양보
+        if ctx:
+            with ctx.paused():
+                time.sleep(delay)
+        else:
+            time.sleep(delay)
+
+    profiles = download_profiles()
+    try:
+        return retry.RetryPolicy(sleep=wait).run(attempt, profiles, on_retry=on_retry,
+                                                        progress=lambda: sum(received.values()))
+    except storage.StorageFull:
+        raise
+    except DownloadError as e:
+        # 재시도 여부를 정한 분류와 같은 기준으로 안내 문구를 고름
+        kind = retry.classify(e)
+        if kind == retry.PERMANENT:
+            raise ValueError(f"영상을 받을 수 없습니다. 삭제, 비공개, 국가 제한 등의 원인일 수 있습니다. ({e})") from e
+        if kind == retry.THROTTLED:
+            raise ValueError("유튜브가 요청을 제한하거나 차단했습니다 (오류 429/403). "
+                             "쿠키 정보가 유효한지 확인하고 잠시 후 다시 시도해주세요.") from e
+        raise ValueError(f"다운로드 중 오류가 발생했습니다: {e}") from e
+    except Exception as e:
+        raise RuntimeError(f"알 수 없는 오류가 발생했습니다: {e}") from e
+
+
+# --------------------------------------------------------------------------
+# 작업 등록
+# --------------------------------------------------------------------------
+def download_job(ctx, url, download_type, quality, container, is_playlist, fan_out, connections, clip=None):
+    """
+    백그라운드 작업 관리자에서 실행되는 다운로드 작업.
+    재생목록이면 항목 다운로드를 시작만 하고 PlaylistBuild 를 바로 반환합니다. (항목은 각각 별도 작업으로 실행)
+    is_playlist 가 None 이면 재생목록 URL 이고 항목이 둘 이상일 때만 재생목록으로 처리합니다.
+    clip 은 영상 하나를 받을 때만 사용합니다. (submit 이 재생목록과 함께 주지 않도록 확인)
+    """
+    if is_playlist is None and urls.is_playlist_url(url):
+        build = download_playlist(url, download_type, quality, container, fan_out, connections, require_multiple=True)
+        if build is not None:
+            return build
+    elif is_playlist:
+        return download_playlist(url, download_type, quality, container, fan_out, connections)
+    return download_content(url, download_type, quality, container, ctx=ctx, connections=connections, clip=clip)
+
+
+def audio_bundle_job(ctx, url, outputs, connections, clip=None):
+    """백그라운드 작업 관리자에서 실행되는 여러 형식 오디오 작업. 결과는 ZIP 파일 하나입니다."""
+    return download_audio_bundle(url, outputs, ctx=ctx, connections=connections, clip=clip)
+
+
+def batch_job(ctx, batch_urls, download_type, quality, container, fan_out, connections):
+    """백그라운드 작업 관리자에서 실행되는 배치 작업. 항목 다운로드를 시작만 하고 PlaylistBuild 를 반환합니다."""
+    return download_batch(batch_urls, download_type, quality, container, fan_out, connections)
+
+
+def submit(url, download_type, quality=None, container=None, is_playlist=False, fan_out=None, connections=None,
+           clip=None):
+    """
+    다운로드 작업을 등록하고 작업 ID 를 반환합니다. is_playlist=None 이면 URL 을 보고 정합니다.
+    같은 영상/옵션의 작업이 이미 실행 중이면 새로 받지 않고 그 작업에 합류합니다. (동시 수, 연결 수는 결과에 영향 없음)
+    clip(normalize_clip 의 결과) 을 주면 영상 하나의 그 구간만 받습니다. 재생목록과 함께 쓰면 ValueError.
+    """
+    download_type, quality, container = normalize_options(download_type, quality, container)
+    url = url.strip()
+    if clip:
+        if is_playlist:
+            raise ValueError("구간 다운로드는 영상 하나에만 사용할 수 있습니다.")
+        is_playlist = False
+    by_url = is_playlist or (is_playlist is None and urls.is_playlist_url(url))
+    key = ('download', url if by_url else urls.cache_id(url), is_playlist, download_type, quality, container)
+    label = f"{url} ({download_type} / {quality} / {container})"
+    if clip:
+        key += (tuple(clip),)
+        label = f"{url} ({download_type} / {quality} / {container} / {clip_label(clip)})"
+    return jobs.get_job_manager().submit(
+        download_job, url, download_type, quality, container, is_playlist, fan_out or config.PLAYLIST_FAN_OUT,
+        connections, clip, label=label, key=key,
+    )
+
+
+def submit_audio_bundle(url, outputs, connections=None, clip=None):
+    """
+    오디오 원본을 한 번만 받아 outputs('mp3:320', 'flac', (확장자, 음질) ...) 의 모든 형식을 만드는 작업을 등록하고
+    작업 ID 를 반환합니다. 형식이 하나뿐이면 ZIP 으로 묶지 않고 submit 과 같은 작업이 됩니다.
+    """
+    outputs = normalize_audio_outputs(outputs)
+    if len(outputs) == 1:
+        container, quality = outputs[0]
+        return submit(url, AUDIO, quality, container, False, connections=connections, clip=clip)
+    url = url.strip()
+    formats = ', '.join(f'{c} {q}' if c not in transcode.LOSSLESS else c for c, q in outputs)
+    key = ('audio_bundle', urls.cache_id(url), tuple(outputs))
+    label = f"{url} ({AUDIO} / {formats})"
+    if clip:
+        key += (tuple(clip),)
+        label = f"{url} ({AUDIO} / {formats} / {clip_label(clip)})"
+    return jobs.get_job_manager().submit(audio_bundle_job, url, outputs, connections, clip, label=label, key=key)
+
+
+def submit_batch(batch_urls, download_type, quality=None, container=None, fan_out=None, connections=None):
+    """여러 URL 을 하나의 배치 작업(결과는 ZIP)으로 등록하고 작업 ID 를 반환합니다."""
+    download_type, quality, container = normalize_options(download_type, quality, container)
+    if not batch_urls:
+        raise ValueError("다운로드할 URL 목록이 비어 있습니다.")
+    if len(batch_urls) > config.BATCH_MAX_URLS:
+        raise ValueError(f"한 번에 받을 수 있는 URL 은 최대 {config.BATCH_MAX_URLS}개입니다. (입력: {len(batch_urls)}개)")
+    key = ('batch', tuple(urls.cache_id(item_url) for item_url in batch_urls), download_type, quality, container)
+    return jobs.get_job_manager().submit(
+        batch_job, list(batch_urls), download_type, quality, container, fan_out or config.BATCH_FAN_OUT, connections,
+        label=f"URL {len(batch_urls)}개 ({download_type} / {quality} / {container})", key=key,
+    )
+
+
+def job_summary(job):
+    """API/명령줄에서 보여줄 작업 상태 dict. 진행 중이면 yt-dlp 훅이 보낸 마지막 진행 상황을 함께 담습니다."""
+    summary = {
+        'id': job.id, 'label': job.label, 'status': job.status, 'stage': job.stage,
+        'progress': round(job.progress, 4), 'message': job.message, 'error': job.error,
+        'followers': job.followers, 'created_at': job.created_at, 'started_at': job.started_at,
+        'finished_at': job.finished_at, 'timings': dict(job.timings.seconds),
+    }
+    if not job.finished:
+        state = job.channel.drain()
+        if state:
+            summary['progress'] = round(progress.fraction(state) or job.progress, 4)
+            summary['message'] = progress.describe(state)
+    elif job.status == jobs.DONE and isinstance(job.result, playlist.PlaylistBuild):
+        build = job.result
+        summary.update(kind='zip', filename=build.zip_name, total=build.total, finished=build.finished_count,
+                       failed=build.failed_count, progress=round(build.progress, 4),
+                       items=[{'index': item.index, 'url': item.url, 'status': item.status, 'error': item.error}
+                              for item in build.items])
+    elif job.status == jobs.DONE:
+        file_path, display_name, mime_type = job.result
+        summary.update(kind='file', filename=display_name, mime_type=mime_type,
+                       size=os.path.getsize(file_path) if os.path.exists(file_path) else None)
+    return summary
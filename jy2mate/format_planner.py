@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+요청한 품질/확장자를 만족하는 가장 값싼 처리 방식을 고르는 포맷 플래너.
+
+받을 포맷은 yt-dlp 의 정렬과 선택기로 고르고(DRM, 더빙/DRC 음성, https 가 있는 m3u8 는 제외),
+고른 포맷의 코덱과 확장자를 보고 다음 중 하나를 선택합니다.
+
+- noop      : 원본 파일이 이미 원하는 형식이라 후처리 없이 그대로 사용
+- remux     : 스트림은 그대로 복사하고 컨테이너만 바꾸거나 영상/음성을 합침 (-c copy)
+- transcode : 코덱이 맞지 않아 FFmpeg 로 다시 인코딩
+
+m4a 요청에 AAC 원본이 있거나, mkv 요청처럼 어떤 코덱이든 담을 수 있는 경우에는
+재인코딩 없이 끝나므로 작업당 CPU 시간이 크게 줄어듭니다.
+
+구간(clip)을 요청하면 yt-dlp 의 download_ranges 로 FFmpeg 가 원본을 해당 시각부터 읽어 필요한 부분만 받습니다.
+영상은 키프레임 위치와 상관없이 정확히 자르도록 구간만 다시 인코딩하고(force_keyframes_at_cuts),
+그 인코딩이 곧 요청한 컨테이너로의 변환이므로 별도의 변환 후처리는 하지 않습니다.
+오디오는 프레임 단위로 잘리므로 스트림을 복사해 받고, 기존 계획대로 구간만 변환합니다.
+"""
+
+import json
+import logging
+
+from . import metrics, ydl_pool
+
+logger = logging.getLogger(__name__)
+
+NOOP = 'noop'
+REMUX = 'remux'
+TRANSCODE = 'transcode'
+
+# 오디오 확장자별 목표 코덱
+_AUDIO_TARGET_CODEC = {'m4a': 'aac', 'mp3': 'mp3', 'opus': 'opus', 'flac': 'flac', 'wav': 'pcm'}
+# 컨테이너별로 스트림 복사가 가능한 코덱 (mkv 는 제한 없음)
+_CONTAINER_CODECS = {
+    'mp4': ({'h264', 'hevc', 'av1', 'vp9'}, {'aac', 'mp3', 'opus', 'ac3', 'eac3', 'flac'}),
+    'webm': ({'vp8', 'vp9', 'av1'}, {'opus', 'vorbis'}),
+}
+
+
+def normalize_codec(codec):
+    """yt-dlp 의 코덱 문자열(mp4a.40.2, avc1.64001F 등)을 단순한 이름으로 바꿉니다. 없으면 None."""
+    if not codec or codec == 'none':
+        return None
+    codec = codec.lower().split('.')[0]
+    return {
+        'mp4a': 'aac', 'avc1': 'h264', 'avc3': 'h264', 'hev1': 'hevc', 'hvc1': 'hevc',
+        'vp09': 'vp9', 'av01': 'av1', 'ec-3': 'eac3', 'ac-3': 'ac3',
+    }.get(codec, codec)
+
+
+class FormatPlan:
+    """선택한 처리 방식과 그에 맞는 yt-dlp 옵션."""
+
+    def __init__(self, strategy, format_spec, postprocessors=(), merge_output_format=None, reason='',
+                 clip=None, precise_cuts=False):
+        self.strategy = strategy
+        self.format_spec = format_spec
+        self.postprocessors = list(postprocessors)
+        self.merge_output_format = merge_output_format
+        self.reason = reason
+        # (시작 초, 끝 초 또는 None) 이면 그 구간만 받음
+        self.clip = clip
+        self.precise_cuts = precise_cuts
+
+    def apply_to(self, ydl):
+        """이미 만들어진 YoutubeDL 에 포맷 선택과 후처리기를 적용합니다."""
+        options = {'format': self.format_spec, 'postprocessors': self.postprocessors}
+        if self.merge_output_format:
+            options['merge_output_format'] = self.merge_output_format
+        if self.clip:
+            from yt_dlp.utils import download_range_func
+
+            start, end = self.clip
+            options['download_ranges'] = download_range_func(None, [(start, float('inf') if end is None else end)])
+            options['force_keyframes_at_cuts'] = self.precise_cuts
+        ydl_pool.apply_options(ydl, options)
+
+    def fingerprint(self):
+        """같은 파일을 만들어 내는 계획인지 비교하는 데 쓰는 문자열. (storage.Manifest.check_plan)"""
+        return json.dumps([self.format_spec, self.postprocessors, self.merge_output_format,
+                           self.clip, self.precise_cuts], sort_keys=True, default=str)
+
+    def __repr__(self):
+        return f'FormatPlan({self.strategy}, {self.format_spec!r}, {self.reason})'
+
+
+def matches_audio_target(codec, container):
+    """
+    오디오 코덱이 그 확장자의 목표 코덱인지 확인합니다. (스트림 복사 가능 여부)
+    wav 의 PCM 은 pcm_s16le, pcm_f32le 처럼 이름이 여러 가지라 앞부분만 비교합니다.
+    """
+    target = _AUDIO_TARGET_CODEC.get(container)
+    codec = normalize_codec(codec)
+    if not target or not codec:
+        return False
+    return codec.startswith(target) if target == 'pcm' else codec == target
+
+
+def _audio_formats(formats):
+    return [f for f in formats if normalize_codec(f.get('acodec')) and not normalize_codec(f.get('vcodec'))]
+
+
+def _kind(f):
+    return bool(normalize_codec(f.get('vcodec'))), bool(normalize_codec(f.get('acodec')))
+
+
+def _is_hls(f):
+    return 'm3u8' in (f.get('protocol') or '')
+
+
+def _wanted(f):
+    # 더빙/보조 음성(language_preference < 0) 과 음량을 압축한 DRC 음성은 원래 음성보다 뒤로
+    return (f.get('language_preference') or 0) >= 0 and not str(f.get('format_id')).endswith('-drc')
+
+
+def usable_formats(formats):
+    """
+    계획에 쓸 포맷만 남깁니다. yt-dlp 처럼 DRM 포맷을 빼고, 더빙/DRC 음성과
+    같은 종류·같은 화질 이상의 https 포맷이 있는 m3u8 포맷도 뺍니다.
+    빼고 나서 영상 전용/음성 전용/합쳐진 포맷 중 한 종류가 통째로 사라지면 그 종류는 그대로 둡니다.
+    """
+    formats = [f for f in formats if not f.get('has_drm') or f['has_drm'] == 'maybe']
+
+    def preferred(f):
+        if not _wanted(f):
+            return False
+        return not _is_hls(f) or not any(
+            _kind(other) == _kind(f) and _wanted(other) and not _is_hls(other)
+            and (other.get('height') or 0) >= (f.get('height') or 0) for other in formats)
+
+    kept = {id(f) for f in formats if preferred(f)}
+    kinds = {_kind(f) for f in formats if id(f) in kept}
+    return [f for f in formats if id(f) in kept or _kind(f) not in kinds]
+
+
+def select_formats(ydl, formats, spec):
+    """
+    yt-dlp 의 포맷 선택기로 formats 에서 spec 을 고릅니다. formats 는 yt-dlp 가 정렬한 순서(나쁜 것 → 좋은 것)여야 하며,
+    실제로 받을 포맷 목록(병합이면 [영상, 음성])을 반환합니다. 맞는 포맷이 없으면 빈 목록.
+    """
+    selected = next(iter(ydl.build_format_selector(spec)({
+        'formats': formats,
+        'has_merged_format': any('none' not in (f.get('acodec'), f.get('vcodec')) for f in formats),
+        'incomplete_formats': (all(f.get('vcodec') == 'none' for f in formats)
+                               or all(f.get('acodec') == 'none' for f in formats)),
+    })), None)
+    if selected is None:
+        return []
+    return selected.get('requested_formats') or [selected]
+
+
+def plan_audio(formats, container, quality, select):
+    """
+    오디오 다운로드의 처리 방식을 정합니다. select(formats, spec) 은 yt-dlp 선택기로 고른 포맷 목록을 돌려줍니다.
+    container 가 None 이면 변환하지 않은 가장 좋은 원본을 받습니다. (transcode 로 여러 형식을 만들 원본)
+    """
+    audio = _audio_formats(formats)
+    if container is None:
+        best = select(audio, 'bestaudio')
+        if not best:
+            return FormatPlan(NOOP, 'bestaudio/best', reason='여러 형식 변환용 원본 (오디오 전용 포맷 정보 없음)')
+        return FormatPlan(NOOP, best[0]['format_id'], reason=f"여러 형식 변환용 원본 ({best[0]['format_id']})")
+    extract = {'key': 'FFmpegExtractAudio', 'preferredcodec': container, 'preferredquality': quality}
+    target = _AUDIO_TARGET_CODEC.get(container)
+    best = select(audio, 'bestaudio')
+    if not best:
+        return FormatPlan(TRANSCODE, 'bestaudio/best', [extract], reason='오디오 전용 포맷 정보 없음')
+
+    matching = select([f for f in audio if matches_audio_target(f.get('acodec'), container)], 'bestaudio')
+    if matching:
+        best = matching[0]
+        if best.get('ext') == container:
+            return FormatPlan(NOOP, best['format_id'], reason=f"원본이 이미 {target}/{container} ({best['format_id']})")
+        # 코덱은 같고 컨테이너만 다름 → FFmpegExtractAudio 가 스트림 복사로 처리
+        return FormatPlan(REMUX, best['format_id'], [extract], reason=f"{target} 스트림 복사 ({best['format_id']})")
+
+    best = best[0]
+    return FormatPlan(TRANSCODE, best['format_id'], [extract],
+                      reason=f"{normalize_codec(best.get('acodec'))} → {target} 변환 필요")
+
+
+def plan_video(formats, container, quality, select):
+    """
+    영상 다운로드의 처리 방식을 정합니다. 영상/음성은 yt-dlp 선택기로 고르며,
+    mp4 는 기존 앱처럼 mp4 영상 + m4a 음성을 먼저 찾아 다른 코덱을 mp4 에 옮겨 담지 않게 합니다.
+    """
+    max_height = None if quality == 'best' else int(quality.replace('p', ''))
+    quality_filter = f'[height<=?{max_height}]' if max_height else ''
+    video_codecs, audio_codecs = _CONTAINER_CODECS.get(container, (None, None))
+
+    def fits(f, kind):
+        codec = normalize_codec(f.get(kind))
+        allowed = video_codecs if kind == 'vcodec' else audio_codecs
+        return allowed is None or codec in allowed
+
+    preferred = {'mp4': f'bestvideo{quality_filter}[ext=mp4]+bestaudio[ext=m4a]/',
+                 'webm': f'bestvideo{quality_filter}[ext=webm]+bestaudio[ext=webm]/'}.get(container, '')
+    selected = select(formats, f'{preferred}bestvideo{quality_filter}+bestaudio/best{quality_filter}/best')
+    if len(selected) != 2:
+        # 분리된 스트림이 없는 사이트 (포맷이 하나뿐인 일반 URL 등)
+        if not selected:
+            return FormatPlan(REMUX, f'best{quality_filter}/best',
+                              [{'key': 'FFmpegVideoRemuxer', 'preferedformat': container}],
+                              reason='포맷 정보 없음, 단일 파일 컨테이너 변경')
+        single = selected[0]
+        if single.get('ext') == container:
+            return FormatPlan(NOOP, single['format_id'], reason=f"단일 파일이 이미 원하는 컨테이너 ({single['format_id']})")
+        return FormatPlan(REMUX, single['format_id'],
+                          [{'key': 'FFmpegVideoRemuxer', 'preferedformat': container}],
+                          reason=f"단일 파일 컨테이너 변경 ({single['format_id']})")
+
+    video, audio = selected
+    top_height = video.get('height') or 0
+    progressive = select([f for f in formats if f.get('ext') == container and all(_kind(f))
+                          and (f.get('height') or 0) >= top_height
+                          and (max_height is None or (f.get('height') or 0) <= max_height)], 'best')
+    if progressive:
+        best = progressive[0]
+        return FormatPlan(NOOP, best['format_id'], reason=f"영상+음성이 합쳐진 {container} 원본 ({best['format_id']})")
+
+    format_spec = f"{video['format_id']}+{audio['format_id']}"
+    if fits(video, 'vcodec') and fits(audio, 'acodec'):
+        return FormatPlan(REMUX, format_spec, merge_output_format=container,
+                          reason=f"{normalize_codec(video.get('vcodec'))}+{normalize_codec(audio.get('acodec'))} 스트림 복사로 {container} 병합")
+    # 컨테이너에 담을 수 없는 코덱 → mkv 로 합친 뒤 변환
+    return FormatPlan(TRANSCODE, format_spec, [{'key': 'FFmpegVideoConvertor', 'preferedformat': container}],
+                      merge_output_format='mkv',
+                      reason=f"{normalize_codec(video.get('vcodec'))}+{normalize_codec(audio.get('acodec'))} 는 {container} 에 담을 수 없어 변환")
+
+
+def plan_clip(plan, download_type, container, clip):
+    """전체 파일용 계획을 clip 구간만 받는 계획으로 바꿉니다."""
+    plan.clip = clip
+    if download_type == '오디오':
+        plan.reason += ' / 구간만 받음'
+        return plan
+    # FFmpeg 가 구간을 받으면서 container 의 기본 코덱으로 인코딩하므로, 합치기 전 mkv 와 변환 후처리는 필요 없음
+    plan.precise_cuts = True
+    plan.strategy = TRANSCODE
+    plan.postprocessors = [pp for pp in plan.postprocessors if pp['key'] != 'FFmpegVideoConvertor']
+    if plan.merge_output_format:
+        plan.merge_output_format = container
+    plan.reason += ' / 구간만 받아 다시 인코딩'
+    return plan
+
+
+def plan_formats(ydl, info, download_type, quality, container, clip=None):
+    """
+    info dict 를 보고 처리 방식을 정한 뒤 로그로 남기고 FormatPlan 을 반환합니다.
+    포맷의 우열은 ydl(YoutubeDL) 의 정렬과 선택기를 그대로 따르고, 그 결과를 보고 후처리만 정합니다.
+    clip 이 (시작 초, 끝 초 또는 None) 이면 그 구간만 받는 계획을 만듭니다.
+    """
+    sorted_info = {'formats': list(info.get('formats') or [info]),
+                   '_format_sort_fields': info.get('_format_sort_fields')}
+    ydl.sort_formats(sorted_info)
+    formats = usable_formats(sorted_info['formats'])
+
+    def select(candidates, spec):
+        return select_formats(ydl, candidates, spec) if candidates else []
+
+    if download_type == '오디오':
+        plan = plan_audio(formats, container, quality, select)
+    else:
+        plan = plan_video(formats, container, quality, select)
+    if clip:
+        plan = plan_clip(plan, download_type, container, clip)
+    metrics.FORMAT_PLANS.inc(strategy=plan.strategy)
+    logger.info('포맷 계획 %s: %s [%s] (%s)', info.get('id'), plan.strategy, plan.format_spec, plan.reason)
+    return plan
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+yt-dlp 메타데이터(info dict)를 일정 시간 보관하는 캐시.
+
+"상세 정보 확인" 과 다운로드가 같은 영상의 정보를 두 번 추출하지 않도록,
+정규화한 영상 ID 를 키로 추출 결과를 TTL 동안 재사용합니다.
+다운로드 쪽에서는 캐시된 info dict 를 YoutubeDL.process_ie_result 에 넘겨
+--load-info-json 과 같은 방식으로 추출 단계를 건너뜁니다.
+
+포맷 URL 에는 만료 시간이 있으므로 TTL 은 그보다 충분히 짧게 유지해야 합니다.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from . import config, urls
+
+
+class InfoCache:
+    """TTL 과 최대 개수 제한이 있는 메타데이터 캐시. 적중률과 절약한 시간을 함께 집계합니다."""
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    def get(self, url):
+        """캐시에 유효한 정보가 있으면 복사본을, 없으면 None 을 반환합니다."""
+        key = urls.cache_id(url)
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            info, stored_at, extract_seconds = item
+            if time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += extract_seconds
+        return copy.deepcopy(info)
+
+    def put(self, url, info, extract_seconds=0.0):
+        key = urls.cache_id(url)
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(info), time.time(), extract_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url):
+        """저장된 정보를 지웁니다. (포맷 URL 이 만료되었거나 다른 프로필로 다시 추출해야 할 때)"""
+        with self._lock:
+            self._entries.pop(urls.cache_id(url), None)
+
+    def get_or_extract(self, url, extract):
+        """
+        캐시에 있으면 그대로 반환하고, 없으면 extract(정규화된 URL) 로 추출해 저장합니다.
+        재생목록 등 단일 영상이 아닌 결과는 저장하지 않습니다.
+        """
+        info = self.get(url)
+        if info is not None:
+            return info
+        with self._lock:
+            self.misses += 1
+        started = time.perf_counter()
+        info = extract(urls.normalize_url(url))
+        if info and info.get('_type', 'video') == 'video':
+            self.put(url, info, time.perf_counter() - started)
+        return info
+
+    def stats(self):
+        """적중/실패 횟수, 적중률, 절약한 추출 시간(초)을 반환합니다."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+                'saved_seconds': self.saved_seconds,
+                'entries': len(self._entries),
+            }
+
+
+_info_cache = None
+_info_cache_lock = threading.Lock()
+
+
+def get_info_cache():
+    """프로세스 전체에서 공유하는 메타데이터 캐시를 반환합니다."""
+    global _info_cache
+    with _info_cache_lock:
+        if _info_cache is None:
+            _info_cache = InfoCache(config.INFO_CACHE_TTL, config.INFO_CACHE_MAX_ENTRIES)
+        return _info_cache
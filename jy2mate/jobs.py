@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+다운로드 작업을 Streamlit 스크립트 실행과 분리해 백그라운드에서 처리하는 작업 관리자.
+
+작업은 submit 으로 등록하면 작업 ID 를 돌려받고, 스레드 풀에서 실행됩니다.
+메타데이터 추출, 네트워크 작업(다운로드), CPU 작업(FFmpeg 후처리)은 각각 동시 실행 개수가 제한되며,
+작업 하나는 한 번에 한 단계의 슬롯만 차지합니다. 따라서 여러 항목을 한꺼번에 등록하면
+앞 항목의 후처리, 다음 항목의 다운로드, 그다음 항목의 추출이 겹쳐서 진행됩니다.
+작업 상태는 프로세스 전체에서 공유되므로 화면을 새로 고치거나 다시 실행해도 진행 중인 작업과 결과가 유지됩니다.
+
+submit 에 key 를 주면 같은 key 의 작업이 실행 중일 때 새 작업을 만들지 않고 그 작업 ID 를
+돌려줍니다(single-flight). 나중에 온 요청은 같은 진행 상황, 결과, 오류를 그대로 공유하므로
+다운로드와 FFmpeg 작업은 요청 수가 아니라 서로 다른 요청 수만큼만 실행됩니다.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from . import config, metrics, progress
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+EXTRACT = 'extract'
+NETWORK = 'network'
+CPU = 'cpu'
+
+
+class Job:
+    """작업 하나의 상태."""
+
+    def __init__(self, job_id, label, key=None):
+        self.id = job_id
+        self.label = label
+        self.key = key
+        # 실행 중에 같은 key 로 합류한 요청 수
+        self.followers = 0
+        self.status = QUEUED
+        self.stage = None
+        self.progress = 0.0
+        self.message = '대기 중'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.timings = metrics.JobTimings()
+        # yt-dlp 훅이 넣고 화면이 비우는 진행 상황 큐
+        self.channel = progress.ProgressChannel()
+        # 작업 상태를 지울 때 부를 함수 (결과 파일의 캐시 고정 해제 등)
+        self.releases = []
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+
+class JobContext:
+    """작업 함수에 전달되어 단계 전환과 진행률 보고를 담당합니다."""
+
+    def __init__(self, manager, job):
+        self._manager = manager
+        self.job = job
+        self.timings = job.timings
+        self.channel = job.channel
+        self._slot = None
+        # yt-dlp 가 조각을 병렬로 받으면 여러 스레드가 동시에 훅을 부르므로 슬롯 전환을 잠금으로 보호
+        self._slot_lock = threading.RLock()
+
+    def enter_stage(self, stage):
+        """
+        작업 단계를 바꿉니다. 지금 잡고 있는 슬롯을 반납하고 새 단계의 슬롯을 얻을 때까지 기다립니다.
+        이미 같은 단계라면 아무 일도 하지 않습니다.
+        """
+        with self._slot_lock:
+            if self._slot == stage:
+                return
+            self._release()
+            self._manager._slots[stage].acquire()
+            self._slot = stage
+            self.job.stage = stage
+
+    @contextmanager
+    def paused(self):
+        """재시도 대기처럼 아무 일도 하지 않는 동안 슬롯을 반납했다가, 끝나면 같은 단계의 슬롯을 다시 잡습니다."""
+        with self._slot_lock:
+            stage = self._slot
+            self._release()
+        try:
+            yield
+        finally:
+            if stage is not None:
+                self.enter_stage(stage)
+
+    def report(self, progress=None, message=None):
+        if progress is not None:
+            self.job.progress = max(0.0, min(progress, 1.0))
+        if message is not None:
+            self.job.message = message
+
+    def on_release(self, fn):
+        """보관 기간이 지나 작업 상태와 결과를 지울 때 부를 함수를 등록합니다."""
+        self.job.releases.append(fn)
+
+    def ydl_progress_hook(self, d):
+        """
+        yt-dlp progress_hooks 용. 다운로드 중에는 네트워크 단계로 전환하고,
+        받은 바이트/속도/남은 시간은 진행 상황 채널로 보냅니다.
+        """
+        if d.get('status') == 'downloading':
+            self.enter_stage(NETWORK)
+        self.channel.ydl_progress_hook(d)
+
+    def ydl_postprocessor_hook(self, d):
+        """yt-dlp postprocessor_hooks 용. FFmpeg 후처리 동안에는 CPU 단계 슬롯을 사용합니다."""
+        if d.get('status') == 'started':
+            self.enter_stage(CPU)
+        self.channel.ydl_postprocessor_hook(d)
+
+    def _release(self):
+        with self._slot_lock:
+            if self._slot is not None:
+                self._manager._slots[self._slot].release()
+                self._slot = None
+
+
+class JobManager:
+    """제한된 크기의 워커 풀로 작업을 실행하고 상태를 보관합니다."""
+
+    def __init__(self, network_workers, cpu_workers, retention, extract_workers=None):
+        self.retention = retention
+        extract_workers = network_workers if extract_workers is None else extract_workers
+        self._slots = {
+            EXTRACT: threading.BoundedSemaphore(extract_workers),
+            NETWORK: threading.BoundedSemaphore(network_workers),
+            CPU: threading.BoundedSemaphore(cpu_workers),
+        }
+        # 작업은 한 번에 슬롯 하나만 잡으므로 한도의 합만큼 스레드가 있으면 충분합니다.
+        self._executor = ThreadPoolExecutor(max_workers=extract_workers + network_workers + cpu_workers,
+                                            thread_name_prefix='jy2mate-job')
+        self._jobs = {}
+        self._inflight = {}  # key -> 실행 중인 작업 ID
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, label='', key=None, **kwargs):
+        """
+        작업을 등록하고 작업 ID 를 반환합니다.
+        fn 은 첫 번째 인자로 JobContext 를 받으며, 반환값이 작업 결과(job.result)가 됩니다.
+        key 가 같은 작업이 아직 끝나지 않았으면 새로 실행하지 않고 그 작업의 ID 를 반환합니다.
+        """
+        with self._lock:
+            self._prune()
+            if key is not None:
+                running = self._jobs.get(self._inflight.get(key))
+                if running is not None and not running.finished:
+                    running.followers += 1
+                    metrics.SINGLE_FLIGHT.inc(role='follower')
+                    return running.id
+            job = Job(uuid.uuid4().hex, label, key)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._inflight[key] = job.id
+                metrics.SINGLE_FLIGHT.inc(role='leader')
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn, args, kwargs):
+        ctx = JobContext(self, job)
+        try:
+            # 처음에는 추출 단계로 시작하고, 다운로드가 시작되면 훅이 네트워크 단계로 바꿈
+            ctx.enter_stage(EXTRACT)
+            job.status = RUNNING
+            job.started_at = time.time()
+            job.message = '처리 중'
+            job.result = fn(ctx, *args, **kwargs)
+            job.progress = 1.0
+            job.message = '완료'
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.message = '실패'
+            job.status = FAILED
+        finally:
+            ctx._release()
+            job.stage = None
+            job.finished_at = time.time()
+            metrics.JOBS.inc(status=job.status)
+            metrics.JOB_SECONDS.observe(job.finished_at - job.created_at, status=job.status)
+            with self._lock:
+                if job.key is not None and self._inflight.get(job.key) == job.id:
+                    del self._inflight[job.key]
+
+    def _prune(self):
+        """끝난 지 오래된 작업의 상태를 지웁니다. (self._lock 안에서 호출)"""
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished and job.finished_at < cutoff]:
+            for release in self._jobs.pop(job_id).releases:
+                release()
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """프로세스 전체에서 공유하는 작업 관리자를 반환합니다."""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager(config.NETWORK_WORKERS, config.CPU_WORKERS, config.JOB_RETENTION,
+                                      config.EXTRACT_WORKERS)
+        return _job_manager
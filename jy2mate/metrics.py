@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+다운로드 파이프라인의 단계별 지연 시간과 바이트 수를 모으는 간단한 메트릭 모듈.
+
+외부 라이브러리 없이 카운터와 히스토그램만 제공하며, /metrics 에서 Prometheus 텍스트 형식으로,
+/metrics.json 에서 JSON 으로 내보냅니다. (HTTP API 는 토큰 인증 뒤에서, 전송 서버는 루프백 요청에만 응답)
+단계는 extract(메타데이터 추출), download(네트워크), postprocess(FFmpeg),
+serve(클라이언트 전송) 등이며, yt-dlp 버전을 함께 기록해 버전 교체 후의 변화를 비교할 수 있습니다.
+"""
+
+import bisect
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=()):
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, key)] + list(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {value}')
+        return lines
+
+    def to_json(self):
+        with self._lock:
+            return [{'labels': dict(zip(self.labelnames, key)), 'value': value}
+                    for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # key -> [버킷별 개수, 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, key, ['le="%s"' % bound])
+                    lines.append(f'{self.name}_bucket{labels} {cumulative}')
+                labels = _format_labels(self.labelnames, key, ['le="+Inf"'])
+                lines.append(f'{self.name}_bucket{labels} {count}')
+                lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {total}')
+                lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {count}')
+        return lines
+
+    def to_json(self):
+        with self._lock:
+            return [{
+                'labels': dict(zip(self.labelnames, key)),
+                'buckets': dict(zip(self.buckets, counts)),
+                'sum': total,
+                'count': count,
+            } for key, (counts, total, count) in sorted(self._series.items())]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help_text, labelnames=()):
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render_prometheus(self):
+        lines = ['# HELP jy2mate_build_info 실행 중인 yt-dlp 버전',
+                 '# TYPE jy2mate_build_info gauge',
+                 f'jy2mate_build_info{{ytdlp_version="{ytdlp_version()}"}} 1']
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def to_json(self):
+        return {
+            'ytdlp_version': ytdlp_version(),
+            'metrics': {metric.name: metric.to_json() for metric in self._metrics},
+        }
+
+
+@functools.lru_cache(maxsize=None)
+def ytdlp_version():
+    """설치된 yt-dlp 버전. yt_dlp 를 불러오지 않도록 패키지 메타데이터에서 읽습니다."""
+    from importlib import metadata
+
+    try:
+        return metadata.version('yt-dlp')
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram('jy2mate_stage_seconds', '파이프라인 단계별 소요 시간(초)', ['stage'])
+STAGE_BYTES = REGISTRY.counter('jy2mate_stage_bytes_total', '파이프라인 단계별 처리 바이트 수', ['stage'])
+JOB_SECONDS = REGISTRY.histogram('jy2mate_job_seconds', '작업 하나의 전체 소요 시간(초)', ['status'])
+JOBS = REGISTRY.counter('jy2mate_jobs_total', '끝난 작업 수', ['status'])
+YTDLP_RETRIES = REGISTRY.counter('jy2mate_ytdlp_retries_total', 'yt-dlp 가 보고한 재시도 횟수', ['kind'])
+RESULT_CACHE_LOOKUPS = REGISTRY.counter('jy2mate_result_cache_lookups_total', '결과 캐시 조회 결과', ['result'])
+FORMAT_PLANS = REGISTRY.counter('jy2mate_format_plans_total', '포맷 플래너가 고른 처리 방식', ['strategy'])
+RETRY_ATTEMPTS = REGISTRY.counter('jy2mate_retry_attempts_total', '실패 종류(permanent/throttled/transient)별 실패한 시도 수', ['kind', 'outcome'])
+RETRY_SECONDS = REGISTRY.counter('jy2mate_retry_wasted_seconds_total', '실패한 시도와 재시도 대기에 쓴 시간(초)', ['kind'])
+CREDENTIAL_EVENTS = REGISTRY.counter('jy2mate_credential_events_total', '쿠키 파일 생성(materialized), 파싱(parsed), Secrets 변경(changed) 횟수', ['event'])
+PROFILE_RESULTS = REGISTRY.counter('jy2mate_profile_results_total', 'User-Agent/쿠키 프로필별 시도 결과', ['profile', 'result'])
+SINGLE_FLIGHT = REGISTRY.counter('jy2mate_single_flight_total', '같은 요청을 새로 실행(leader)하거나 실행 중인 작업에 합류(follower)한 횟수', ['role'])
+SCRATCH_EVENTS = REGISTRY.counter('jy2mate_scratch_events_total', '작업별 임시 디렉토리 생성, 공간 대기/거절, 용량 초과, 남은 디렉토리 정리 횟수', ['event'])
+RESUMED_BYTES = REGISTRY.counter('jy2mate_resumed_bytes_total', '이전 시도가 남긴 임시 디렉토리에서 이어받아 다시 받지 않은 바이트 수')
+API_REQUESTS = REGISTRY.counter('jy2mate_api_requests_total', 'HTTP API 요청 수', ['method', 'status'])
+YDL_INSTANCES = REGISTRY.counter('jy2mate_ydl_instances_total', 'YoutubeDL 풀에서 새로 만들거나 재사용한 횟수', ['result'])
+
+
+class JobTimings:
+    """
+    작업 하나의 단계별 시간과 바이트 수를 기록합니다.
+    기록과 동시에 프로세스 전체 히스토그램에도 반영됩니다.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.bytes = {}
+        self._lock = threading.Lock()
+        self._pp_started = {}
+
+    def add(self, stage, seconds, nbytes=None):
+        with self._lock:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+            if nbytes:
+                self.bytes[stage] = self.bytes.get(stage, 0) + nbytes
+        STAGE_SECONDS.observe(seconds, stage=stage)
+        if nbytes:
+            STAGE_BYTES.inc(nbytes, stage=stage)
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def progress_hook(self, d):
+        """yt-dlp progress_hooks 용. 파일 하나의 다운로드가 끝나면 걸린 시간과 크기를 기록합니다."""
+        if d.get('status') == 'finished':
+            self.add('download', d.get('elapsed') or 0.0, d.get('total_bytes') or d.get('downloaded_bytes'))
+
+    def postprocessor_hook(self, d):
+        """yt-dlp postprocessor_hooks 용. 후처리기별 실행 시간을 기록합니다."""
+        name = d.get('postprocessor')
+        if d.get('status') == 'started':
+            self._pp_started[name] = time.perf_counter()
+        elif d.get('status') == 'finished' and name in self._pp_started:
+            self.add('postprocess', time.perf_counter() - self._pp_started.pop(name))
+
+    def summary(self):
+        """'추출 0.4초 · 다운로드 12.3초 (45.1MB)' 형태의 요약 문자열."""
+        names = {'extract': '추출', 'download': '다운로드', 'postprocess': '후처리', 'cache': '캐시'}
+        parts = []
+        with self._lock:
+            for stage, seconds in self.seconds.items():
+                part = f'{names.get(stage, stage)} {seconds:.1f}초'
+                if stage in self.bytes:
+                    part += f' ({self.bytes[stage] / 1024 / 1024:.1f}MB)'
+                parts.append(part)
+        return ' · '.join(parts)
+
+
+class YdlLogger:
+    """
+    yt-dlp 의 logger 옵션용 객체. 메시지는 logging 으로 넘기고,
+    'Retrying' 경고를 세어 조각/HTTP 재시도 횟수를 메트릭으로 남깁니다.
+    """
+
+    def debug(self, msg):
+        logger.debug(msg)
+
+    def info(self, msg):
+        logger.info(msg)
+
+    def warning(self, msg):
+        if 'Retrying' in msg:
+            YTDLP_RETRIES.inc(kind='fragment' if 'fragment' in msg.lower() else 'http')
+        logger.warning(msg)
+
+    def error(self, msg):
+        logger.error(msg)
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+재생목록을 항목별로 병렬 다운로드하면서 ZIP 스트림으로 바로 전송하는 파이프라인.
+
+- 항목들은 작업 관리자(jobs)의 개별 작업으로 실행되며, 재생목록 하나가 동시에 돌리는
+  항목 수는 fan_out 으로 제한됩니다. (끝나는 항목이 있을 때마다 다음 항목을 등록)
+- 완료된 항목은 끝난 순서대로 ZIP 에 추가됩니다. 미디어는 이미 압축되어 있으므로
+  무압축(ZIP_STORED)으로 저장하고, ZIP 파일을 디스크에 따로 만들지 않고 곧바로 전송합니다.
+- 클라이언트는 첫 항목이 끝나는 즉시 데이터를 받기 시작하며, 나머지 항목은 내려받는 동안 계속 추가됩니다.
+- 사용자가 붙여 넣은 URL 목록(배치)도 같은 방식으로 처리하며, 이때는 ZIP 끝에 항목별 상태(status.csv)를 넣습니다.
+"""
+
+import csv
+import io
+import os
+import threading
+import time
+import zipfile
+from collections import deque
+
+from . import config, result_cache
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def extract_playlist_entries(ydl, url):
+    """
+    재생목록의 항목 목록만 빠르게 가져옵니다. (ydl 은 extract_flat='in_playlist' 로 만들어야 함)
+    (재생목록 제목, [(순번, URL, 제목), ...]) 을 반환합니다.
+    """
+    info = ydl.extract_info(url, download=False)
+    entries = []
+    for index, entry in enumerate(info.get('entries') or [], start=1):
+        if not entry:
+            continue
+        entry_url = entry.get('url') or entry.get('webpage_url') or entry.get('id')
+        entries.append((entry.get('playlist_index') or index, entry_url, entry.get('title') or entry_url))
+    return info.get('title') or 'playlist', entries
+
+
+class _ZipSink:
+    """ZipFile 이 쓰는 바이트를 모아 두었다가 꺼내 가는 seek 불가능한 출력 객체."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+def iter_zip_stream(items, chunk_size=None):
+    """
+    (압축 파일 안 이름, 파일 경로) 목록을 받아 무압축 ZIP 의 바이트 청크를 차례로 돌려줍니다.
+    items 는 지연 이터레이터여도 되며, 항목이 주어지는 즉시 해당 파일의 데이터가 흘러나갑니다.
+    파일 경로 대신 bytes 를 주면 그 내용을 그대로 넣습니다. (상태 보고서처럼 작은 데이터)
+    """
+    chunk_size = chunk_size or config.STREAM_CHUNK_SIZE
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for arcname, path in items:
+            if isinstance(path, bytes):
+                zf.writestr(zipfile.ZipInfo(arcname, date_time=time.localtime()[:6]), path)
+                yield from sink.drain()
+                continue
+            # 결과 캐시의 파일이면 크기를 읽고 여는 사이에 캐시 정리가 지우지 않도록 고정 (열린 파일은 지워져도 읽힘)
+            with result_cache.get_result_cache().pinned(path):
+                zinfo = zipfile.ZipInfo(arcname, date_time=time.localtime(os.path.getmtime(path))[:6])
+                zinfo.compress_type = zipfile.ZIP_STORED
+                zinfo.file_size = os.path.getsize(path)
+                src = open(path, 'rb')
+            with src, zf.open(zinfo, 'w') as dst:
+                while True:
+                    chunk = src.read(chunk_size)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+    yield from sink.drain()
+
+
+class PlaylistItem:
+    """재생목록 항목 하나의 진행 상태."""
+
+    def __init__(self, index, url, title):
+        self.index = index
+        self.url = url
+        self.title = title
+        self.status = PENDING
+        self.job_id = None
+        self.result = None
+        self.error = None
+
+
+class PlaylistBuild:
+    """재생목록 항목들을 병렬로 내려받고, 완료 순서대로 ZIP 스트림을 만들어 주는 객체."""
+
+    def __init__(self, title, entries, download_item, fan_out, manager, report=False):
+        """
+        entries       : [(순번, URL, 제목), ...]
+        download_item : download_item(ctx, url) -> (파일 경로, 파일명, MIME 타입)
+        fan_out       : 이 재생목록에서 동시에 다운로드할 최대 항목 수
+        manager       : 항목 작업을 실행할 JobManager
+        report        : True 면 모든 항목이 끝난 뒤 ZIP 끝에 항목별 상태(status.csv)를 넣음
+        """
+        self.title = title
+        self.report = report
+        self.items = [PlaylistItem(*entry) for entry in entries]
+        self.zip_name = f"{''.join(c for c in title if c.isalnum() or c in ' -_').strip() or 'playlist'}.zip"
+        self._download_item = download_item
+        self._fan_out = max(1, fan_out)
+        self._manager = manager
+        self._pending = deque(self.items)
+        self._completed = []
+        self._cond = threading.Condition()
+
+    @property
+    def total(self):
+        return len(self.items)
+
+    @property
+    def finished_count(self):
+        with self._cond:
+            return len(self._completed)
+
+    @property
+    def failed_count(self):
+        with self._cond:
+            return sum(1 for item in self._completed if item.status == FAILED)
+
+    @property
+    def progress(self):
+        return self.finished_count / self.total if self.total else 1.0
+
+    def start(self):
+        for _ in range(self._fan_out):
+            self._submit_next()
+        return self
+
+    def _submit_next(self):
+        with self._cond:
+            if not self._pending:
+                return
+            item = self._pending.popleft()
+        item.job_id = self._manager.submit(self._run_item, item, label=f'[{item.index}] {item.title}')
+
+    def _run_item(self, ctx, item):
+        try:
+            item.result = self._download_item(ctx, item.url)
+            item.status = DONE
+        except Exception as e:
+            item.error = str(e)
+            item.status = FAILED
+            raise
+        finally:
+            with self._cond:
+                self._completed.append(item)
+                self._cond.notify_all()
+            self._submit_next()
+        return item.result
+
+    def iter_completed(self):
+        """끝난 항목을 끝난 순서대로 돌려줍니다. 아직 남은 항목이 있으면 끝날 때까지 기다립니다."""
+        position = 0
+        while position < self.total:
+            with self._cond:
+                while position >= len(self._completed):
+                    self._cond.wait()
+                item = self._completed[position]
+            position += 1
+            yield item
+
+    def iter_zip(self):
+        """성공한 항목만 담은 ZIP 스트림. 여러 번 호출해도 처음부터 다시 만들어집니다."""
+        width = len(str(self.total))
+
+        def entries():
+            for item in self.iter_completed():
+                if item.status == DONE:
+                    yield f"{item.index:0{width}d} - {item.result[1]}", item.result[0]
+            if self.report:
+                yield 'status.csv', self.status_csv().encode('utf-8-sig')
+        return iter_zip_stream(entries())
+
+    def status_rows(self):
+        """항목별 상태 목록. [{'순번', 'URL', '상태', '파일', '오류'}, ...]"""
+        names = {PENDING: '대기/진행 중', DONE: '완료', FAILED: '실패'}
+        return [
+            {'순번': item.index, 'URL': item.url, '상태': names[item.status],
+             '파일': item.result[1] if item.status == DONE else '', '오류': item.error or ''}
+            for item in self.items
+        ]
+
+    def status_csv(self):
+        """status_rows 를 CSV 문자열로 만듭니다."""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=['순번', 'URL', '상태', '파일', '오류'])
+        writer.writeheader()
+        writer.writerows(self.status_rows())
+        return buffer.getvalue()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+yt-dlp 훅에서 UI 로 진행 상황을 전달하는 채널.
+
+다운로드 스레드의 progress_hooks / postprocessor_hooks 가 이벤트를 스레드 안전한 큐에 넣고,
+화면(render_jobs)은 주기적으로 큐를 비워 마지막 상태(받은 바이트, 속도, 남은 시간, 단계)를 그립니다.
+yt-dlp 는 데이터 블록마다 훅을 부르므로, 단계가 바뀌거나 끝난 경우가 아니면
+min_interval 안에 들어온 이벤트는 큐에 넣지 않고 버려 다운로드 속도에 영향을 주지 않게 합니다.
+"""
+
+import queue
+import threading
+import time
+
+from . import config
+
+EXTRACT = 'extract'
+DOWNLOAD = 'download'
+POSTPROCESS = 'postprocess'
+RETRY = 'retry'
+
+_STAGE_NAMES = {EXTRACT: '정보 추출 중', DOWNLOAD: '다운로드 중', POSTPROCESS: '후처리 중', RETRY: '재시도 대기 중'}
+_RETRY_REASONS = {'throttled': '요청 제한', 'transient': '일시적 오류'}
+
+
+def format_bytes(num):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num < 1024 or unit == 'GB':
+            return f'{num:.0f}{unit}' if unit == 'B' else f'{num:.1f}{unit}'
+        num /= 1024
+
+
+def format_eta(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f'{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}'
+    return f'{seconds // 60}:{seconds % 60:02d}'
+
+
+class ProgressChannel:
+    """작업 하나의 진행 이벤트 큐와, 큐를 비우며 갱신되는 마지막 상태."""
+
+    def __init__(self, min_interval=None, maxsize=256):
+        self.min_interval = config.PROGRESS_INTERVAL if min_interval is None else min_interval
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._last_put = 0.0
+        self._last_stage = None
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def publish(self, stage, force=False, **fields):
+        """
+        이벤트를 큐에 넣습니다. 같은 단계의 이벤트가 min_interval 안에 다시 오면 버립니다.
+        yt-dlp 는 조각을 병렬로 받을 때 여러 스레드에서 훅을 부르므로, 확인과 넣기를 잠금 안에서 한 번에 합니다.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and stage == self._last_stage and now - self._last_put < self.min_interval:
+                return
+            self._last_put = now
+            self._last_stage = stage
+            event = dict(fields, stage=stage, time=now)
+            if self._queue.full():
+                # 화면이 한동안 비우지 않았으면 가장 오래된 이벤트를 버림
+                self._queue.get_nowait()
+            self._queue.put_nowait(event)
+
+    def drain(self):
+        """쌓인 이벤트를 모두 꺼내 마지막 상태에 반영하고, 상태의 복사본을 반환합니다."""
+        with self._lock:
+            while True:
+                try:
+                    event = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if event['stage'] != self._state.get('stage'):
+                    # 단계가 바뀌면 이전 단계의 바이트/속도 정보는 의미가 없음
+                    self._state = {}
+                self._state.update(event)
+            return dict(self._state)
+
+    def ydl_progress_hook(self, d):
+        """yt-dlp progress_hooks 용."""
+        status = d.get('status')
+        if status not in ('downloading', 'finished'):
+            return
+        self.publish(
+            DOWNLOAD, force=status == 'finished',
+            downloaded_bytes=d.get('downloaded_bytes') or 0,
+            total_bytes=d.get('total_bytes') or d.get('total_bytes_estimate'),
+            speed=d.get('speed'), eta=d.get('eta'),
+            filename=d.get('filename'),
+        )
+
+    def ydl_postprocessor_hook(self, d):
+        """yt-dlp postprocessor_hooks 용."""
+        if d.get('status') == 'started':
+            self.publish(POSTPROCESS, force=True, postprocessor=d.get('postprocessor'))
+
+
+def fraction(state):
+    """진행률(0~1). 전체 크기를 모르면 None."""
+    total = state.get('total_bytes')
+    if state.get('stage') == DOWNLOAD and total:
+        return min(state.get('downloaded_bytes', 0) / total, 1.0)
+    return None
+
+
+def describe(state):
+    """'다운로드 중 · 45.1MB / 120.3MB · 5.2MB/s · 남은 시간 0:14' 형태의 상태 문자열."""
+    stage = state.get('stage')
+    parts = [_STAGE_NAMES.get(stage, stage or '대기 중')]
+    if stage == DOWNLOAD:
+        done = format_bytes(state.get('downloaded_bytes', 0))
+        total = state.get('total_bytes')
+        parts.append(f'{done} / {format_bytes(total)}' if total else done)
+        if state.get('speed'):
+            parts.append(f"{format_bytes(state['speed'])}/s")
+        if state.get('eta') is not None:
+            parts.append(f"남은 시간 {format_eta(state['eta'])}")
+    elif stage == POSTPROCESS and state.get('postprocessor'):
+        parts.append(state['postprocessor'])
+    elif stage == RETRY:
+        parts.append(_RETRY_REASONS.get(state.get('kind'), state.get('kind') or ''))
+        if state.get('delay') is not None:
+            parts.append(f"{state['delay']:.0f}초 후 {state.get('attempt', 1) + 1}번째 시도")
+    return ' · '.join(parts)
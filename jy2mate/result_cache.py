@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+다운로드 결과를 디스크에 보관하는 내용 주소 기반(content-addressed) 캐시.
+
+키는 (영상 ID, 다운로드 타입, 품질, 확장자, yt-dlp 버전) 이며, 이를 해시한 값을
+디렉토리 이름으로 사용합니다. 같은 항목을 다시 요청하면 yt-dlp 와 FFmpeg 를
+다시 실행하지 않고 캐시의 파일을 그대로 전송합니다.
+
+- 쓰기는 staging 디렉토리에서 끝낸 뒤 rename 으로 한 번에 반영합니다. (원자적 쓰기)
+- 키마다 잠금을 두어, 같은 항목에 대한 동시 요청은 다운로드 한 번을 함께 기다립니다.
+- 전체 용량이 한도를 넘으면 가장 오래 사용되지 않은 항목부터 지웁니다. (LRU)
+- 작업 결과, 다운로드 링크, 전송 중인 스트림이 쓰고 있는 항목은 고정(pin)해 두고 정리에서 건너뜁니다.
+  고정은 공유 flock 이므로 같은 캐시를 쓰는 다른 프로세스의 정리도 그 항목을 지우지 않습니다.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from . import config, metrics, storage
+
+try:
+    import fcntl
+except ImportError:  # Windows 에서는 프로세스 내 잠금만 사용
+    fcntl = None
+
+_META_FILE = 'meta.json'
+
+
+def make_key(video_id, download_type, quality, container, clip=None):
+    """
+    캐시 키 튜플을 만듭니다. yt-dlp 버전이 바뀌면 자연스럽게 새 키가 됩니다.
+    clip(구간) 이 있으면 키 끝에 붙입니다. (전체 파일의 키는 그대로)
+    """
+    key = (video_id, download_type, quality, container, metrics.ytdlp_version())
+    return key + (tuple(clip),) if clip else key
+
+
+class CacheEntry:
+    """캐시에 저장된 결과 파일 하나."""
+
+    def __init__(self, path, display_name, mime_type, size):
+        self.path = path
+        self.display_name = display_name
+        self.mime_type = mime_type
+        self.size = size
+
+
+class ResultCache:
+    """크기 한도가 있는 LRU 결과 캐시."""
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._entries_dir = os.path.join(root, 'entries')
+        self._staging_dir = os.path.join(root, 'staging')
+        self._locks_dir = os.path.join(root, 'locks')
+        for path in (self._entries_dir, self._staging_dir, self._locks_dir):
+            os.makedirs(path, exist_ok=True)
+        self._key_locks = {}
+        self._key_locks_guard = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self._pins = {}  # digest -> (공유 잠금을 건 파일, 고정 횟수)
+        self._pins_lock = threading.Lock()
+
+    @staticmethod
+    def digest(key):
+        return hashlib.sha256(json.dumps(key, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def get(self, key, pin=False):
+        """
+        캐시에 있으면 CacheEntry 를, 없으면 None 을 반환합니다.
+        pin 이 True 이고 항목이 있으면 unpin 할 때까지 정리에서 지우지 않게 고정합니다.
+        """
+        digest = self.digest(key)
+        if not pin:
+            return self._load(digest)
+        # 고정한 뒤에 읽어야 읽은 직후 다른 정리에 지워지지 않음
+        self._pin(digest)
+        entry = self._load(digest)
+        if entry is None:
+            self._unpin(digest)
+        return entry
+
+    def get_or_create(self, key, producer, pin=False):
+        """
+        캐시에 있으면 바로 반환하고, 없으면 producer(staging_dir) 를 실행해 결과를 저장합니다.
+        producer 는 staging_dir 안에 파일을 만들고 (파일 경로, 파일명, MIME 타입) 을 반환해야 합니다.
+        pin 이 True 면 돌려준 항목을 unpin 할 때까지 정리에서 지우지 않게 고정합니다.
+        """
+        digest = self.digest(key)
+        if not pin:
+            return self._get_or_create(digest, key, producer)
+        self._pin(digest)
+        try:
+            return self._get_or_create(digest, key, producer)
+        except BaseException:
+            self._unpin(digest)
+            raise
+
+    def pin(self, path):
+        """path 가 캐시 항목의 파일이면 unpin 할 때까지 정리에서 지우지 않게 고정합니다. (여러 번 고정 가능)"""
+        digest = self._digest_of(path)
+        if digest is not None:
+            self._pin(digest)
+
+    def unpin(self, path):
+        """pin 한 횟수만큼 부르면 고정이 풀립니다."""
+        digest = self._digest_of(path)
+        if digest is not None:
+            self._unpin(digest)
+
+    @contextmanager
+    def pinned(self, path):
+        self.pin(path)
+        try:
+            yield
+        finally:
+            self.unpin(path)
+
+    def _get_or_create(self, digest, key, producer):
+        entry = self._load(digest)
+        if entry:
+            metrics.RESULT_CACHE_LOOKUPS.inc(result='hit')
+            return entry
+
+        with self._key_lock(digest):
+            # 잠금을 기다리는 동안 다른 요청이 이미 만들었을 수 있음
+            entry = self._load(digest)
+            if entry:
+                metrics.RESULT_CACHE_LOOKUPS.inc(result='waited_hit')
+                return entry
+            metrics.RESULT_CACHE_LOOKUPS.inc(result='miss')
+
+            staging = os.path.join(self._staging_dir, f'{digest}-{uuid.uuid4().hex}')
+            os.makedirs(staging)
+            try:
+                file_path, display_name, mime_type = producer(staging)
+                entry_dir = os.path.join(staging, 'entry')
+                os.makedirs(entry_dir)
+                storage.move_file(file_path, os.path.join(entry_dir, display_name))
+                meta = {
+                    'key': list(key),
+                    'display_name': display_name,
+                    'mime_type': mime_type,
+                    'size': os.path.getsize(os.path.join(entry_dir, display_name)),
+                    'created_at': time.time(),
+                }
+                with open(os.path.join(entry_dir, _META_FILE), 'w', encoding='utf-8') as f:
+                    json.dump(meta, f, ensure_ascii=False)
+                os.replace(entry_dir, os.path.join(self._entries_dir, digest))
+            finally:
+                shutil.rmtree(staging, ignore_errors=True)
+
+        self._evict(keep=digest)
+        return self._load(digest)
+
+    def total_size(self):
+        return sum(size for _, _, size in self._scan())
+
+    def _load(self, digest):
+        entry_dir = os.path.join(self._entries_dir, digest)
+        meta_path = os.path.join(entry_dir, _META_FILE)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            # 메타 파일의 수정 시각을 마지막 사용 시각으로 사용 (LRU)
+            os.utime(meta_path)
+        except (FileNotFoundError, ValueError):
+            return None
+        path = os.path.join(entry_dir, meta['display_name'])
+        if not os.path.exists(path):
+            return None
+        return CacheEntry(path, meta['display_name'], meta['mime_type'], meta['size'])
+
+    def _scan(self):
+        """(digest, 마지막 사용 시각, 크기) 목록을 반환합니다."""
+        items = []
+        for digest in os.listdir(self._entries_dir):
+            meta_path = os.path.join(self._entries_dir, digest, _META_FILE)
+            try:
+                with open(meta_path, encoding='utf-8') as f:
+                    size = json.load(f)['size']
+                items.append((digest, os.path.getmtime(meta_path), size))
+            except (FileNotFoundError, ValueError, KeyError):
+                continue
+        return items
+
+    def _evict(self, keep=None):
+        """
+        한도를 넘는 만큼 오래된 항목부터 지웁니다. 방금 만든 항목(keep)과 고정된 항목은 남겨 두므로,
+        고정된 항목이 많으면 고정이 풀릴 때까지 잠시 한도를 넘을 수 있습니다.
+        """
+        with self._evict_lock:
+            items = sorted(self._scan(), key=lambda item: item[1])
+            total = sum(size for _, _, size in items)
+            for digest, _, size in items:
+                if total <= self.max_bytes:
+                    break
+                if digest == keep:
+                    continue
+                if self._remove_unpinned(digest):
+                    total -= size
+
+    def _digest_of(self, path):
+        """캐시 항목 파일의 경로면 그 digest, 아니면 None."""
+        relative = os.path.relpath(os.path.abspath(path), os.path.abspath(self._entries_dir))
+        parts = relative.split(os.sep)
+        return parts[0] if len(parts) == 2 and parts[0] != os.pardir else None
+
+    def _pin(self, digest):
+        with self._pins_lock:
+            pin_file, count = self._pins.get(digest, (None, 0))
+            if count == 0 and fcntl is not None:
+                pin_file = open(os.path.join(self._locks_dir, f'{digest}.pin'), 'w')
+                fcntl.flock(pin_file, fcntl.LOCK_SH)
+            self._pins[digest] = (pin_file, count + 1)
+
+    def _unpin(self, digest):
+        with self._pins_lock:
+            pin_file, count = self._pins.get(digest, (None, 0))
+            if count > 1:
+                self._pins[digest] = (pin_file, count - 1)
+                return
+            self._pins.pop(digest, None)
+        if pin_file is not None:
+            pin_file.close()
+
+    def _remove_unpinned(self, digest):
+        """고정되어 있지 않으면 항목을 지우고 True, 어느 프로세스든 고정해 두었으면 False. (self._evict_lock 안에서 호출)"""
+        with self._pins_lock:
+            if digest in self._pins:
+                return False
+        if fcntl is None:
+            shutil.rmtree(os.path.join(self._entries_dir, digest), ignore_errors=True)
+            return True
+        # 잠금 파일은 지우지 않음 (지우면 지우기 직전에 파일을 연 프로세스와 새로 연 프로세스가 다른 파일을 잠그게 됨)
+        with open(os.path.join(self._locks_dir, f'{digest}.pin'), 'w') as pin_file:
+            try:
+                fcntl.flock(pin_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            shutil.rmtree(os.path.join(self._entries_dir, digest), ignore_errors=True)
+        return True
+
+    @contextmanager
+    def _key_lock(self, digest):
+        """같은 키에 대해 프로세스 내(스레드) 및 프로세스 간(flock) 배타 잠금을 겁니다."""
+        with self._key_locks_guard:
+            lock, waiters = self._key_locks.get(digest, (threading.Lock(), 0))
+            self._key_locks[digest] = (lock, waiters + 1)
+        try:
+            with lock:
+                if fcntl is None:
+                    yield
+                else:
+                    with open(os.path.join(self._locks_dir, f'{digest}.lock'), 'w') as lock_file:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX)
+                        try:
+                            yield
+                        finally:
+                            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            with self._key_locks_guard:
+                lock, waiters = self._key_locks[digest]
+                if waiters == 1:
+                    del self._key_locks[digest]
+                else:
+                    self._key_locks[digest] = (lock, waiters - 1)
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """프로세스 전체에서 공유하는 결과 캐시를 반환합니다."""
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache(config.CACHE_DIR, config.CACHE_MAX_BYTES)
+        return _result_cache
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+다운로드 실패를 종류별로 나누어 재시도 여부와 대기 시간을 정하는 재시도 정책.
+
+- permanent : 삭제/비공개/지역 제한/지원하지 않는 URL 등 다시 시도해도 같은 결과인 오류. 바로 실패합니다.
+- throttled : 429, 403, 봇 확인 요청처럼 요청 제한으로 보이는 오류. 더 길게 기다리고 다른 프로필로 시도합니다.
+- transient : 연결 끊김, 시간 초과, 5xx 같은 일시적인 오류. 짧게 기다렸다가 다시 시도합니다.
+
+대기 시간은 full jitter 지수 백오프(0 ~ min(cap, base * 2^n) 사이의 무작위 값)이며,
+작업 하나가 진전 없이 실패한 시도와 대기에 쓰는 시간은 RETRY_BUDGET 을 넘지 않습니다.
+다운로드가 조금이라도 진행된 뒤 실패했다면 예산과 시도 횟수를 처음부터 다시 셉니다.
+(이어받기가 되므로, 큰 파일을 받다가 끊겨도 받은 만큼은 잃지 않고 다시 시도합니다)
+ProfileScoreboard 는 User-Agent/쿠키 프로필별로 최근 성공/실패를 기록해, 최근에 실패한 프로필은 점수가
+회복될 때까지 쉬게 하고 나머지 프로필에 요청을 고르게 나눕니다.
+"""
+
+import random
+import threading
+import time
+
+from . import config, metrics, storage
+
+PERMANENT = 'permanent'
+THROTTLED = 'throttled'
+TRANSIENT = 'transient'
+
+_PERMANENT_PATTERNS = (
+    'video unavailable', 'private video', 'this video is not available', 'this video has been removed',
+    'has been terminated', 'members-only', 'join this channel', 'confirm your age', 'inappropriate for some users',
+    'copyright', 'not available in your country', 'blocked it in your country', 'unsupported url',
+    'is not a valid url', 'requested format is not available', 'http error 404', 'http error 410',
+    'premieres in', 'live event will begin', 'no video formats found',
+)
+_THROTTLED_PATTERNS = (
+    'http error 429', 'too many requests', 'http error 403', 'forbidden', "not a bot", 'not a robot',
+    'rate-limit', 'rate limit', 'ratelimit',
+)
+
+
+def classify(error):
+    """예외를 PERMANENT / THROTTLED / TRANSIENT 중 하나로 분류합니다."""
+    from yt_dlp.networking.exceptions import RequestError
+    from yt_dlp.utils import DownloadError, ExtractorError
+
+    if isinstance(error, storage.StorageFull):
+        return PERMANENT
+    message = str(error).lower()
+    if any(pattern in message for pattern in _THROTTLED_PATTERNS):
+        return THROTTLED
+    if any(pattern in message for pattern in _PERMANENT_PATTERNS):
+        return PERMANENT
+    cause = (getattr(error, 'exc_info', None) or (None, None))[1]
+    if isinstance(error, ExtractorError) or isinstance(cause, ExtractorError):
+        # yt-dlp 가 expected 로 표시한 추출 오류는 사용자에게 그대로 보여줄 확정적인 오류
+        return PERMANENT if getattr(cause or error, 'expected', False) else TRANSIENT
+    if isinstance(error, (DownloadError, RequestError, OSError)):
+        return TRANSIENT
+    # 그 밖의 예외(코드 오류 등)는 다시 시도해도 같은 결과
+    return PERMANENT
+
+
+def backoff(attempt, kind=TRANSIENT, base=None, cap=None):
+    """attempt 번째(0부터) 재시도 전에 기다릴 시간. full jitter 지수 백오프."""
+    base = config.RETRY_BASE if base is None else base
+    cap = config.RETRY_CAP if cap is None else cap
+    if kind == THROTTLED:
+        base *= config.RETRY_THROTTLE_FACTOR
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _ytdlp_sleep(n):
+    """yt-dlp 내부 HTTP/조각 재시도 대기 시간 (retry_sleep_functions 용)."""
+    delay = backoff(n, cap=config.RETRY_CAP / 4)
+    metrics.RETRY_SECONDS.inc(delay, kind=TRANSIENT)
+    return delay
+
+
+def ytdlp_retry_options():
+    """yt-dlp 내부 재시도 옵션. 횟수는 yt-dlp 기본값을 따르고, 대기 시간만 지터 백오프로 바꿉니다."""
+    return {
+        'retries': config.YTDLP_RETRIES,
+        'fragment_retries': config.YTDLP_RETRIES,
+        'retry_sleep_functions': {'http': _ytdlp_sleep, 'fragment': _ytdlp_sleep},
+    }
+
+
+class ProfileScoreboard:
+    """
+    프로필별 최근 성공/실패 점수. 점수는 half_life 초마다 절반으로 줄어들며,
+    점수가 healthy_floor 보다 높은 프로필을 정상으로 봅니다. (요청 제한 한 번이면 half_life 두 번 동안 쉼)
+    """
+
+    def __init__(self, half_life=600.0, explore=0.05, healthy_floor=-0.5):
+        self.half_life = half_life
+        self.explore = explore
+        self.healthy_floor = healthy_floor
+        self._scores = {}  # 프로필 -> (점수, 갱신 시각)
+        self._lock = threading.Lock()
+
+    def _decayed(self, profile, now):
+        score, updated_at = self._scores.get(profile, (0.0, now))
+        return score * 0.5 ** ((now - updated_at) / self.half_life)
+
+    def choose(self, profiles, exclude=()):
+        """
+        정상인 프로필 중 하나를 무작위로 고릅니다. 정상인 프로필이 없으면 점수가 가장 높은 프로필을 고르고,
+        가끔(explore 비율)은 쉬고 있는 프로필도 골라 회복되었는지 확인합니다.
+        """
+        candidates = [profile for profile in profiles if profile not in exclude] or list(profiles)
+        if random.random() < self.explore:
+            return random.choice(candidates)
+        now = time.monotonic()
+        with self._lock:
+            scores = {profile: self._decayed(profile, now) for profile in candidates}
+        healthy = [profile for profile, score in scores.items() if score > self.healthy_floor]
+        if healthy:
+            return random.choice(healthy)
+        return max(candidates, key=scores.get)
+
+    def record(self, profile, ok, kind=None):
+        """시도 결과를 기록합니다. 요청 제한(THROTTLED) 실패는 다른 실패보다 크게 감점합니다."""
+        now = time.monotonic()
+        delta = 1.0 if ok else (-2.0 if kind == THROTTLED else -1.0)
+        with self._lock:
+            self._scores[profile] = (self._decayed(profile, now) + delta, now)
+        metrics.PROFILE_RESULTS.inc(profile=profile, result='ok' if ok else kind or 'failed')
+
+
+class RetryPolicy:
+    """실패 종류에 따라 재시도하는 실행기. 작업마다 하나씩 만들어 사용합니다."""
+
+    def __init__(self, budget=None, max_attempts=None, sleep=time.sleep):
+        self.budget = config.RETRY_BUDGET if budget is None else budget
+        self.max_attempts = config.RETRY_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self._sleep = sleep
+
+    def run(self, attempt_fn, profiles=None, scoreboard=None, on_retry=None, progress=None):
+        """
+        attempt_fn(profile) 을 성공하거나 포기할 때까지 실행하고 결과를 반환합니다.
+        profiles 를 주면 scoreboard 가 매 시도의 프로필을 고르며, 요청 제한으로 실패한 프로필은 다음 시도에서 피합니다.
+        on_retry(kind, delay, error) 는 재시도 전 대기를 시작할 때 호출됩니다.
+        progress() 는 지금까지 받은 바이트 수처럼 진행되면 커지는 값을 돌려주며, 실패한 시도 동안 이 값이 커졌으면
+        그 시도는 예산에 넣지 않고 시도 횟수와 예산을 처음부터 다시 셉니다.
+        포기하면 마지막 예외를 그대로 다시 발생시킵니다.
+        """
+        scoreboard = scoreboard or get_scoreboard()
+        spent = 0.0
+        avoid = set()
+        attempt = 0
+        while True:
+            profile = scoreboard.choose(profiles, exclude=avoid) if profiles else None
+            attempt_started = time.monotonic()
+            progress_before = progress() if progress else None
+            try:
+                result = attempt_fn(profile)
+            except Exception as e:
+                kind = classify(e)
+                # 영상 자체의 문제(PERMANENT)는 프로필 탓이 아니므로 점수에 반영하지 않음
+                if profile is not None and kind != PERMANENT:
+                    scoreboard.record(profile, False, kind)
+                    if kind == THROTTLED:
+                        avoid.add(profile)
+                failed_for = time.monotonic() - attempt_started
+                if progress and progress() != progress_before:
+                    # 받은 만큼은 이어받으므로 이 시도는 헛되지 않았음
+                    spent, attempt, failed_for = 0.0, 0, 0.0
+                delay = backoff(attempt, kind)
+                spent += failed_for
+                give_up = (kind == PERMANENT or attempt + 1 >= self.max_attempts or spent + delay > self.budget)
+                metrics.RETRY_ATTEMPTS.inc(kind=kind, outcome='gave_up' if give_up else 'retried')
+                metrics.RETRY_SECONDS.inc(failed_for + (0 if give_up else delay), kind=kind)
+                if give_up:
+                    raise
+                if on_retry:
+                    on_retry(kind, delay, e)
+                self._sleep(delay)
+                spent += delay
+                attempt += 1
+                continue
+            if profile is not None:
+                scoreboard.record(profile, True)
+            return result
+
+
+_scoreboard = None
+_scoreboard_lock = threading.Lock()
+
+
+def get_scoreboard():
+    """프로세스 전체에서 공유하는 프로필 점수표를 반환합니다."""
+    global _scoreboard
+    with _scoreboard_lock:
+        if _scoreboard is None:
+            _scoreboard = ProfileScoreboard()
+        return _scoreboard
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+큰 단일 파일을 여러 HTTP 연결로 나눠 받는 구간(Range) 다운로더.
+
+유튜브는 연결 하나의 속도를 제한하므로, 긴 1080p 영상은 기본 단일 연결 다운로더에서 오래 걸립니다.
+RangeFetcher 는 파일을 일정 크기의 구간으로 나눠 여러 연결이 동시에 받으며, 받은 데이터는
+미리 전체 크기로 할당해 둔 출력 파일의 해당 위치에 바로 씁니다. (구간 파일을 합치는 단계 없음)
+연결 수는 2개에서 시작해 처리량이 늘어나는 동안만 최대치까지 두 배씩 늘리고, 줄어들면 하나씩 줄입니다.
+
+이어받기용 임시 디렉토리(storage.Manifest)에서 받을 때는 다 받은 구간을 기록해 두고, 재시도나
+다시 요청할 때 남은 구간만 받습니다. 기본 다운로더가 남긴 .part 는 앞부분을 다 받은 구간으로 봅니다.
+
+DASH/HLS 처럼 조각(fragment)으로 나뉜 포맷은 yt-dlp 의 concurrent_fragment_downloads 가
+같은 연결 수로 병렬 처리합니다.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+import yt_dlp
+from yt_dlp.downloader.http import HttpFD
+from yt_dlp.networking import Request
+from yt_dlp.networking.exceptions import RequestError
+from yt_dlp.utils import determine_protocol
+
+from . import config, storage
+
+_READ_SIZE = 256 * 1024
+
+
+def preallocate(path, size):
+    """
+    size 바이트의 출력 파일을 만듭니다. 가능하면 디스크 공간을 실제로 확보합니다.
+    이미 있는 파일은 내용을 지우지 않고 크기만 맞춥니다. (이어받을 구간 유지)
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        if os.fstat(fd).st_size > size:
+            os.ftruncate(fd, size)
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except (AttributeError, OSError):
+            os.ftruncate(fd, size)
+    finally:
+        os.close(fd)
+
+
+class RangeFetcher:
+    """
+    open_range(start, end) 로 구간을 받아 path 의 해당 위치에 씁니다.
+    open_range 는 read(n) 을 지원하는 응답 객체를 반환해야 합니다.
+    completed 에 있는 시작 위치의 구간은 이미 받은 것으로 보고 건너뛰며,
+    on_segment(시작 위치) 는 구간 하나를 다 받을 때마다 호출됩니다.
+    """
+
+    def __init__(self, open_range, path, total, max_connections, segment_size=None, retries=3,
+                 adapt_interval=1.0, completed=(), on_segment=None):
+        self.open_range = open_range
+        self.path = path
+        self.total = total
+        self.max_connections = max(1, max_connections)
+        self.segment_size = segment_size or config.SEGMENT_SIZE
+        self.retries = retries
+        self.adapt_interval = adapt_interval
+        self.on_segment = on_segment
+        self.elapsed = 0.0
+        self.connections = min(2, self.max_connections)
+        self.peak_connections = self.connections
+        completed = set(completed)
+        # (구간 시작, 받을 위치, 구간 끝, 시도 횟수)
+        self._segments = deque((start, start, min(start + self.segment_size, total) - 1, 0)
+                               for start in range(0, total, self.segment_size) if start not in completed)
+        # 이전 시도에서 받아 두어 이번에 받지 않는 바이트 수
+        self.resumed = total - sum(end - start + 1 for start, _, end, _ in self._segments)
+        self.downloaded = self.resumed
+        self._pending = len(self._segments)
+        self._active = 0
+        self._error = None
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def run(self, progress=None, progress_interval=0.5):
+        """모든 구간을 받을 때까지 기다립니다. progress(상태 dict) 는 progress_interval 마다 호출됩니다."""
+        preallocate(self.path, self.total)
+        started = time.monotonic()
+        fd = os.open(self.path, os.O_WRONLY)
+        try:
+            self._spawn(fd)
+            last_report = last_adapt = started
+            last_bytes = adapt_bytes = self.downloaded
+            best_speed = 0.0
+            while True:
+                with self._lock:
+                    self._changed.wait(progress_interval)
+                    if self._error or not self._pending:
+                        break
+                now = time.monotonic()
+                if progress and now - last_report >= progress_interval:
+                    speed = (self.downloaded - last_bytes) / (now - last_report)
+                    progress({
+                        'status': 'downloading',
+                        'downloaded_bytes': self.downloaded,
+                        'total_bytes': self.total,
+                        'speed': speed,
+                        'eta': (self.total - self.downloaded) / speed if speed else None,
+                        'elapsed': now - started,
+                    })
+                    last_report, last_bytes = now, self.downloaded
+                if now - last_adapt >= self.adapt_interval:
+                    speed = (self.downloaded - adapt_bytes) / (now - last_adapt)
+                    best_speed = self._adapt(speed, best_speed)
+                    last_adapt, adapt_bytes = now, self.downloaded
+                    self._spawn(fd)
+            # 실패했으면 남은 작업자가 빨리 멈추도록 하고, 모두 끝날 때까지 기다림
+            with self._lock:
+                while self._active:
+                    self._changed.wait()
+        finally:
+            os.close(fd)
+            self.elapsed = time.monotonic() - started
+        if self._error:
+            raise self._error
+
+    def _adapt(self, speed, best_speed):
+        """처리량이 10% 넘게 늘었으면 연결을 두 배로 늘리고, 최고치의 80% 아래로 떨어지면 하나 줄입니다."""
+        with self._lock:
+            if speed > best_speed * 1.1:
+                if self.connections < self.max_connections:
+                    self.connections = min(self.connections * 2, self.max_connections)
+                    self.peak_connections = max(self.peak_connections, self.connections)
+                return speed
+            if speed < best_speed * 0.8 and self.connections > 1:
+                self.connections -= 1
+            return best_speed
+
+    def _spawn(self, fd):
+        with self._lock:
+            count = min(self.connections, len(self._segments)) - self._active
+            self._active += max(count, 0)
+        for _ in range(count):
+            threading.Thread(target=self._worker, args=(fd,), daemon=True,
+                             name='jy2mate-range').start()
+
+    def _worker(self, fd):
+        while True:
+            with self._lock:
+                # 목표 연결 수가 줄었으면 초과한 작업자부터 종료 (잠금 안에서 세어야 한꺼번에 빠지지 않음)
+                if self._error or not self._segments or self._active > self.connections:
+                    self._leave()
+                    return
+                start, offset, end, attempt = self._segments.popleft()
+            try:
+                response = self.open_range(offset, end)
+                try:
+                    while offset <= end:
+                        data = response.read(min(_READ_SIZE, end - offset + 1))
+                        if not data:
+                            raise OSError(f'구간 {start}-{end} 응답이 {offset} 바이트에서 끊겼습니다.')
+                        os.pwrite(fd, data, offset)
+                        offset += len(data)
+                        with self._lock:
+                            self.downloaded += len(data)
+                finally:
+                    response.close()
+            except Exception as e:
+                with self._lock:
+                    if attempt >= self.retries:
+                        self._error = e
+                        self._leave()
+                        return
+                    # 받은 부분은 그대로 두고 남은 범위만 다시 받음
+                    self._segments.appendleft((start, offset, end, attempt + 1))
+                continue
+            try:
+                if self.on_segment:
+                    self.on_segment(start)
+                with self._lock:
+                    self._pending -= 1
+                    self._changed.notify_all()
+            except Exception as e:
+                # 이어받기 기록(manifest) 저장 실패 등은 다운로드 실패로 처리 (작업자가 조용히 죽으면 run 이 끝나지 않음)
+                with self._lock:
+                    self._error = e
+                    self._leave()
+                return
+
+    def _leave(self):
+        """작업자 하나가 끝났음을 알립니다. (self._lock 안에서 호출)"""
+        self._active -= 1
+        self._changed.notify_all()
+
+
+class RangedHttpFD(HttpFD):
+    """
+    서버가 Range 요청을 지원하고 파일이 충분히 크면 RangeFetcher 로 여러 연결을 사용하는 HTTP 다운로더.
+    그렇지 않으면 yt-dlp 기본 HttpFD 로 처리합니다.
+    """
+
+    FD_NAME = 'jy2mate_ranged'
+
+    def real_download(self, filename, info_dict):
+        url = info_dict['url']
+        headers = dict(info_dict.get('http_headers') or {}, **{'Accept-Encoding': 'identity'})
+        max_connections = self.params.get('concurrent_fragment_downloads') or 1
+        total = self._probe_size(url, headers) if max_connections > 1 and 'Range' not in headers else None
+        tmpfilename = self.temp_name(filename)
+        manifest = storage.manifest_for(os.path.dirname(os.path.abspath(tmpfilename)))
+        if not total or total < config.SEGMENTED_MIN_SIZE:
+            discard_sparse_part(manifest, tmpfilename)
+            return super().real_download(filename, info_dict)
+
+        self.report_destination(filename)
+        completed, on_segment = (), None
+        if manifest is not None:
+            completed = self._resume_segments(manifest, tmpfilename, total, config.SEGMENT_SIZE)
+            on_segment = lambda start: manifest.segment_done(tmpfilename, start)  # noqa: E731
+
+        def open_range(start, end):
+            response = self.ydl.urlopen(Request(url, headers=dict(headers, Range=f'bytes={start}-{end}')))
+            if response.status != 206:
+                response.close()
+                raise OSError(f'구간 요청에 {response.status} 응답을 받았습니다.')
+            return response
+
+        def progress(status):
+            self._hook_progress(dict(status, filename=filename, tmpfilename=tmpfilename), info_dict)
+
+        fetcher = RangeFetcher(open_range, tmpfilename, total, max_connections,
+                               retries=self.params.get('retries') or 0,
+                               completed=completed, on_segment=on_segment)
+        if fetcher.resumed:
+            self.to_screen(f'[download] 이전에 받은 {fetcher.resumed} 바이트를 이어받습니다.')
+        try:
+            fetcher.run(progress)
+        except (RequestError, OSError) as e:
+            self.report_error(f'구간 다운로드 실패: {e}')
+            return False
+        self.try_rename(tmpfilename, filename)
+        if manifest is not None:
+            manifest.clear_segments(tmpfilename)
+        self._hook_progress({
+            'status': 'finished', 'filename': filename,
+            'downloaded_bytes': total, 'total_bytes': total, 'elapsed': fetcher.elapsed,
+        }, info_dict)
+        return True
+
+    @staticmethod
+    def _resume_segments(manifest, tmpfilename, total, segment_size):
+        """
+        이어받을 수 있는 구간의 시작 위치 목록.
+        구간 기록이 있으면 그 기록을, 없으면 기본 다운로더가 남긴 .part 의 앞부분에 들어가는 구간을 씁니다.
+        """
+        try:
+            size = os.path.getsize(tmpfilename)
+        except OSError:
+            size = 0
+        if manifest.has_segments(tmpfilename):
+            if size == total:
+                return manifest.segments(tmpfilename, total, segment_size)
+            size = 0
+        manifest.clear_segments(tmpfilename)
+        manifest.segments(tmpfilename, total, segment_size)
+        completed = list(range(0, min(size, total) - segment_size + 1, segment_size))
+        for start in completed:
+            manifest.segment_done(tmpfilename, start)
+        return completed
+
+    def _probe_size(self, url, headers):
+        """bytes=0-0 요청으로 Range 지원 여부와 전체 크기를 확인합니다. 지원하지 않으면 None."""
+        try:
+            response = self.ydl.urlopen(Request(url, headers=dict(headers, Range='bytes=0-0')))
+        except RequestError:
+            return None
+        try:
+            content_range = response.headers.get('Content-Range') or ''
+            if response.status != 206 or '/' not in content_range:
+                return None
+            total = content_range.rsplit('/', 1)[1]
+            return int(total) if total.isdigit() else None
+        finally:
+            response.close()
+
+
+def discard_sparse_part(manifest, tmpfilename):
+    """
+    구간 다운로더가 남긴 .part 는 중간이 비어 있을 수 있으므로, 기본 다운로더가 이어받기 전에 지웁니다.
+    (기본 다운로더는 .part 크기만 보고 그 뒤부터 받음)
+    """
+    if manifest is None or not manifest.has_segments(tmpfilename):
+        return
+    try:
+        os.remove(tmpfilename)
+    except FileNotFoundError:
+        pass
+    manifest.clear_segments(tmpfilename)
+
+
+class SegmentedYoutubeDL(yt_dlp.YoutubeDL):
+    """http(s) 단일 파일 다운로드에 RangedHttpFD 를 사용하는 YoutubeDL."""
+
+    def dl(self, name, info, subtitle=False, test=False):
+        if (subtitle or test or name == '-' or not info.get('url')
+                or (self.params.get('concurrent_fragment_downloads') or 1) <= 1
+                or info.get('section_start') is not None or info.get('section_end') is not None
+                or determine_protocol(info) not in ('http', 'https')):
+            if name != '-' and not test:
+                discard_sparse_part(storage.manifest_for(os.path.dirname(os.path.abspath(name))), f'{name}.part')
+            return super().dl(name, info, subtitle, test)
+
+        fd = RangedHttpFD(self, self.params)
+        for ph in self._progress_hooks:
+            fd.add_progress_hook(ph)
+        new_info = self._copy_infodict(info)
+        if new_info.get('http_headers') is None:
+            new_info['http_headers'] = self._calc_headers(new_info)
+        return fd.download(name, new_info, subtitle)
@@ -0,0 +1,543 @@
+# -*- coding: utf-8 -*-
+"""
+작업별 임시 디렉토리(scratch)와 임시 저장 공간 한도를 관리하는 모듈.
+
+- 작업마다 설정된 위치 아래에 '<pid>-<무작위값>' 디렉토리를 하나 만들어 줍니다.
+  작은 오디오 작업은 메모리 파일시스템(tmpfs)을, 영상 작업은 디스크를 사용합니다.
+- 작업을 시작할 때 예상 용량을 잡아 두고, 전체 한도나 디스크 여유 공간이 모자라면
+  SCRATCH_WAIT 초까지 다른 작업이 끝나기를 기다린 뒤 StorageFull 로 거절합니다.
+- 다운로드 중에는 progress_hook 이 디렉토리 사용량을 확인해 작업별 한도를 넘으면 작업을 멈춥니다.
+- 주기적으로 돌아가는 정리 작업이, 강제 종료된 실행이 남긴 디렉토리(.part, .ytdl, 합치기 전 영상/음성)를 지웁니다.
+- 결과 파일은 move_file 로 옮깁니다. 같은 파일시스템이면 rename 이므로 복사하지 않습니다.
+
+scratch 에 key 를 주면 '<pid>-<무작위값>' 대신 key 로 정해지는 'job-<해시>' 디렉토리를 쓰고,
+작업이 실패하면 지우지 않고 남겨 둡니다. 같은 key 로 다시 시도하면(재시도, 다시 요청, 프로세스 재시작 후)
+같은 디렉토리에서 yt-dlp 가 .part / .ytdl 파일을 이어받고, Manifest(manifest.json)에 기록된
+받아 둔 구간과 끝난 후처리 단계를 보고 남은 일만 다시 합니다.
+남겨 둔 디렉토리는 SCRATCH_RESUME_TTL 이 지나거나, 새 작업에 공간이 모자랄 때 오래된 것부터 지웁니다.
+"""
+
+import errno
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from . import config, metrics
+
+VIDEO = 'video'
+AUDIO = 'audio'
+
+# 사용량을 다시 재는 최소 간격 (초). yt-dlp 는 데이터 블록마다 훅을 부름
+_CHECK_INTERVAL = 1.0
+# 이어받기 기록을 디스크에 쓰는 최소 간격 (초)
+_MANIFEST_SAVE_INTERVAL = 1.0
+_RESUMABLE_PREFIX = 'job-'
+
+# 진행 중인 이어받기용 디렉토리의 실제 경로 -> Manifest (manifest_for 용)
+_active_manifests = {}
+_active_manifests_lock = threading.Lock()
+
+
+class StorageFull(RuntimeError):
+    """임시 저장 공간이 부족해 작업을 시작하거나 계속할 수 없을 때 발생합니다."""
+
+
+def directory_size(path):
+    """디렉토리 안 파일들이 실제로 차지하는 바이트 수. (미리 할당한 공간 포함)"""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    st = entry.stat(follow_symlinks=False)
+                    total += max(st.st_size, getattr(st, 'st_blocks', 0) * 512)
+            except FileNotFoundError:
+                continue
+    return total
+
+
+def move_file(src, dest):
+    """
+    src 를 dest 로 옮기고 dest 를 반환합니다.
+    같은 파일시스템이면 rename 으로, tmpfs 에서 디스크로 옮길 때처럼 다르면 복사 후 원본을 지웁니다.
+    """
+    try:
+        os.replace(src, dest)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dest)
+    return dest
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def _manifest_owner_alive(directory):
+    """이어받기용 디렉토리를 마지막으로 쓴 프로세스가 이 프로세스가 아니고 아직 살아 있는지 확인합니다."""
+    try:
+        with open(os.path.join(directory, Manifest.FILE), encoding='utf-8') as f:
+            pid = json.load(f).get('pid')
+    except (OSError, ValueError):
+        return False
+    return isinstance(pid, int) and pid != os.getpid() and _pid_alive(pid)
+
+
+def manifest_for(directory):
+    """
+    directory 가 지금 진행 중인 이어받기용 임시 디렉토리면 그 Manifest 를, 아니면 None 을 반환합니다.
+    (yt-dlp 다운로더처럼 Scratch 를 직접 받지 못하는 곳에서 사용)
+    """
+    with _active_manifests_lock:
+        return _active_manifests.get(os.path.realpath(directory))
+
+
+class Manifest:
+    """
+    이어받을 수 있는 임시 디렉토리의 진행 기록(manifest.json).
+
+    - plan      : 포맷 선택과 후처리 계획. 다음 시도의 계획이 다르면 남은 파일을 버리고 처음부터 받음
+    - downloads : 파일별 받은 바이트/조각 수와 완료 여부 (yt-dlp progress_hooks)
+    - segments  : 여러 연결로 받는 파일(segmented.RangedHttpFD)에서 다 받은 구간의 시작 위치
+    - postprocessors : 끝난 후처리 단계 이름 (yt-dlp postprocessor_hooks)
+    - result    : 모든 단계가 끝난 결과 파일. 있으면 다음 시도는 yt-dlp 를 실행하지 않고 바로 사용
+    """
+
+    FILE = 'manifest.json'
+
+    def __init__(self, directory, key=None):
+        self.directory = directory
+        self.path = os.path.join(directory, self.FILE)
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.data = {}
+        if not self.data or (key is not None and self.data.get('key') != key):
+            self.data = {'key': key, 'created_at': time.time(), 'attempts': 0, 'plan': None,
+                         'downloads': {}, 'segments': {}, 'postprocessors': [], 'result': None, 'error': None}
+        self.data['pid'] = os.getpid()
+
+    @property
+    def resumed(self):
+        """이전 시도의 기록이 있는지 여부."""
+        return self.data['attempts'] > 0
+
+    def begin_attempt(self):
+        with self._lock:
+            self.data['attempts'] += 1
+        self.save(force=True)
+
+    def finish_attempt(self, error=None):
+        with self._lock:
+            self.data['error'] = error
+        self.save(force=True)
+
+    def check_plan(self, plan):
+        """
+        이번 시도의 계획을 기록합니다. 이전 시도와 계획이 다르면 남은 파일과 기록을 지우고 True 를 반환합니다.
+        (다른 포맷의 .part 를 이어 붙이지 않도록)
+        """
+        with self._lock:
+            previous = self.data['plan']
+            self.data['plan'] = plan
+            changed = previous is not None and previous != plan
+            if changed:
+                for name in os.listdir(self.directory):
+                    if name != self.FILE:
+                        path = os.path.join(self.directory, name)
+                        if os.path.isdir(path):
+                            shutil.rmtree(path, ignore_errors=True)
+                        else:
+                            os.remove(path)
+                self.data.update(downloads={}, segments={}, postprocessors=[], result=None)
+        self.save(force=True)
+        return changed
+
+    def result(self):
+        """기록된 결과 (파일 경로, 파일명, MIME 타입). 없거나 파일이 사라졌으면 None."""
+        with self._lock:
+            result = self.data['result']
+        if result and os.path.exists(os.path.join(self.directory, result[0])):
+            return os.path.join(self.directory, result[0]), result[1], result[2]
+        return None
+
+    def set_result(self, file_path, display_name, mime_type):
+        with self._lock:
+            self.data['result'] = [os.path.relpath(file_path, self.directory), display_name, mime_type]
+        self.save(force=True)
+
+    def segments(self, filename, total, segment_size):
+        """filename 에서 다 받은 구간의 시작 위치 목록. 크기나 구간 크기가 다른 기록이면 버리고 빈 목록."""
+        name = os.path.basename(filename)
+        with self._lock:
+            record = self.data['segments'].get(name)
+            if not record or record['total'] != total or record['segment_size'] != segment_size:
+                self.data['segments'][name] = record = {'total': total, 'segment_size': segment_size, 'done': []}
+            return list(record['done'])
+
+    def has_segments(self, filename):
+        with self._lock:
+            return os.path.basename(filename) in self.data['segments']
+
+    def segment_done(self, filename, start):
+        with self._lock:
+            record = self.data['segments'].get(os.path.basename(filename))
+            if record is not None:
+                record['done'].append(start)
+        self.save()
+
+    def clear_segments(self, filename):
+        with self._lock:
+            self.data['segments'].pop(os.path.basename(filename), None)
+        self.save(force=True)
+
+    def progress_hook(self, d):
+        """yt-dlp progress_hooks 용. 파일별 받은 바이트와 조각 수를 기록합니다."""
+        if d.get('status') not in ('downloading', 'finished') or not d.get('filename'):
+            return
+        with self._lock:
+            self.data['downloads'][os.path.basename(d['filename'])] = {
+                'downloaded_bytes': d.get('downloaded_bytes') or 0,
+                'total_bytes': d.get('total_bytes') or d.get('total_bytes_estimate'),
+                'fragment_index': d.get('fragment_index'),
+                'fragment_count': d.get('fragment_count'),
+                'finished': d['status'] == 'finished',
+            }
+        self.save(force=d['status'] == 'finished')
+
+    def postprocessor_hook(self, d):
+        """yt-dlp postprocessor_hooks 용. 끝난 후처리 단계를 기록합니다."""
+        if d.get('status') != 'finished':
+            return
+        with self._lock:
+            self.data['postprocessors'].append(d.get('postprocessor'))
+        self.save(force=True)
+
+    def save(self, force=False):
+        """기록을 원자적으로 씁니다. force 가 아니면 _MANIFEST_SAVE_INTERVAL 안의 반복 호출은 건너뜁니다."""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_save < _MANIFEST_SAVE_INTERVAL:
+                return
+            self._last_save = now
+            self.data['updated_at'] = time.time()
+            payload = json.dumps(self.data, ensure_ascii=False)
+            temp_path = f'{self.path}.{threading.get_ident()}.tmp'
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    f.write(payload)
+                os.replace(temp_path, self.path)
+            except FileNotFoundError:
+                # 디렉토리가 이미 지워진 경우 (작업 종료 직후 늦게 온 훅)
+                pass
+
+
+class Scratch:
+    """작업 하나의 임시 디렉토리. key 를 주고 만든 디렉토리는 manifest 로 이어받기 기록을 남깁니다."""
+
+    def __init__(self, manager, root, path, reserved, manifest=None):
+        self.manager = manager
+        self.root = root
+        self.path = path
+        self.reserved = reserved
+        self.manifest = manifest
+        # 지금 쓰고 있거나 곧 쓸 것으로 보이는 바이트 수 (받는 중인 파일의 남은 크기 포함)
+        self.used = 0
+        self._last_check = 0.0
+
+    @property
+    def charged(self):
+        """전체 한도 계산에 쓰는 값. 실제 사용량이 예약량보다 작으면 예약량을 씁니다."""
+        return max(self.used, self.reserved)
+
+    def progress_hook(self, d):
+        """yt-dlp progress_hooks 용. 작업별 한도를 넘을 것으로 보이면 StorageFull 로 다운로드를 멈춥니다."""
+        if self.manifest:
+            self.manifest.progress_hook(d)
+        now = time.monotonic()
+        if d.get('status') == 'downloading' and now - self._last_check < _CHECK_INTERVAL:
+            return
+        self._last_check = now
+        total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+        remaining = max(total - (d.get('downloaded_bytes') or 0), 0) if d.get('status') == 'downloading' else 0
+        self.manager._update(self, directory_size(self.path) + remaining)
+        if self.used > self.manager.job_max_bytes:
+            metrics.SCRATCH_EVENTS.inc(event='job_quota_exceeded')
+            raise StorageFull(
+                f"작업 하나가 쓸 수 있는 임시 공간({self.manager.job_max_bytes / 1024 ** 3:.1f}GB)을 넘었습니다."
+            )
+
+    def postprocessor_hook(self, d):
+        """yt-dlp postprocessor_hooks 용. 끝난 후처리 단계를 이어받기 기록에 남깁니다."""
+        if self.manifest:
+            self.manifest.postprocessor_hook(d)
+
+
+class StorageManager:
+    """임시 디렉토리 위치별(디스크, tmpfs) 사용량을 추적하고 한도 안에서만 새 디렉토리를 내줍니다."""
+
+    def __init__(self, disk_root, tmpfs_root=None, max_bytes=None, tmpfs_max_bytes=None, job_max_bytes=None,
+                 min_free=None, wait=None, orphan_age=None, resume_ttl=None):
+        self.disk_root = disk_root
+        self.tmpfs_root = tmpfs_root or None
+        self.max_bytes = config.SCRATCH_MAX_BYTES if max_bytes is None else max_bytes
+        self.tmpfs_max_bytes = config.SCRATCH_TMPFS_MAX_BYTES if tmpfs_max_bytes is None else tmpfs_max_bytes
+        self.job_max_bytes = config.JOB_MAX_BYTES if job_max_bytes is None else job_max_bytes
+        self.min_free = config.SCRATCH_MIN_FREE if min_free is None else min_free
+        self.wait = config.SCRATCH_WAIT if wait is None else wait
+        self.orphan_age = config.SCRATCH_ORPHAN_AGE if orphan_age is None else orphan_age
+        self.resume_ttl = config.SCRATCH_RESUME_TTL if resume_ttl is None else resume_ttl
+        os.makedirs(self.disk_root, exist_ok=True)
+        if self.tmpfs_root:
+            try:
+                os.makedirs(self.tmpfs_root, exist_ok=True)
+            except OSError:
+                self.tmpfs_root = None
+        self._active = {}  # 경로 -> Scratch
+        self._kept = {}  # 실패해서 남겨 둔 이어받기용 디렉토리 경로 -> (위치, 바이트 수, 남긴 시각)
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def start(self):
+        """남아 있던 디렉토리를 한 번 정리하고 주기적인 정리를 시작합니다."""
+        self.sweep()
+        threading.Thread(target=self._sweep_loop, name='jy2mate-scratch-sweeper', daemon=True).start()
+        return self
+
+    @contextmanager
+    def scratch(self, kind=VIDEO, reserve=None, key=None):
+        """
+        작업용 임시 디렉토리를 만들어 Scratch 를 돌려주고, 끝나면 디렉토리를 지웁니다.
+        kind 가 AUDIO 이고 tmpfs 에 자리가 있으면 tmpfs 를, 아니면 디스크를 사용합니다.
+        key 를 주면 key 로 정해지는 디렉토리를 쓰고, 작업이 실패하면 다음 시도가 이어받도록 남겨 둡니다.
+        (작업별 한도를 넘어 실패한 경우는 이어받아도 다시 넘으므로 지움)
+        """
+        if reserve is None:
+            reserve = config.SCRATCH_RESERVE_AUDIO if kind == AUDIO else config.SCRATCH_RESERVE_VIDEO
+        name = None
+        if key is not None:
+            name = _RESUMABLE_PREFIX + hashlib.sha256(
+                json.dumps(key, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()[:32]
+        scratch = self._admit(kind, reserve, name)
+        keep = False
+        try:
+            yield scratch
+        except BaseException as e:
+            if scratch.manifest is not None and not isinstance(e, StorageFull):
+                keep = True
+                scratch.manifest.finish_attempt(str(e) or type(e).__name__)
+            raise
+        finally:
+            if scratch.manifest is not None:
+                with _active_manifests_lock:
+                    _active_manifests.pop(os.path.realpath(scratch.path), None)
+            size = directory_size(scratch.path) if keep else 0
+            if not keep:
+                shutil.rmtree(scratch.path, ignore_errors=True)
+            with self._lock:
+                self._active.pop(scratch.path, None)
+                if keep:
+                    self._kept[scratch.path] = (scratch.root, size, time.time())
+                self._changed.notify_all()
+            if keep:
+                metrics.SCRATCH_EVENTS.inc(event='kept')
+
+    def usage(self, root=None):
+        """root(기본: 디스크) 에서 진행 중인 작업과 남겨 둔 이어받기용 디렉토리가 잡고 있는 바이트 수."""
+        root = root or self.disk_root
+        with self._lock:
+            return self._charged(root)
+
+    def _admit(self, kind, reserve, name=None):
+        deadline = time.monotonic() + self.wait
+        waited = False
+        with self._lock:
+            # 이어받을 디렉토리가 있으면 그 위치를 그대로 사용 (다른 위치로 옮기면 이어받을 수 없음)
+            existing_root = next((root for root in (self.tmpfs_root, self.disk_root)
+                                  if root and name and os.path.isdir(os.path.join(root, name))), None)
+            existing_size = 0
+            if existing_root:
+                path = os.path.join(existing_root, name)
+                kept = self._kept.pop(path, None)
+                existing_size = kept[1] if kept else directory_size(path)
+            while True:
+                if existing_root:
+                    max_bytes = self.tmpfs_max_bytes if existing_root == self.tmpfs_root else self.max_bytes
+                    fits = self._fits(existing_root, max_bytes, max(reserve - existing_size, 0))
+                    root = existing_root if fits else None
+                    candidates = [existing_root]
+                else:
+                    root = self._pick_root(kind, reserve)
+                    candidates = [self.tmpfs_root, self.disk_root] if kind == AUDIO else [self.disk_root]
+                if root:
+                    break
+                # 남겨 둔 이어받기용 디렉토리가 자리를 차지하고 있으면 오래된 것부터 지우고 다시 확인
+                if self._evict_kept(candidates):
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    metrics.SCRATCH_EVENTS.inc(event='rejected')
+                    raise StorageFull("임시 저장 공간이 부족합니다. 진행 중인 다운로드가 끝난 뒤 다시 시도해주세요.")
+                waited = True
+                self._changed.wait(min(remaining, 5.0))
+            path = os.path.join(root, name or f'{os.getpid()}-{uuid.uuid4().hex}')
+            scratch = Scratch(self, root, path, max(reserve, existing_size))
+            scratch.used = existing_size
+            # 정리 작업이 지우지 않도록 디렉토리를 만들기 전에 등록
+            self._active[path] = scratch
+        try:
+            os.makedirs(path, exist_ok=name is not None)
+            if name:
+                scratch.manifest = Manifest(path, key=name)
+                scratch.manifest.begin_attempt()
+                with _active_manifests_lock:
+                    _active_manifests[os.path.realpath(path)] = scratch.manifest
+        except OSError:
+            with self._lock:
+                self._active.pop(path, None)
+            raise
+        if scratch.manifest is not None and scratch.manifest.resumed and existing_size:
+            metrics.SCRATCH_EVENTS.inc(event='resumed')
+            metrics.RESUMED_BYTES.inc(existing_size)
+        else:
+            metrics.SCRATCH_EVENTS.inc(event='waited' if waited else 'created')
+        return scratch
+
+    def _pick_root(self, kind, reserve):
+        """reserve 만큼 잡을 수 있는 위치를 고릅니다. 없으면 None. (self._lock 안에서 호출)"""
+        if kind == AUDIO and self.tmpfs_root and self._fits(self.tmpfs_root, self.tmpfs_max_bytes, reserve):
+            return self.tmpfs_root
+        if self._fits(self.disk_root, self.max_bytes, reserve):
+            return self.disk_root
+        return None
+
+    def _evict_kept(self, roots):
+        """roots 에 남겨 둔 이어받기용 디렉토리 중 가장 오래된 것을 지웁니다. 지웠으면 True. (self._lock 안에서 호출)"""
+        candidates = sorted((kept_at, path) for path, (root, _, kept_at) in self._kept.items() if root in roots)
+        for _, path in candidates:
+            del self._kept[path]
+            # 다른 프로세스가 이어받아 쓰고 있으면 지우지 않음
+            if _manifest_owner_alive(path):
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            metrics.SCRATCH_EVENTS.inc(event='kept_evicted')
+            return True
+        return False
+
+    def _fits(self, root, max_bytes, reserve):
+        if self._charged(root) + reserve > max_bytes:
+            return False
+        # 디스크 여유 공간에는 이미 쓴 만큼이 빠져 있으므로, 아직 쓰지 않은 예약분만 더해서 비교
+        pending = sum(max(s.reserved - s.used, 0) for s in self._active.values() if s.root == root)
+        try:
+            free = shutil.disk_usage(root).free
+        except OSError:
+            return False
+        return free - pending - reserve >= self.min_free
+
+    def _charged(self, root):
+        return (sum(s.charged for s in self._active.values() if s.root == root)
+                + sum(size for kept_root, size, _ in self._kept.values() if kept_root == root))
+
+    def _update(self, scratch, used):
+        with self._lock:
+            shrank = used < scratch.used
+            scratch.used = used
+            if shrank:
+                self._changed.notify_all()
+
+    def sweep(self):
+        """
+        진행 중인 작업의 디렉토리가 아닌데 남아 있는 임시 디렉토리를 지웁니다.
+        만든 프로세스가 살아 있으면 orphan_age 가 지난 경우에만 지웁니다.
+        이어받기용 디렉토리('job-...')는 마지막 기록 후 resume_ttl 이 지난 경우에만 지우고,
+        그 전까지는 남겨 둔 디렉토리로 등록해 공간이 모자랄 때 지울 수 있게 합니다.
+        """
+        now = time.time()
+        for root in filter(None, (self.disk_root, self.tmpfs_root)):
+            try:
+                entries = list(os.scandir(root))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                with self._lock:
+                    if entry.path in self._active:
+                        continue
+                try:
+                    age = now - entry.stat(follow_symlinks=False).st_mtime
+                except FileNotFoundError:
+                    continue
+                if entry.name.startswith(_RESUMABLE_PREFIX) and entry.is_dir(follow_symlinks=False):
+                    try:
+                        age = now - os.path.getmtime(os.path.join(entry.path, Manifest.FILE))
+                    except FileNotFoundError:
+                        pass
+                    owner_alive = _manifest_owner_alive(entry.path)
+                    if (owner_alive and age < self.orphan_age) or (not owner_alive and age < self.resume_ttl):
+                        if not owner_alive:
+                            with self._lock:
+                                if entry.path not in self._kept and entry.path not in self._active:
+                                    self._kept[entry.path] = (root, directory_size(entry.path), now - age)
+                        continue
+                    with self._lock:
+                        self._kept.pop(entry.path, None)
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    metrics.SCRATCH_EVENTS.inc(event='kept_expired')
+                    continue
+                pid = entry.name.split('-', 1)[0]
+                owner_alive = pid.isdigit() and int(pid) != os.getpid() and _pid_alive(int(pid))
+                if owner_alive and age < self.orphan_age:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+                metrics.SCRATCH_EVENTS.inc(event='orphan_removed')
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(300)
+            self.sweep()
+
+
+def kind_for(download_type):
+    """다운로드 타입 문자열로 임시 디렉토리 종류(VIDEO / AUDIO)를 고릅니다."""
+    return AUDIO if download_type.startswith('오디오') else VIDEO
+
+
+_storage_manager = None
+_storage_manager_lock = threading.Lock()
+
+
+def get_storage_manager():
+    """프로세스 전체에서 공유하는 저장 공간 관리자를 반환합니다. (처음 호출 시 정리 작업 시작)"""
+    global _storage_manager
+    with _storage_manager_lock:
+        if _storage_manager is None:
+            _storage_manager = StorageManager(config.SCRATCH_DIR, config.SCRATCH_TMPFS_DIR).start()
+        return _storage_manager
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+완성된 파일을 메모리에 올리지 않고 브라우저로 전송하는 모듈.
+
+st.download_button 은 파일 전체를 bytes 로 받아 세션 메모리에 보관하므로,
+여기서는 별도의 작은 HTTP 서버가 디스크의 파일을 고정 크기 청크로 읽어 전송합니다.
+다운로드 하나가 차지하는 메모리는 파일 크기와 관계없이 청크 하나 분량입니다.
+/metrics, /metrics.json 은 같은 컴퓨터(루프백)에서 온 요청에만 응답합니다. (외부에는 토큰을 거는 HTTP API 의 /metrics 사용)
+"""
+
+import html
+import ipaddress
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+
+from . import config, metrics, result_cache
+
+logger = logging.getLogger(__name__)
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def is_loopback(host):
+    """'127.0.0.1', '::1', 'localhost' 처럼 이 컴퓨터만 가리키는 주소인지 확인합니다."""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def resolve_base_url(host, port, base_url):
+    """
+    다운로드 링크에 쓸 주소를 정합니다. base_url 이 없으면 루프백 바인딩에서만 http://localhost:<포트> 를 쓰고
+    경고를 남기며, 외부에 열린 주소면 링크가 사용자의 컴퓨터를 가리키게 되므로 RuntimeError.
+    """
+    if base_url:
+        return base_url.rstrip('/')
+    if not is_loopback(host):
+        raise RuntimeError(f"전송 서버를 {host} 에 열려면 브라우저가 접근할 주소 JY2MATE_FILE_BASE_URL 을 지정해야 합니다.")
+    logger.warning('JY2MATE_FILE_BASE_URL 이 없어 다운로드 링크에 http://localhost:%s 를 사용합니다. '
+                   '(이 컴퓨터의 브라우저에서만 받을 수 있음)', port)
+    return f'http://localhost:{port}'
+
+
+def iter_file_chunks(path, start=0, end=None, chunk_size=None):
+    """파일의 [start, end] 구간(end 포함)을 chunk_size 단위로 읽어 돌려줍니다."""
+    chunk_size = chunk_size or config.STREAM_CHUNK_SIZE
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = None if end is None else end - start + 1
+        while remaining is None or remaining > 0:
+            chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def stash_file(path):
+    """
+    임시 디렉토리에 있는 결과 파일을 전송용 디렉토리로 옮기고 새 경로를 반환합니다.
+    같은 파일시스템이면 rename 으로 처리되므로 파일을 복사하지 않습니다.
+    """
+    dest_dir = os.path.join(config.SERVE_DIR, uuid.uuid4().hex)
+    os.makedirs(dest_dir)
+    dest = os.path.join(dest_dir, os.path.basename(path))
+    shutil.move(path, dest)
+    return dest
+
+
+def parse_range(header, size):
+    """
+    Range 헤더를 해석해 (start, end) 를 반환합니다.
+    헤더가 없으면 None, 만족할 수 없는 범위면 ValueError 를 발생시킵니다.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        raise ValueError(header)
+    first, last = match.groups()
+    if not first:
+        # bytes=-N : 마지막 N 바이트
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def content_disposition(filename):
+    """한글 파일명도 깨지지 않도록 RFC 5987 형식의 Content-Disposition 값을 만듭니다."""
+    fallback = filename.encode('ascii', 'ignore').decode().replace('"', '') or 'download'
+    return f'attachment; filename="{fallback}"; filename*=UTF-8\'\'{quote(filename)}'
+
+
+def download_link_html(url, label):
+    """다운로드 버튼 모양의 링크 HTML 을 반환합니다. (앱 CSS 의 .jy-download-link 사용)"""
+    return (f'<a class="jy-download-link" href="{html.escape(url, quote=True)}" '
+            f'target="_blank" rel="noopener">{html.escape(label)}</a>')
+
+
+class ServedFile:
+    """
+    전송 서버에 등록된 파일 하나의 정보.
+    stream_factory 가 있으면 디스크의 파일 대신 그 함수가 돌려주는 바이트 청크를 그대로 전송합니다.
+    """
+
+    def __init__(self, path, filename, mime_type, expires_at, delete_on_expire, stream_factory=None):
+        self.path = path
+        self.filename = filename
+        self.mime_type = mime_type
+        self.expires_at = expires_at
+        self.delete_on_expire = delete_on_expire
+        self.stream_factory = stream_factory
+
+
+class _FileRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'JY2mate'
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body):
+        parts = self.path.split('?', 1)[0].strip('/').split('/')
+        if parts in (['metrics'], ['metrics.json']) and not is_loopback(self.client_address[0]):
+            self.send_error(404, 'File not found or expired')
+            return
+        if parts == ['metrics']:
+            self._send_text(metrics.REGISTRY.render_prometheus(), 'text/plain; version=0.0.4; charset=utf-8', send_body)
+            return
+        if parts == ['metrics.json']:
+            body = json.dumps(metrics.REGISTRY.to_json(), ensure_ascii=False)
+            self._send_text(body, 'application/json; charset=utf-8', send_body)
+            return
+        served = None
+        if len(parts) == 2 and parts[0] == 'files':
+            served = self.server.file_server.lookup(parts[1])
+        if served is not None and served.stream_factory is not None:
+            self._serve_stream(served, send_body)
+            return
+        if served is None or not os.path.exists(served.path):
+            self.send_error(404, 'File not found or expired')
+            return
+
+        size = os.path.getsize(served.path)
+        try:
+            byte_range = parse_range(self.headers.get('Range'), size)
+        except ValueError:
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{size}')
+            self.end_headers()
+            return
+
+        start, end = byte_range if byte_range else (0, size - 1)
+        self.send_response(206 if byte_range else 200)
+        self.send_header('Content-Type', served.mime_type)
+        self.send_header('Content-Length', str(max(end - start + 1, 0)))
+        self.send_header('Content-Disposition', content_disposition(served.filename))
+        self.send_header('Accept-Ranges', 'bytes')
+        if byte_range:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+
+        if send_body and size:
+            started = time.perf_counter()
+            sent = 0
+            try:
+                for chunk in iter_file_chunks(served.path, start, end):
+                    self.wfile.write(chunk)
+                    sent += len(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            metrics.STAGE_SECONDS.observe(time.perf_counter() - started, stage='serve')
+            metrics.STAGE_BYTES.inc(sent, stage='serve')
+
+    def _serve_stream(self, served, send_body):
+        # 전체 크기를 미리 알 수 없으므로 Content-Length 없이 보내고 연결 종료로 끝을 알립니다.
+        self.send_response(200)
+        self.send_header('Content-Type', served.mime_type)
+        self.send_header('Content-Disposition', content_disposition(served.filename))
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        if not send_body:
+            return
+        started = time.perf_counter()
+        sent = 0
+        chunks = served.stream_factory()
+        try:
+            for chunk in chunks:
+                self.wfile.write(chunk)
+                sent += len(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close:
+                close()
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - started, stage='serve_stream')
+        metrics.STAGE_BYTES.inc(sent, stage='serve_stream')
+
+    def _send_text(self, text, content_type, send_body):
+        body = text.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Streamlit 로그를 어지럽히지 않도록 접근 로그는 남기지 않습니다.
+        pass
+
+
+class FileServer:
+    """토큰으로 등록된 파일을 청크 단위로 전송하는 HTTP 서버."""
+
+    def __init__(self, host, port, base_url, ttl):
+        self.base_url = base_url
+        self.ttl = ttl
+        self._files = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _FileRequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.file_server = self
+
+    @property
+    def server_port(self):
+        return self._httpd.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, name='jy2mate-file-server', daemon=True).start()
+        threading.Thread(target=self._sweep_loop, name='jy2mate-file-sweeper', daemon=True).start()
+
+    def publish(self, path, filename, mime_type, ttl=None, delete_on_expire=False):
+        """
+        파일을 등록하고 브라우저에서 접근할 URL 을 반환합니다.
+        결과 캐시의 파일이면 링크가 만료될 때까지 캐시 정리에서 지우지 않게 고정합니다.
+        """
+        result_cache.get_result_cache().pin(path)
+        token = uuid.uuid4().hex
+        expires_at = time.time() + (ttl or self.ttl)
+        with self._lock:
+            self._files[token] = ServedFile(path, filename, mime_type, expires_at, delete_on_expire)
+        return f'{self.base_url}/files/{token}'
+
+    def publish_stream(self, stream_factory, filename, mime_type, ttl=None):
+        """
+        요청이 올 때마다 stream_factory() 가 돌려주는 바이트 청크를 전송하는 URL 을 등록합니다.
+        (재생목록 ZIP 처럼 만들어지는 중인 결과를 바로 내려받게 할 때 사용)
+        """
+        token = uuid.uuid4().hex
+        expires_at = time.time() + (ttl or self.ttl)
+        with self._lock:
+            self._files[token] = ServedFile(None, filename, mime_type, expires_at, False, stream_factory)
+        return f'{self.base_url}/files/{token}'
+
+    def lookup(self, token):
+        with self._lock:
+            served = self._files.get(token)
+        if served is None or served.expires_at < time.time():
+            return None
+        return served
+
+    def sweep(self):
+        """만료된 등록을 지우고, 전송용 디렉토리에 옮겨 둔 파일은 디스크에서도 삭제합니다."""
+        now = time.time()
+        with self._lock:
+            expired = [token for token, served in self._files.items() if served.expires_at < now]
+            removed = [self._files.pop(token) for token in expired]
+            # 같은 작업에 합류한 여러 세션이 한 파일을 각자 등록하므로, 아직 유효한 링크가 있으면 지우지 않음
+            live_paths = {served.path for served in self._files.values()}
+        for served in removed:
+            if served.path is None:
+                continue
+            result_cache.get_result_cache().unpin(served.path)
+            if served.path in live_paths:
+                continue
+            # stash_file 로 옮겨 둔 파일만 지웁니다. (캐시 등 다른 곳의 파일은 그대로 둠)
+            stash_dir = os.path.dirname(served.path)
+            if served.delete_on_expire and os.path.dirname(stash_dir) == os.path.normpath(config.SERVE_DIR):
+                shutil.rmtree(stash_dir, ignore_errors=True)
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(60)
+            self.sweep()
+
+
+_file_server = None
+_file_server_lock = threading.Lock()
+
+
+def get_file_server():
+    """프로세스 전체에서 공유하는 전송 서버를 반환합니다. (처음 호출 시 시작)"""
+    global _file_server
+    with _file_server_lock:
+        if _file_server is None:
+            base_url = resolve_base_url(config.FILE_SERVER_HOST, config.FILE_SERVER_PORT, config.FILE_SERVER_BASE_URL)
+            _file_server = FileServer(config.FILE_SERVER_HOST, config.FILE_SERVER_PORT, base_url, config.SERVE_TTL)
+            _file_server.start()
+        return _file_server
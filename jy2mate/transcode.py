@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+받아 둔 오디오 원본 하나를 FFmpeg 한 번으로 여러 형식/음질로 변환하는 모듈.
+
+mp3 와 flac 처럼 같은 곡을 여러 형식으로 받을 때, 형식마다 다운로드와 FFmpegExtractAudio 를 따로 돌리면
+원본을 매번 다시 받고 매번 다시 디코딩합니다. 여기서는 원본을 한 번만 디코딩하고 출력 파일마다
+인코더를 붙여(-map 0:a ... 출력1 -map 0:a ... 출력2) 한 번의 FFmpeg 실행으로 모든 결과를 만듭니다.
+원본 코덱이 목표 코덱과 같으면(AAC 원본 → m4a, Opus 원본 → opus) FFmpegExtractAudio 처럼 스트림을 복사합니다.
+"""
+
+import subprocess
+
+from . import format_planner
+
+# 확장자별 FFmpeg 인코더
+_ENCODERS = {'mp3': 'libmp3lame', 'flac': 'flac', 'm4a': 'aac', 'opus': 'libopus', 'wav': 'pcm_s16le'}
+# 음질(비트레이트)과 상관없이 결과가 같은 확장자
+LOSSLESS = ('flac', 'wav')
+
+
+def _ffmpeg():
+    """yt-dlp 와 같은 방식으로 찾은 FFmpegPostProcessor. 없으면 RuntimeError."""
+    from yt_dlp.postprocessor.ffmpeg import FFmpegPostProcessor
+
+    pp = FFmpegPostProcessor()
+    if not pp.available:
+        raise RuntimeError("ffmpeg 를 찾을 수 없습니다.")
+    return pp
+
+
+def output_args(container, quality, source_codec=None):
+    """출력 파일 하나에 붙일 FFmpeg 인자. 원본 코덱이 목표 코덱과 같으면 스트림을 복사합니다."""
+    if container not in _ENCODERS:
+        raise ValueError(f"지원하지 않는 오디오 확장자입니다: {container}")
+    if format_planner.matches_audio_target(source_codec, container):
+        return ['-c:a', 'copy']
+    args = ['-c:a', _ENCODERS[container]]
+    if container not in LOSSLESS and quality:
+        args += ['-b:a', f'{quality}k']
+    return args
+
+
+def transcode_audio(source, outputs):
+    """
+    source 의 첫 오디오 스트림을 한 번의 FFmpeg 실행으로 outputs 의 각 파일로 변환합니다.
+    outputs 는 [(출력 경로, 확장자, 음질), ...] 이며, 실패하면 FFmpeg 오류 메시지와 함께 RuntimeError.
+    """
+    pp = _ffmpeg()
+    source_codec = pp.get_audio_codec(source)
+    args = [pp.executable, '-hide_banner', '-loglevel', 'error', '-nostdin', '-y', '-i', source]
+    for path, container, quality in outputs:
+        args += ['-map', '0:a:0', '-vn', '-map_metadata', '0', *output_args(container, quality, source_codec), path]
+    result = subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        message = result.stderr.decode('utf-8', 'replace').strip().splitlines()
+        raise RuntimeError(f"오디오 변환에 실패했습니다: {message[-1] if message else result.returncode}")
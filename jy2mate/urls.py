@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+유튜브 URL 에서 영상 ID 를 뽑아 캐시 키로 쓰기 위한 함수 모음.
+
+youtu.be/ID, watch?v=ID, shorts/ID, embed/ID, live/ID 등 여러 형태와
+m./music. 같은 하위 도메인, 추가 쿼리 파라미터(t, si, list, feature ...)가 붙은
+URL 이 모두 같은 영상 ID 로 정규화됩니다.
+"""
+
+import csv
+import hashlib
+import re
+from urllib.parse import parse_qs, urlparse
+
+_VIDEO_ID_RE = re.compile(r'^[A-Za-z0-9_-]{11}$')
+_YOUTUBE_HOSTS = ('youtube.com', 'youtube-nocookie.com')
+# youtube.com/<prefix>/<ID> 형태의 경로
+_PATH_PREFIXES = ('shorts', 'embed', 'live', 'v', 'e')
+
+
+def video_id_from_url(url):
+    """URL 에서 11자리 유튜브 영상 ID 를 반환합니다. 찾지 못하면 None."""
+    url = url.strip()
+    if '://' not in url:
+        url = 'https://' + url
+    parsed = urlparse(url)
+    host = (parsed.hostname or '').lower()
+    path_parts = [part for part in parsed.path.split('/') if part]
+
+    candidate = ''
+    if host == 'youtu.be':
+        candidate = path_parts[0] if path_parts else ''
+    elif any(host == domain or host.endswith('.' + domain) for domain in _YOUTUBE_HOSTS):
+        if path_parts[:1] == ['watch']:
+            candidate = parse_qs(parsed.query).get('v', [''])[0]
+        elif len(path_parts) >= 2 and path_parts[0] in _PATH_PREFIXES:
+            candidate = path_parts[1]
+    return candidate if _VIDEO_ID_RE.match(candidate) else None
+
+
+def is_playlist_url(url):
+    """재생목록(list=...)이나 채널처럼 여러 영상을 가리킬 수 있는 유튜브 URL 인지 확인합니다."""
+    url = url.strip()
+    if '://' not in url:
+        url = 'https://' + url
+    parsed = urlparse(url)
+    host = (parsed.hostname or '').lower()
+    if not any(host == domain or host.endswith('.' + domain) for domain in _YOUTUBE_HOSTS):
+        return False
+    if parse_qs(parsed.query).get('list'):
+        return True
+    first = next((part for part in parsed.path.split('/') if part), '')
+    return first in ('playlist', 'channel', 'c', 'user') or first.startswith('@')
+
+
+def normalize_url(url):
+    """유튜브 영상 URL 이면 표준 형태(watch?v=ID)로, 그 외에는 원래 URL 을 반환합니다."""
+    video_id = video_id_from_url(url)
+    if video_id:
+        return f'https://www.youtube.com/watch?v={video_id}'
+    return url.strip()
+
+
+def cache_id(url):
+    """
+    캐시 키에 쓸 식별자를 반환합니다.
+    유튜브 영상이면 영상 ID, 그 외 URL 은 URL 자체의 해시를 사용합니다.
+    """
+    video_id = video_id_from_url(url)
+    if video_id:
+        return f'youtube:{video_id}'
+    return 'url:' + hashlib.sha256(url.strip().encode('utf-8')).hexdigest()
+
+
+def parse_url_list(text, limit=None):
+    """
+    여러 줄 텍스트나 CSV 에서 URL 목록을 뽑습니다. 줄(행)마다 URL 처럼 보이는 첫 칸을 사용하고,
+    빈 줄, '#' 으로 시작하는 줄, 헤더처럼 URL 이 없는 행은 건너뜁니다.
+    같은 영상을 가리키는 URL 은 처음 것만 남기며, limit 개를 넘으면 ValueError 를 발생시킵니다.
+    """
+    found = []
+    seen = set()
+    for row in csv.reader(text.splitlines(), skipinitialspace=True):
+        cells = [cell.strip() for cell in row if cell.strip()]
+        if not cells or cells[0].startswith('#'):
+            continue
+        url = next((cell for cell in cells if '://' in cell or video_id_from_url(cell)), None)
+        if url is None or cache_id(url) in seen:
+            continue
+        seen.add(cache_id(url))
+        found.append(url)
+    if limit is not None and len(found) > limit:
+        raise ValueError(f"한 번에 받을 수 있는 URL 은 최대 {limit}개입니다. (입력: {len(found)}개)")
+    return found
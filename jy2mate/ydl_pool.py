@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+YoutubeDL 인스턴스를 옵션 프로필별로 재사용하는 풀.
+
+YoutubeDL 을 새로 만들 때마다 추출기 목록을 다시 불러오고 HTTP 연결(keep-alive)과
+추출기 인스턴스에 보관된 플레이어 JS/서명 정보를 버리게 됩니다. 이 풀은 요청마다 바뀌지 않는
+옵션(User-Agent, 쿠키, quiet 등)을 프로필로 묶어 만들어 둔 인스턴스를 빌려주고,
+요청마다 바뀌는 옵션(outtmpl, format, 후처리기, 훅)만 빌려줄 때 다시 적용합니다.
+
+인스턴스 하나는 한 번에 한 요청(스레드)만 사용하며, 풀은 여러 Streamlit 세션이 함께 씁니다.
+credentials 가 관리하는 쿠키 파일이면 파일을 다시 읽지 않고, 같은 쿠키 프로필의 인스턴스들이
+이미 파싱된 쿠키 저장소 하나를 함께 씁니다.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from . import config, credentials, metrics
+
+# 빌려줄 때마다 다시 적용하는 옵션. 나머지 옵션은 모두 프로필 키에 포함됩니다.
+REQUEST_OPTIONS = ('outtmpl', 'format', 'merge_output_format', 'postprocessors',
+                   'progress_hooks', 'postprocessor_hooks', 'logger', 'noplaylist',
+                   'concurrent_fragment_downloads', 'download_ranges', 'force_keyframes_at_cuts')
+
+
+def apply_options(ydl, options):
+    """
+    이미 만들어진 YoutubeDL 에 포맷 선택, 출력 경로, 후처리기, 훅을 적용합니다.
+    YoutubeDL 은 생성자에서 format_selector 를 만들어 두므로 params 만 바꾸면 반영되지 않습니다.
+    """
+    from yt_dlp.postprocessor import get_postprocessor
+
+    options = dict(options)
+    postprocessors = options.pop('postprocessors', ())
+    progress_hooks = options.pop('progress_hooks', ())
+    postprocessor_hooks = options.pop('postprocessor_hooks', ())
+    ydl.params.update(options)
+
+    if 'outtmpl' in options:
+        outtmpl = options['outtmpl']
+        ydl.params['outtmpl'] = dict(outtmpl) if isinstance(outtmpl, dict) else {'default': outtmpl}
+        ydl._parse_outtmpl()
+    if 'format' in options:
+        format_spec = options['format']
+        ydl.format_selector = ydl.build_format_selector(format_spec) if format_spec else None
+    # 후처리기를 추가하기 전에 훅을 등록해야 새 후처리기에도 훅이 전달됨
+    for hook in progress_hooks:
+        ydl.add_progress_hook(hook)
+    for hook in postprocessor_hooks:
+        ydl.add_postprocessor_hook(hook)
+    for pp_def in postprocessors:
+        pp_def = dict(pp_def)
+        when = pp_def.pop('when', 'post_process')
+        ydl.add_post_processor(get_postprocessor(pp_def.pop('key'))(ydl, **pp_def), when=when)
+
+
+def _cookie_digest(cookiefile):
+    if not cookiefile:
+        return None
+    managed = credentials.get_credential_manager().lookup(cookiefile)
+    if managed:
+        return managed.digest
+    with open(cookiefile, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _profile_key(profile):
+    """프로필 옵션을 정렬된 JSON 으로 바꿔 키로 사용합니다. 쿠키 파일은 경로 대신 내용의 해시를 씁니다."""
+    profile = dict(profile, cookiefile=_cookie_digest(profile.get('cookiefile')))
+    return json.dumps(profile, sort_keys=True, default=repr)
+
+
+class _PooledYdl:
+    """풀에 보관되는 인스턴스와, 빌려줄 때 되돌릴 생성 직후의 상태."""
+
+    def __init__(self, profile):
+        from .segmented import SegmentedYoutubeDL
+
+        params = dict(profile)
+        self.cookie_dir = None
+        managed = credentials.get_credential_manager().lookup(params.get('cookiefile'))
+        if managed:
+            # 파싱된 쿠키 저장소를 함께 씀. cookiefile 을 비워 두어 close() 때 공유 파일에 다시 쓰지 않게 함
+            params['cookiefile'] = None
+        elif params.get('cookiefile'):
+            # 요청용 임시 쿠키 파일은 요청이 끝나면 지워지므로, 인스턴스가 쓸 사본을 따로 둠
+            self.cookie_dir = tempfile.mkdtemp(prefix='jy2mate-ydl-')
+            params['cookiefile'] = os.path.join(self.cookie_dir, 'cookies.txt')
+            shutil.copyfile(profile['cookiefile'], params['cookiefile'])
+            os.chmod(params['cookiefile'], 0o600)
+        self.ydl = SegmentedYoutubeDL(params)
+        if managed:
+            # YoutubeDL.cookiejar 는 cached_property 이므로 처음 쓰이기 전에 값을 넣어 두면 그대로 사용됨
+            self.ydl.__dict__['cookiejar'] = managed.jar()
+        self.base_params = dict(self.ydl.params)
+        self.base_outtmpl = dict(self.ydl.params['outtmpl'])
+
+    def reset(self):
+        """이전 요청이 바꾼 옵션, 후처리기, 훅을 지웁니다. 추출기와 HTTP 연결은 그대로 둡니다."""
+        ydl = self.ydl
+        ydl.params.clear()
+        ydl.params.update(self.base_params)
+        ydl.params['outtmpl'] = dict(self.base_outtmpl)
+        ydl.format_selector = None
+        ydl._pps = {when: [] for when in ydl._pps}
+        ydl._progress_hooks = []
+        ydl._postprocessor_hooks = []
+        ydl._download_retcode = 0
+
+    def close(self):
+        try:
+            self.ydl.close()
+        finally:
+            if self.cookie_dir:
+                shutil.rmtree(self.cookie_dir, ignore_errors=True)
+
+
+class YdlPool:
+    """프로필별로 쉬고 있는 YoutubeDL 을 보관합니다. 프로필 수와 프로필당 인스턴스 수가 제한됩니다."""
+
+    def __init__(self, max_idle, max_profiles):
+        self.max_idle = max_idle
+        self.max_profiles = max_profiles
+        self._idle = OrderedDict()  # 프로필 키 -> [_PooledYdl]
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self, ydl_opts):
+        """
+        ydl_opts 에 맞는 YoutubeDL 을 빌려줍니다. 'with yt_dlp.YoutubeDL(ydl_opts) as ydl' 대신 사용합니다.
+        요청 도중 DownloadError 가 아닌 예외가 나면 인스턴스 상태를 믿을 수 없으므로 풀에 돌려놓지 않고 닫습니다.
+        """
+        from yt_dlp.utils import DownloadError
+
+        profile = {k: v for k, v in ydl_opts.items() if k not in REQUEST_OPTIONS}
+        request = {k: v for k, v in ydl_opts.items() if k in REQUEST_OPTIONS}
+        key = _profile_key(profile)
+        pooled = self._checkout(key)
+        if pooled is None:
+            pooled = _PooledYdl(profile)
+            metrics.YDL_INSTANCES.inc(result='created')
+        else:
+            metrics.YDL_INSTANCES.inc(result='reused')
+
+        reusable = False
+        try:
+            pooled.reset()
+            apply_options(pooled.ydl, request)
+            yield pooled.ydl
+            reusable = True
+        except DownloadError:
+            reusable = True
+            raise
+        finally:
+            if reusable:
+                pooled.reset()
+                self._checkin(key, pooled)
+            else:
+                pooled.close()
+
+    def _checkout(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if not idle:
+                return None
+            self._idle.move_to_end(key)
+            return idle.pop()
+
+    def _checkin(self, key, pooled):
+        closing = []
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            if len(idle) < self.max_idle:
+                idle.append(pooled)
+            else:
+                closing.append(pooled)
+            # 오래 쓰지 않은 프로필부터 정리
+            while len(self._idle) > self.max_profiles:
+                _, evicted = self._idle.popitem(last=False)
+                closing.extend(evicted)
+        for item in closing:
+            item.close()
+
+    def idle_count(self):
+        with self._lock:
+            return sum(len(idle) for idle in self._idle.values())
+
+
+_ydl_pool = None
+_ydl_pool_lock = threading.Lock()
+
+
+def get_ydl_pool():
+    """프로세스 전체에서 공유하는 YoutubeDL 풀을 반환합니다."""
+    global _ydl_pool
+    with _ydl_pool_lock:
+        if _ydl_pool is None:
+            _ydl_pool = YdlPool(config.YDL_POOL_SIZE, config.YDL_POOL_PROFILES)
+        return _ydl_pool